@@ -0,0 +1,176 @@
+"""常駐型の集計サービス
+
+localhostのHTTPポートで再集計の依頼を受け付け、起動済みのプロセスプールでプロジェクトを再集計する。
+依頼のたびにPythonの起動・ライブラリのimport・プロセスプールの起動を行わないため、WebUI・MainAppからの再集計が速くなる。
+サービスが起動していない場合、各画面は従来どおりStartProcess.pyを起動して再集計する(libs/ServiceClient.py)。
+
+API:
+    GET  /health      サービスの稼働確認
+    POST /jobs        再集計の依頼 {"project_path": "projects/xxx.json"} → {"job_id": "..."}
+    GET  /jobs/<id>   依頼の状態 {"state": "queued|running|done|error", "done": 完了件数, "total": 集計が必要な件数, ...}
+
+実行例:
+    python AggregationService.py
+"""
+import os, json, uuid, argparse, threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import StartProcess
+from libs import AppConfig, Logger
+
+logger = Logger.get_logger(__name__, console=True, file=False, trace_line=False)
+
+# 保持する完了済みの依頼の件数(古いものから破棄する)
+MAX_FINISHED_JOBS = 100
+
+
+class JobQueue:
+    """再集計の依頼を1件ずつ順に実行する(集計自体はプロセスプールで並列に行う)"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._runner = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, project_path: str) -> dict:
+        project_path = os.path.abspath(project_path)
+        with self._lock:
+            # 同じプロジェクトの依頼が待機中・実行中であればその依頼を返す
+            for job in self.jobs.values():
+                if job["project_path"] == project_path and job["state"] in ("queued", "running"):
+                    return job
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "project_path": project_path,
+                "state": "queued",
+                "done": 0,
+                "total": 0,
+                "message": "",
+                "submitted": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "finished": "",
+            }
+            self.jobs[job["job_id"]] = job
+            self._discard_finished()
+        self._runner.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> dict:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self, job: dict):
+        job["state"] = "running"
+
+        def on_progress(done, total):
+            job["done"], job["total"] = done, total
+
+        try:
+            try:
+                self._process(job, on_progress)
+            except BrokenProcessPool as e:
+                # ワーカープロセスの異常終了(メモリ不足等)でプールが使用できなくなった場合は、プールを作り直して再実行する
+                logger.warning(f"プロセスプールを再起動します: {job['project_path']} ({type(e).__name__}: {e})")
+                self.restart_pool()
+                self._process(job, on_progress)
+            job["state"] = "done"
+        except Exception as e:
+            logger.error(f"再集計に失敗しました: {job['project_path']} ({type(e).__name__}: {e})")
+            job["state"] = "error"
+            job["message"] = f"{type(e).__name__}: {e}"
+        job["finished"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _process(self, job: dict, on_progress):
+        StartProcess.process_files(
+            inputs=[job["project_path"]], project_path=job["project_path"], on_reload=True, web_ui=True,
+            executor=self.pool, on_progress=on_progress, show_dialog=False
+        )
+
+    def restart_pool(self):
+        """プロセスプールを作り直す(異常終了したワーカーを含む古いプールは待たずに破棄する)"""
+        broken, self.pool = self.pool, ProcessPoolExecutor(max_workers=self.max_workers)
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        self._runner.shutdown(wait=True)
+        self.pool.shutdown(wait=True)
+
+    def _discard_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["state"] in ("done", "error")]
+        for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self.jobs[job_id]
+
+
+def make_handler(queue: JobQueue):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, data: dict):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "pid": os.getpid()})
+            elif self.path.startswith("/jobs/"):
+                job = queue.get(self.path[len("/jobs/"):])
+                if job:
+                    self._send_json(200, job)
+                else:
+                    self._send_json(404, {"error": "job not found"})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                project_path = request["project_path"]
+            except (ValueError, KeyError):
+                self._send_json(400, {"error": "project_path is required"})
+                return
+            if not project_path.endswith(".json") or not os.path.isfile(project_path):
+                self._send_json(400, {"error": f"project not found: {project_path}"})
+                return
+            job = queue.submit(project_path)
+            self._send_json(202, {"job_id": job["job_id"]})
+
+        def log_message(self, format, *args):
+            # アクセスログ(進捗のポーリング)は出力しない
+            pass
+
+    return Handler
+
+
+def main():
+    settings = AppConfig.load_settings()
+    parser = argparse.ArgumentParser(description="TestTraQ - 集計サービス")
+    parser.add_argument("--host", default=settings["service"]["host"], help="待ち受けるホスト")
+    parser.add_argument("--port", type=int, default=settings["service"]["port"], help="待ち受けるポート")
+    args = parser.parse_args()
+
+    max_workers = settings["read_option"]["max_workers"] or os.cpu_count() or 1
+    queue = JobQueue(max_workers)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(queue))
+    logger.info(f"集計サービスを起動しました: http://{args.host}:{args.port} (並列数: {max_workers})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("集計サービスを終了しました。")
+    finally:
+        server.server_close()
+        queue.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+ファイル単位の集計処理(集計のワーカープロセスで実行する処理)
+
+プロセスプールのワーカーは、投入された関数のモジュールを import してから実行する。
+StartProcess は画面(MainApp)やSharePoint連携などを import するため、ワーカーの起動が重くならないよう、
+ワーカーで実行する処理は集計(ReadData)とファイル情報の付与に必要なものだけをこのモジュールにまとめる。
+"""
+import os, re, zipfile
+from datetime import datetime
+
+import ReadData
+from libs import Utility, Zip, ReadDefinition
+
+def make_selector_label(file, id):
+    """ファイル選択用のラベルを生成する"""
+    file_name = file["file"]
+    return f"{id}: {file_name}"
+
+def _remove_duplicate_number(filename: str) -> str:
+    """
+    ファイル名から末尾の ' (数字)' パターンを削除する
+    
+    Args:
+        filename (str): 元のファイル名
+        
+    Returns:
+        str: ' (数字)' パターンを削除したファイル名
+    """
+    # 末尾の ' (数字)' パターンを検索して削除
+    return re.sub(r' \(\d+\)(?=\.[^.]+$)', '', filename)
+
+def file_processor(file, definition: ReadDefinition.AggregateDefinition, id, fingerprint=None):
+    """
+    個別のファイル処理
+    """
+    # データ集計
+    try:
+        # ZIP内のファイルはディスクに書き出さずにメモリ上から読み込む
+        source = Zip.open_member(file["archive"], file["member"]) if file.get("member") else file["fullpath"]
+        result = ReadData.aggregate_results(filepath=source, definition=definition)
+    except Exception as e:
+        # 破損したファイル等で例外が発生しても、他のファイルの集計は継続する
+        result = make_read_error(e)
+
+    # 次回の再集計で変更有無を判定するためのファイルの指紋(集計前に取得したもの)を記録
+    if fingerprint:
+        result["fingerprint"] = fingerprint
+    
+    return attach_file_info(result, file, id)
+
+def attach_file_info(result, file, id):
+    """集計結果にファイル情報を付与する"""
+    filename = Utility.get_filename_from_path(filepath=file["fullpath"])
+    result["file"] = _remove_duplicate_number(filename)
+    result["filepath"] = file["fullpath"]
+    result["identifier"] = file["identifier"] if file.get("identifier") else ""
+    result["selector_label"] = make_selector_label(result, id)
+    # 最終読込日時を記録
+    result["last_loaded"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # ファイルの更新日時を記録
+    if file.get("member"):
+        try:
+            result["last_updated"] = Zip.get_member_mtime(Zip.get_member_info(file["archive"], file["member"])).strftime("%Y-%m-%d %H:%M:%S")
+        except (OSError, KeyError, zipfile.BadZipFile):
+            pass
+    elif os.path.exists(file["fullpath"]):
+        result["last_updated"] = datetime.fromtimestamp(os.path.getmtime(file["fullpath"])).strftime("%Y-%m-%d %H:%M:%S")
+    # ファイルのソースを記録
+    result["source"] = "sharepoint" if file.get("type") == "sharepoint" else "local"
+    
+    return result
+
+# attach_file_info・file_processor で付与する、ファイルごとの情報のキー
+FILE_INFO_KEYS = ("file", "filepath", "identifier", "selector_label", "last_loaded", "last_updated", "source", "fingerprint")
+
+def strip_file_info(result):
+    """集計結果からファイルごとの情報を除く(集計結果のキャッシュに保存する内容)"""
+    return {key: value for key, value in result.items() if key not in FILE_INFO_KEYS}
+
+def make_read_error(e: Exception) -> dict:
+    """ファイルの読込・集計中に発生した例外をエラー情報に変換する"""
+    return {
+        "error": {
+            "type": "read_error",
+            "message": f"ファイルを読み込めませんでした。\n{type(e).__name__}: {str(e)}"
+        }
+    }
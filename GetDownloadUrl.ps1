@@ -1,11 +1,23 @@
 # Microsoft.Graph PowerShellモジュールが必要です: Install-Module Microsoft.Graph -Scope CurrentUser
 # SharePointファイルのダウンロードURLを取得するスクリプト
+#   -ItemId  : 1ファイルのダウンロードURLを出力する
+#   -ItemIds : カンマ区切りの複数ファイルをまとめて取得し、{ItemId: {"url": ダウンロードURL, "name": ファイル名}} のJSONを出力する
+#              (Graphへの接続は1回のみ。取得できなかったファイルは出力に含めない)
 
 param(
-    [Parameter(Mandatory=$true)]
-    [string]$ItemId
+    [string]$ItemId,
+    [string]$ItemIds
 )
 
+if (-not $ItemId -and -not $ItemIds) {
+    Write-Error "ItemId または ItemIds を指定してください。"
+    exit 1
+}
+
+# 標準出力をUTF-8(BOMなし)にする(呼び出し元のPython(libs/UrlResolver.py)はUTF-8として読み込むため、
+# 既定のコンソールのコードページ(cp932など)のままだと日本語のファイル名が文字化けする)
+[Console]::OutputEncoding = New-Object System.Text.UTF8Encoding $false
+
 # 必要なモジュールのインポート
 Import-Module Microsoft.Graph.Teams
 Import-Module Microsoft.Graph.Files
@@ -18,20 +30,39 @@ try {
     exit 1
 }
 
-# ファイルのダウンロードURLを取得
-try {
+# 1ファイルのダウンロードURLとファイル名を取得
+function Get-DownloadInfo([string]$Id) {
     # ファイルが所属するチームとドライブの情報を取得
-    $driveItem = Get-MgDriveItem -DriveItem $ItemId
+    $driveItem = Get-MgDriveItem -DriveItem $Id
     if (-not $driveItem) {
-        Write-Error "指定されたItemIdのファイルが見つかりません。"
-        exit 1
+        throw "指定されたItemIdのファイルが見つかりません。"
     }
+    $downloadUrl = (Get-MgDriveItem -DriveId $driveItem.ParentReference.DriveId -ItemId $Id -Select '@microsoft.graph.downloadUrl').'@microsoft.graph.downloadUrl'
+    return @{ url = $downloadUrl; name = $driveItem.Name }
+}
 
+if ($ItemIds) {
+    # 複数ファイルをまとめて取得
+    $result = @{}
+    foreach ($id in ($ItemIds -split ",")) {
+        $id = $id.Trim()
+        if (-not $id) { continue }
+        try {
+            $result[$id] = Get-DownloadInfo $id
+        } catch {
+            Write-Warning "ダウンロードURLの取得に失敗しました: $id $_"
+        }
+    }
+    Write-Output ($result | ConvertTo-Json -Compress)
+    exit 0
+}
+
+# ファイルのダウンロードURLを取得
+try {
     # ダウンロードURLを取得して出力
-    $downloadUrl = (Get-MgDriveItem -DriveId $driveItem.ParentReference.DriveId -ItemId $ItemId -Select '@microsoft.graph.downloadUrl').'@microsoft.graph.downloadUrl'
-    Write-Output $downloadUrl
+    Write-Output (Get-DownloadInfo $ItemId).url
 
 } catch {
     Write-Error "ダウンロードURLの取得に失敗しました: $_"
     exit 1
-} 
\ No newline at end of file
+}
@@ -3,7 +3,27 @@ from tkinter import ttk
 import os
 import subprocess
 import argparse
-from libs import AppConfig
+from libs import AppConfig, Project, ServiceClient
+
+def open_project_file(project_file, settings, on_reload=False):
+    """
+    プロジェクトファイルを開く
+
+    集計サービスが起動している場合はサービスで再集計し、画面はこのプロセスで開いて完了後に読み込み直す。
+    サービスに接続できない場合は従来どおりStartProcess.pyを起動して再集計する。
+    """
+    job_id = ServiceClient.submit_reload(settings, project_file)
+    if job_id is None:
+        # プロジェクトファイルを入力として指定し、取得元のファイルを集計する
+        cmd = ["python", "StartProcess.py", project_file]
+        if on_reload:
+            cmd.append("--on_reload")
+        subprocess.Popen(cmd)
+        return
+    # (画面のモジュールはサービスで再集計する場合のみ読み込む)
+    import MainApp
+    json_data = Project.load_from_json(project_file)
+    MainApp.run(pjdata=json_data.get("project", {}), pjpath=project_file, indata=json_data.get("gathered_data", []), args=[project_file], service_job=job_id)
 
 class LauncherApp:
     def __init__(self, args=None):
@@ -11,6 +31,7 @@ class LauncherApp:
         self.root.title("TestTraQ - Launcher")
         self.root.geometry("400x300")
         self.root.resizable(False, False)
+        self.open_request = None  # ランチャーを閉じた後に開くプロジェクト (プロジェクトファイルのパス, 再集計時のフラグ)
         
         # 設定の読み込み
         self.settings = AppConfig.load_settings()
@@ -86,6 +107,11 @@ class LauncherApp:
 
     def open_project_with_args(self, project_file, data_files, on_reload=False):
         """引数で指定されたプロジェクトファイルを開く"""
+        if not data_files or data_files == [project_file]:
+            # プロジェクトファイルのみの場合は集計サービスで再集計する
+            self.open_request = (project_file, on_reload)
+            self.root.quit()
+            return
         cmd = ["python", "StartProcess.py", "--project", project_file]
         if on_reload:
             cmd.append("--on_reload")
@@ -164,8 +190,8 @@ class LauncherApp:
             # 最後に開いたプロジェクトを保存
             self.settings["app"]["last_opened_project"] = self.project_list.get(selection[0])
             AppConfig.save_settings(settings=self.settings)
-            # StartProcess.pyを起動
-            subprocess.Popen(["python", "StartProcess.py", project_file])
+            # ランチャーを閉じてからプロジェクトを開く
+            self.open_request = (project_file, False)
             self.root.quit()
     
     def on_up_pressed(self, event):
@@ -201,7 +227,13 @@ class LauncherApp:
 
     def run(self):
         """アプリケーションを実行"""
-        self.root.mainloop()
+        # 引数で指定されたプロジェクトを開く場合はランチャーを表示しない
+        if self.open_request is None:
+            self.root.mainloop()
+        self.root.destroy()
+        if self.open_request:
+            project_file, on_reload = self.open_request
+            open_project_file(project_file, self.settings, on_reload=on_reload)
 
 def main():
     # コマンドライン引数の設定
@@ -211,6 +243,11 @@ def main():
     parser.add_argument("data_files", nargs="*", help="処理するファイルのパス")
     args = parser.parse_args()
 
+    # プロジェクトファイルのみが指定された場合は集計サービス(起動していなければStartProcess.py)で開く
+    if args.project and not args.data_files:
+        open_project_file(args.project, AppConfig.load_settings(), on_reload=args.on_reload)
+        return
+
     # 引数がある場合は直接StartProcess.pyを実行
     if args.data_files or args.project:
         cmd = ["python", "StartProcess.py"]
@@ -8,7 +8,6 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib_fontja
 import numpy as np
-import json
 
 from libs import Utility
 from libs import AppConfig
@@ -19,6 +18,7 @@ from libs import Labels
 from libs import Clipboard
 from libs import CsvFile
 from libs import FileOperation
+from libs import ServiceClient
 
 project_data = None
 project_path = None
@@ -995,26 +995,8 @@ def reload_files(pre_message:str="", show_time:bool=True):
     response = Dialog.ask_question(root=root, title="確認", message=f"{pre_message}最新のデータを集計しますか？{time}")
 
     if response == "yes":
-        # プロジェクトファイルを開いている場合
-        if project_path:
-            try:
-                # プロジェクトファイルを読み込み
-                with open(project_path, "r", encoding="utf-8") as f:
-                    project_json = json.load(f)
-                
-                # 古い集計データを削除
-                if "gathered_data" in project_json:
-                    del project_json["gathered_data"]
-                
-                # プロジェクトファイル保存
-                with open(project_path, "w", encoding="utf-8") as f:
-                    json.dump(project_json, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                # エラー発生時
-                Dialog.show_messagebox(root=root, type="error", title="保存エラー", message=f"プロジェクトファイルの更新に失敗しました。\n{str(e)}")
-                return
-
         # 再集計用の新プロセス起動
+        # (古い集計データは削除せず、再集計したファイルから順に置き換えるため、再集計中も前回の集計データを表示できる)
         if not project_data.get("files"):
             # 取得元の設定がない場合、集計データからパスを取得して起動
             file_paths = [item["filepath"] for item in input_data if "filepath" in item]
@@ -1023,9 +1005,60 @@ def reload_files(pre_message:str="", show_time:bool=True):
             else:
                 Dialog.show_messagebox(root=root, type="warning", title="読込ファイルなし", message=f"再読み込みするファイルが設定されていません。")
         else:
+            # 集計サービスが起動している場合はサービスで再集計し、完了後にプロジェクトファイルを開き直す
+            if project_path:
+                job_id = ServiceClient.submit_reload(settings, project_path)
+                if job_id:
+                    wait_service_job(job_id)
+                    return
             # 取得元の設定がある場合、通常通りプロジェクトファイルを読み込む
             new_process(inputs=list(input_args), project_path=project_path, on_reload=True)
 
+def wait_service_job(job_id, interval_ms=500):
+    """集計サービスに依頼した再集計の完了を待ち、完了後にプロジェクトファイルを開き直す(待機中はタイトルに進捗を表示)"""
+    job = ServiceClient.get_job(settings, job_id)
+    if job is None or job["state"] == "error":
+        # サービスで再集計できなかった場合は従来どおり新しいプロセスで再集計する
+        message = job["message"] if job else "集計サービスに接続できなくなりました。"
+        Dialog.show_messagebox(root=root, type="warning", title="集計サービス", message=f"{message}\n新しいプロセスで再集計します。")
+        new_process(inputs=list(input_args), project_path=project_path, on_reload=True)
+        return
+    if job["state"] == "done":
+        # 集計サービスが保存したプロジェクトファイルを読み込み直す(新しいプロセスは起動せず、再集計後の保存も行わない)
+        reload_project()
+        return
+    progress = f" {job['done']}/{job['total']}" if job["total"] else ""
+    root.title(f"TestTraQ - 再集計中{progress}...")
+    root.after(interval_ms, lambda: wait_service_job(job_id, interval_ms))
+
+def reload_project():
+    """プロジェクトファイルを読み込み直し、画面を作り直す"""
+    global project_data, input_data, change_flg
+    json_data = Project.load_from_json(project_path)
+    project_data = json_data.get("project", {})
+    # プロジェクトファイルを開いた場合と同じく、各ファイルの更新日時を一時的に最新化
+    input_data = _update_file_timestamps(json_data.get("gathered_data", []))
+    change_flg = False
+
+    # 表示中のダイアログ・グラフ・画面を破棄して作り直す
+    close_all_dialogs()
+    plt.close('all')
+    for widget in root.winfo_children():
+        widget.destroy()
+    has_data = len(input_data)
+    update_window_title(root)
+    create_menubar(parent=root, has_data=has_data)
+    create_main_view(parent=root, has_data=has_data)
+
+def create_main_view(parent, has_data=False):
+    """全体集計タブ・ファイル別集計タブを作成する"""
+    # グローバルタブ生成
+    tab1, tab2 = create_global_tab(parent=parent, has_data=has_data)
+    # タブ1：全体集計タブ
+    create_summary_tab(tab1, has_data=has_data)
+    # タブ2：ファイル別集計タブ
+    if has_data: create_byfile_tab(tab2)
+
 def create_global_tab(parent, has_data=False):
     nb = ttk.Notebook(parent)
     # 集計結果タブ
@@ -1209,7 +1242,7 @@ def _update_file_timestamps(input_data):
         updated_data.append(data)
     return updated_data
 
-def run(pjdata=None, pjpath=None, indata=None, args=None, on_reload=False):
+def run(pjdata=None, pjpath=None, indata=None, args=None, on_reload=False, service_job=None):
     global root, input_data, settings, input_args, project_data, project_path, change_flg
     global show_byfile_graph, show_env_data
 
@@ -1252,15 +1285,14 @@ def run(pjdata=None, pjpath=None, indata=None, args=None, on_reload=False):
     # メニューバー生成
     create_menubar(parent=root, has_data=has_data)
 
-    # 起動時メッセージ
-    _show_startup_messages(has_data, project_path, on_reload, input_data)
+    # 起動時メッセージ(集計サービスで再集計中の場合は完了後に読み込み直すため表示しない)
+    if service_job:
+        root.after(0, lambda: wait_service_job(service_job))
+    else:
+        _show_startup_messages(has_data, project_path, on_reload, input_data)
 
-    # グローバルタブ生成
-    tab1, tab2 = create_global_tab(parent=root, has_data=has_data)
-    # タブ1：全体集計タブ
-    create_summary_tab(tab1, has_data=has_data)
-    # タブ2：ファイル別集計タブ
-    if has_data: create_byfile_tab(tab2)
+    # 全体集計タブ・ファイル別集計タブ生成
+    create_main_view(parent=root, has_data=has_data)
 
     # ウインドウ終了時の処理
     root.protocol("WM_DELETE_WINDOW", on_closing)
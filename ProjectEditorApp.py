@@ -1,12 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import json
 import os
 import sys
 from pathlib import Path
 from typing import List, Dict, Any, Callable
 import re
 
+from libs import Project
+
 class ProjectEditorApp:
     def __init__(self, parent=None, callback: Callable[[Dict[str, Any]], None] = None, 
                  initial_files: List[Dict[str, Any]] = None, project_path: str = None,
@@ -171,9 +172,8 @@ class ProjectEditorApp:
     def load_project_from_path(self, file_path: str):
         """指定されたパスのJSONファイルを読み込む"""
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                project_data = data.get("project", {})
+            # プロジェクト設定のみを読み込む(集計データは読み込まない)
+            project_data = Project.load_header(file_path)
                 
             # プロジェクト名を設定
             self.project_name_entry.delete(0, tk.END)
@@ -258,32 +258,19 @@ class ProjectEditorApp:
             safe_project_name = self.sanitize_filename(project_name)
             json_path = projects_dir / f"{safe_project_name}.json"
         
-        # 既存のJSONファイルがある場合は読み込む
-        existing_data = {}
-        if json_path.exists():
-            try:
-                with open(json_path, "r", encoding="utf-8") as f:
-                    existing_data = json.load(f)
-            except Exception as e:
-                messagebox.showerror("エラー", f"既存のプロジェクトファイルの読み込みに失敗しました: {str(e)}")
-                return
-
         # JSONファイルに保存するプロジェクトデータ
         json_project_data = {
             "project_name": project_name,
             "files": files
         }
 
-        # 既存のデータを保持しつつ、projectキーのデータを更新
-        existing_data["project"] = json_project_data
-        
-        # 親ウインドウの集計データが渡されている場合は一緒に保存
-        if self.gathered_data is not None:
-            existing_data["gathered_data"] = self.gathered_data
-        
-        # JSONファイルの保存
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=2)
+        # projectキーのデータを更新して保存(既存のファイルの読込から保存までを他のプロセスの書き込みと排他する)
+        # 親ウインドウの集計データが渡されている場合は一緒に保存(集計データのストアがある場合はストアに保存)
+        try:
+            Project.save_to_json(file_path=str(json_path), input_data=self.gathered_data, project_data=json_project_data)
+        except Exception as e:
+            messagebox.showerror("エラー", f"プロジェクトファイルの保存に失敗しました: {str(e)}")
+            return
             
         messagebox.showinfo("成功", f"プロジェクトファイルを保存しました。")
         self.file_saved = True
@@ -4,51 +4,60 @@ import pprint
 from libs import OpenpyxlWrapper as Excel
 from libs import Logger
 from libs import Utility
+from libs import ReadDefinition
 
 logger = Logger.get_logger(__name__, console=True, file=False, trace_line=False)
 
+# ヘッダ行の内容ごとに特定した列番号のキャッシュ
+# 同じテンプレートから作成された仕様書はヘッダ行が同じため、列番号の特定結果を再利用する
+HEADER_CACHE_SIZE = 256
+_header_cache = {"read_definition": None, "columns": {}}
+
 # 日付ごとのデータ集計
-def get_daily(data, results: list[str], completed_label:str, completed_results: list[str], executed_label:str, executed_results: list[str], plan_label:str, plan_data: list[str] = None):
+def get_daily(data, test_status: ReadDefinition.TestStatus, plan_data: list[str] = None):
+    completed_label = test_status.completed_label
+    executed_label = test_status.executed_label
+    plan_label = test_status.planned_label
+    result_set = test_status.result_set
+    completed_results = test_status.completed_results
+    executed_results = test_status.executed_results
+    # 日付ごとのカウントの初期値(各結果タイプ・完了数・消化数・計画数を0で初期化)
+    initial_keys = test_status.results + (completed_label, executed_label, plan_label)
+
     # 辞書を初期化：{日付: {結果タイプ: カウント}}
-    result_count = defaultdict(lambda: defaultdict(int))
-
-    def initialize_result_counts(results, date, result_count, completed_label, executed_label, plan_label):
-        # 各結果タイプのカウントを0で初期化
-        for key in results:
-            result_count[date][key] = result_count[date].get(key, 0)
-        result_count[date][completed_label] = result_count[date].get(completed_label, 0)  
-        result_count[date][executed_label] = result_count[date].get(executed_label, 0)
-        result_count[date][plan_label] = result_count[date].get(plan_label, 0)
-        return result_count
-    
+    result_count = {}
+
+    def get_counts(date):
+        # 日付が初出の場合のみカウントを初期化
+        counts = result_count.get(date)
+        if counts is None:
+            counts = result_count[date] = dict.fromkeys(initial_keys, 0)
+        return counts
+
     for index, row in enumerate(data):
         # 計画データの日付別集計
         plan = plan_data[index] if plan_data and index < len(plan_data) else None
         if plan and plan != [None] and len(plan) > 0:
-            plan_date = plan[0]
-            # 各実績値は0で初期化
-            result_count = initialize_result_counts(results, plan_date, result_count, completed_label, executed_label, plan_label)
-            # 計画数をカウント
-            result_count[plan_date][plan_label] += 1
+            # 計画数をカウント(各実績値は0で初期化)
+            get_counts(plan[0])[plan_label] += 1
 
         # 実績データの日付別集計
         result, name, date = row
         
         # 日付が未設定の場合は特別な識別子「no_date」として扱う
         if not date: date = "no_date"
-        # 各結果タイプのカウントを0で初期化
-        result_count = initialize_result_counts(results, date, result_count, completed_label, executed_label, plan_label)
+        counts = get_counts(date)
 
         # 結果の集計処理
         # 1. 個別の結果タイプをカウント
-        if result in results:
-            result_count[date][result] += 1
+        if result in result_set:
+            counts[result] += 1
         # 2. 完了としてカウントすべき結果の場合、"完了数"としてもカウント
         if result in completed_results:
-            result_count[date][completed_label] += 1
+            counts[completed_label] += 1
         # 3. 消化としてカウントすべき結果の場合、"消化数"としてもカウント
         if result in executed_results:
-            result_count[date][executed_label] += 1
+            counts[executed_label] += 1
 
     # 集計結果を日付ありデータと日付なしデータに分離
     out_data = {}      # 日付ありデータ
@@ -84,7 +93,7 @@ def get_daily_by_name(data):
     return out_data
 
 # 対象外の数を取得
-def get_excluded_count(data, targets:list[str]) -> int:
+def get_excluded_count(data, targets:frozenset) -> int:
     return sum(1 for row in data if row and row[0] in targets)
 
 # 全日付データ合計
@@ -104,31 +113,46 @@ def get_total_all_date(data, no_date_data, excludes:list[str]):
     return result
 
 # 完了数を合計
-def sum_completed_results(data: dict, completed_results: list) -> int:
+def sum_completed_results(data: dict, completed_results: frozenset) -> int:
     return sum(data.get(key, 0) for key in completed_results)
 
 # 実施状況を判別
-def make_run_status(count_stats: dict, settings: dict) -> str:
+def make_run_status(count_stats: dict, test_status: ReadDefinition.TestStatus) -> str:
     if count_stats["executed"] == 0:
         # 未着手
-        return settings["app"]["state"]["not_started"]["name"]
+        return test_status.not_started_name
     elif count_stats["completed"] == count_stats["available"] and count_stats["incompleted"] == 0:
         # 完了
-        return settings["app"]["state"]["completed"]["name"]
+        return test_status.completed_name
     elif count_stats["executed"] > 0:
         # 進行中
-        return settings["app"]["state"]["in_progress"]["name"]
+        return test_status.in_progress_name
     else:
         return "???"
 
 # Excelファイルからテスト結果データを読み取り、集計する関数
-def aggregate_results(filepath:str, settings):
+# definition: ReadDefinition.from_settings で作成した集計用の設定(実行ごとに1回作成して使い回す)
+def aggregate_results(filepath:str, definition: ReadDefinition.AggregateDefinition):
+    # 読込バックエンド、および読み取り専用モード(ストリーミング読込)で開くかどうか
+    # 検索キーワードに該当しないシート(変更履歴など)は中身を解析しない
+    workbook = Excel.load(
+        filepath,
+        read_only=definition.read_option.read_only,
+        backend=definition.read_option.backend,
+        sheet_keywords=definition.read_definition.sheet_search_keys,
+        sheet_ignores=definition.read_definition.sheet_search_ignores
+    )
+    try:
+        return _aggregate_workbook(workbook=workbook, definition=definition)
+    finally:
+        Excel.close(workbook)
+
+def _aggregate_workbook(workbook, definition: ReadDefinition.AggregateDefinition):
     # 設定された検索キーワードに基づいて対象シートを特定
-    workbook = Excel.load(filepath)
     sheet_names = Excel.get_sheetnames_by_keywords(
         workbook, 
-        keywords=settings["read_definition"]["sheet_search_keys"], 
-        ignores=settings["read_definition"]["sheet_search_ignores"]
+        keywords=definition.read_definition.sheet_search_keys, 
+        ignores=definition.read_definition.sheet_search_ignores
     )
 
     # 対象シートが見つからない場合はエラーを返却
@@ -140,6 +164,14 @@ def aggregate_results(filepath:str, settings):
             }
         }
 
+    # 各シートの列データを読み込みながら集計(読込はシート単位で順に行う)
+    return _aggregate_sheets(
+        sheets_columns=(_read_sheet(workbook=workbook, sheet_name=sheet_name, definition=definition) for sheet_name in sheet_names),
+        definition=definition
+    )
+
+def _aggregate_sheets(sheets_columns, definition: ReadDefinition.AggregateDefinition):
+    """_read_sheetで読み込んだ各シートの列データを集計する"""
     # 集計用の変数を初期化
     all_data = []          # 全シートの生データを格納
     all_plan_data = []     # 全シートの計画データを格納
@@ -147,9 +179,13 @@ def aggregate_results(filepath:str, settings):
     counts_by_sheet = []   # シート別の件数情報を格納
 
     # 各シートのデータを処理
-    for sheet_name in sheet_names:
-        # シートごとのデータを処理して取得
-        sheet_data = _process_sheet(workbook=workbook, sheet_name=sheet_name, settings=settings)
+    for sheet_columns in sheets_columns:
+        # 読込時にエラーが発生した場合は即時返却
+        if "error" in sheet_columns:
+            return sheet_columns
+
+        # シートごとのデータを集計して取得
+        sheet_data = _summarize_sheet(sheet_columns=sheet_columns, definition=definition)
         
         # エラーが発生した場合は即時返却
         if "error" in sheet_data:
@@ -167,12 +203,43 @@ def aggregate_results(filepath:str, settings):
             all_plan_data=all_plan_data, # 全シートの計画データ
             data_by_env=data_by_env,     # 環境別の集計データ(計画を含む)
             counts_by_sheet=counts_by_sheet,  # シート別のテストケース件数情報
-            settings=settings            # 設定情報
+            definition=definition        # 設定情報
         )
 
-def _process_sheet(workbook, sheet_name: str, settings: dict):
+def _resolve_header_columns(header: list, read_definition: ReadDefinition.ReadDefinition) -> dict:
+    """ヘッダ行から結果・担当者・日付・計画・期待結果の列番号を特定する(ヘッダ行の内容ごとにキャッシュ)"""
+    # 読み込み定義が変わった場合はキャッシュを破棄
+    if _header_cache["read_definition"] != read_definition:
+        _header_cache["read_definition"] = read_definition
+        _header_cache["columns"] = {}
+
+    signature = tuple(header)
+    columns = _header_cache["columns"].get(signature)
+    if columns is None:
+        columns = {
+            "result": read_definition.result.find_colnums(header),  # 結果
+            "person": read_definition.person.find_colnums(header),  # 担当者
+            "date": read_definition.date.find_colnums(header),      # 日付
+            "plan": read_definition.plan.find_colnums(header),      # 計画
+            "tobe": read_definition.tobe.find_colnums(header)       # 期待結果
+        }
+        # テンプレートが想定以上に多い場合は一旦クリア
+        if len(_header_cache["columns"]) >= HEADER_CACHE_SIZE:
+            _header_cache["columns"].clear()
+        _header_cache["columns"][signature] = columns
+    return columns
+
+def _read_sheet(workbook, sheet_name: str, definition: ReadDefinition.AggregateDefinition):
+    """シートのヘッダ行から列を特定し、結果・担当者・日付・計画・期待結果の列データを読み込む"""
+    read_definition = definition.read_definition
     sheet = Excel.get_sheet_by_name(workbook=workbook, sheet_name=sheet_name)
-    header_rownum = Excel.find_row(sheet, search_col=settings["read_definition"]["header"]["search_col"], search_str=settings["read_definition"]["header"]["search_key"])
+    # ヘッダ行を検索し、見つかった行の値もあわせて取得(検索はmax_search_row行目までに限定)
+    header_rownum, header = Excel.find_row_values(
+        sheet,
+        search_col=read_definition.header_search_col,
+        search_str=read_definition.header_search_key,
+        max_row=read_definition.header_max_search_row
+    )
 
     if not header_rownum:
         return {
@@ -182,18 +249,12 @@ def _process_sheet(workbook, sheet_name: str, settings: dict):
             }
         }
 
-    # ヘッダ行を取得
-    header = Excel.get_row_values(sheet=sheet, row_num=header_rownum)
-
     # 列番号(例:環境別)を取得
-    # 結果
-    result_rows = Utility.find_colnum_by_keywords(lst=header, keywords=settings["read_definition"]["result_row"]["keys"], ignore_words=settings["read_definition"]["result_row"]["ignores"])
-    # 担当者
-    person_rows = Utility.find_colnum_by_keywords(lst=header, keywords=settings["read_definition"]["person_row"]["keys"])
-    # 日付
-    date_rows = Utility.find_colnum_by_keywords(lst=header, keywords=settings["read_definition"]["date_row"]["keys"])
-    # 計画
-    plan_rows = Utility.find_colnum_by_keywords(lst=header, keywords=settings["read_definition"]["plan_row"]["keys"])
+    columns = _resolve_header_columns(header=header, read_definition=read_definition)
+    result_rows = columns["result"]  # 結果
+    person_rows = columns["person"]  # 担当者
+    date_rows = columns["date"]      # 日付
+    plan_rows = columns["plan"]      # 計画
 
     # 結果,担当者,日付の列セットが見つからないor同数でない場合はエラー
     if Utility.check_lists_equal_length(result_rows, person_rows, date_rows) == False:
@@ -216,15 +277,56 @@ def _process_sheet(workbook, sheet_name: str, settings: dict):
     # 列番号のセット(結果、担当者、日付)を作成
     sets = Utility.transpose_lists(result_rows, person_rows, date_rows)
 
+    # 期待結果列の番号
+    tobe_rownunms = columns["tobe"]
+
+    if not tobe_rownunms:
+        return {
+            "error": {
+                "type": "no_tobe_row",
+                "message": f"期待結果列が見つかりませんでした。\n定義: {list(read_definition.tobe.keywords)}"
+            }
+        }
+
+    # 全セット・計画列・期待結果列のデータを1回の走査でまとめて取得
+    # (順序: 各セット → 各計画列 → 期待結果列。期待結果列は日付変換しない)
+    col_sets = sets + [[plan_col] for plan_col in plan_rows] + [tobe_rownunms]
+    convert_dates = [True] * (len(sets) + len(plan_rows)) + [False]
+    # 読込対象の列が全て空の行が続いた時点で打ち切る(列全体に書式が設定されたシート対策)
+    columns_data = Excel.get_multiple_columns_data(sheet=sheet, col_sets=col_sets, header_row=header_rownum, ignore_header=True, convert_dates=convert_dates, empty_row_limit=definition.read_option.empty_row_limit)
+    sets_data = columns_data[:len(sets)]
+    plans_data = columns_data[len(sets):len(sets) + len(plan_rows)]
+    tobe_data = columns_data[-1]
+
+    # 値が入っている最終行
+    last_row = Excel.get_last_data_row(columns_data, header_row=header_rownum, ignore_header=True)
+
+    # 各セットの1行目からセット名を取得(セル内改行は_に置換)
+    set_names = Excel.get_cell_values(sheet=sheet, cols=[set[0] for set in sets], row=1, replace_newline=True)
+
+    return {
+        "sheet_name": sheet_name,
+        "set_names": set_names,
+        "sets_data": sets_data,
+        "plans_data": plans_data,
+        "tobe_data": tobe_data,
+        "tobe_rownums": tobe_rownunms,
+        "max_row": Excel.get_max_row(sheet, last_row),  # シート上の最終行
+        "last_row": last_row  # 値が入っている最終行
+    }
+
+def _summarize_sheet(sheet_columns: dict, definition: ReadDefinition.AggregateDefinition):
+    """_read_sheetで読み込んだ列データを環境ごとに集計する"""
+    sets_data = sheet_columns["sets_data"]
+    plans_data = sheet_columns["plans_data"]
+    set_names = sheet_columns["set_names"]
+
     # 各セット処理
     data = []
     env_data = {}  # 環境データを格納する辞書を初期化
     all_plan_data = []
     
-    for index, set in enumerate(sets):
-        # セットのデータ取得
-        set_data = Excel.get_columns_data(sheet=sheet, col_nums=set, header_row=header_rownum, ignore_header=True)
-
+    for index, set_data in enumerate(sets_data):
         # 担当者名がNoneで結果と日付が存在する場合、"NO_NAME"に置き換え
         processed_data = []
         for row in set_data:
@@ -235,17 +337,17 @@ def _process_sheet(workbook, sheet_name: str, settings: dict):
         # 全セット合計のデータにも追加
         data.extend(processed_data)
 
-        # そのセットの1行目からセット名を取得(セル内改行は_に置換)
-        set_name = Excel.get_cell_value(sheet=sheet, col=set[0], row=1, replace_newline=True)
+        # セット名
+        set_name = set_names[index]
 
         # セット名がない場合はシート名をセット
         if not set_name:
             set_name = f"セット{index + 1}"
 
         # 計画列がある場合
-        if len(plan_rows) > 0:
+        if len(plans_data) > 0:
             # 計画データを取得
-            plan_data = Excel.get_columns_data(sheet=sheet, col_nums=[plan_rows[index]], header_row=header_rownum, ignore_header=True)
+            plan_data = plans_data[index]
             all_plan_data.extend(plan_data)
         else:
             plan_data = None
@@ -253,39 +355,21 @@ def _process_sheet(workbook, sheet_name: str, settings: dict):
         # 環境ごとのデータ集計
         env_data[set_name], _ = get_daily(
             data=processed_data,
-            results=settings["test_status"]["results"],
-            completed_label=settings["test_status"]["labels"]["completed"], 
-            completed_results=settings["test_status"]["completed_results"],
-            executed_label=settings["test_status"]["labels"]["executed"],
-            executed_results=settings["test_status"]["executed_results"],
-            plan_label=settings["test_status"]["labels"]["planned"],
+            test_status=definition.test_status,
             plan_data=plan_data
         )
 
     # 環境数
-    env_count = len(sets)
-
-    # 期待結果列の番号
-    tobe_rownunms = Utility.find_colnum_by_keywords(lst=header, keywords=settings["read_definition"]["tobe_row"]["keys"])
-
-    if not tobe_rownunms:
-        return {
-            "error": {
-                "type": "no_tobe_row",
-                "message": f"期待結果列が見つかりませんでした。\n定義: {settings['read_definition']['tobe_row']['keys']}"
-            }
-        }
+    env_count = len(sets_data)
 
-    # 期待結果データ
-    tobe_data = Excel.get_column_values(sheet=sheet, col_nums=tobe_rownunms,header_row=header_rownum, ignore_header=True)
     # テストケース数を計算
-    case_count = sum(1 for item in tobe_data if any(x is not None for x in item))
+    case_count = sum(1 for item in sheet_columns["tobe_data"] if any(x is not None for x in item))
 
     if not case_count:
         return {
             "error": {
                 "type": "no_testcases",
-                "message": f"テストケース数を取得できませんでした。\n列番号: {tobe_rownunms}"
+                "message": f"テストケース数を取得できませんでした。\n列番号: {sheet_columns['tobe_rownums']}"
             }
         }
 
@@ -299,23 +383,21 @@ def _process_sheet(workbook, sheet_name: str, settings: dict):
         "plan_data": all_plan_data,
         "env_data": env_data,
         "counts": {
-            "sheet_name": sheet_name,
+            "sheet_name": sheet_columns["sheet_name"],
             "env_count": env_count,
             "all": case_count,
-            "all_plan": plan_count
+            "all_plan": plan_count,
+            "max_row": sheet_columns["max_row"],   # シート上の最終行
+            "last_row": sheet_columns["last_row"]  # 値が入っている最終行
         }
     }
 
-def _aggregate_final_results(all_data, all_plan_data, data_by_env, counts_by_sheet, settings):
+def _aggregate_final_results(all_data, all_plan_data, data_by_env, counts_by_sheet, definition: ReadDefinition.AggregateDefinition):
+    test_status = definition.test_status
     # 全セット集計(日付別)
     data_daily_total, no_date_data = get_daily(
         data=all_data,
-        results=settings["test_status"]["results"],
-        completed_label=settings["test_status"]["labels"]["completed"],
-        completed_results=settings["test_status"]["completed_results"],
-        executed_label=settings["test_status"]["labels"]["executed"],
-        executed_results=settings["test_status"]["executed_results"],
-        plan_label=settings["test_status"]["labels"]["planned"],
+        test_status=test_status,
         plan_data=all_plan_data
     )
 
@@ -327,22 +409,22 @@ def _aggregate_final_results(all_data, all_plan_data, data_by_env, counts_by_she
         data=data_daily_total,
         no_date_data=no_date_data,
         excludes=[
-            settings["test_status"]["labels"]["completed"],
-            settings["test_status"]["labels"]["executed"],
-            settings["test_status"]["labels"]["planned"]
+            test_status.completed_label,
+            test_status.executed_label,
+            test_status.planned_label
         ]
     )
 
     # 総テストケース数
     case_count_all = sum(item['env_count'] * item['all'] for item in counts_by_sheet)
     # 対象外テストケース数
-    excluded_count = get_excluded_count(data=all_data, targets=settings["read_definition"]["excluded"])
+    excluded_count = get_excluded_count(data=all_data, targets=definition.read_definition.excluded)
     # 有効テストケース数
     available_count = case_count_all - excluded_count
     # 消化テストケース数
     executed_count = sum(data_total.values())
     # 完了テストケース数
-    completed_count = sum_completed_results(data_total, settings["test_status"]["completed_results"])
+    completed_count = sum_completed_results(data_total, test_status.completed_results)
     # 未実施テストケース数(マイナスは0)
     incompleted_count = max(0, available_count - executed_count)
     # 総計画数
@@ -359,7 +441,7 @@ def _aggregate_final_results(all_data, all_plan_data, data_by_env, counts_by_she
     }
 
     # 実施状況
-    run_status = make_run_status(count_stats, settings)
+    run_status = make_run_status(count_stats, test_status)
 
     # 開始日・最終更新日
     start_date = None
@@ -369,7 +451,7 @@ def _aggregate_final_results(all_data, all_plan_data, data_by_env, counts_by_she
         # 開始日を取得
         start_date = min(data_daily_total.keys())
         # かつステータスが完了または進行中の場合
-        if run_status == settings["app"]["state"]["completed"]["name"] or run_status == settings["app"]["state"]["in_progress"]["name"]:
+        if run_status == test_status.completed_name or run_status == test_status.in_progress_name:
             # 最終更新日を取得
             last_update = max(data_daily_total.keys())
 
@@ -1,91 +1,184 @@
-import os, re, json, subprocess
+import os, sys, time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from tqdm import tqdm
-from datetime import datetime
 
-import ReadData
-import MainApp
-from libs import Utility, Dialog, Zip, AppConfig, TempDir, DownloadFiles, Project, DataConversion
+import FileProcessor
+from libs import Utility, Dialog, Zip, AppConfig, TempDir, DownloadFiles, UrlResolver, Project, DataConversion, ReadDefinition, FileFingerprint, AggregateCache, ExtractCache, FileDiscovery, FileWatcher, StatsHistory, Logger
 
-def get_xlsx_paths(inputs):
+logger = Logger.get_logger(__name__, console=True, file=False, trace_line=False)
+
+def get_xlsx_paths(inputs, zip_direct=True, extract_cache=None, file_filter=FileDiscovery.FileFilter(), max_workers=8):
     """
     入力パスからxlsxファイルのパスを取得する
     - xlsxファイル: そのまま処理
-    - zipファイル: 展開してxlsxファイルを抽出
+    - zipファイル: zip_directがTrueの場合はZIP内のxlsxファイルを解凍せずに直接読み込む対象とする
+                  (直接読み込めないファイルを含む場合、またはzip_directがFalseの場合は展開してxlsxファイルを抽出)
+                  extract_cache(展開キャッシュ)がある場合は、変更のないzipファイルは前回の展開結果を使用する
+    - ZIP内のxlsxファイルのパス(ZIPファイルのパス/ZIP内のパス): ZIPから直接読み込む
     - ディレクトリ: 再帰的にxlsxとzipファイルを検索
+
+    ディレクトリの探索(FileDiscovery.discover)とzipファイルの一覧取得・展開はスレッドプールで並列に行い、
+    集計対象のファイルを確定してから返す。ロックファイル・隠しファイル、file_filterの条件に合わないファイルは対象外とする。
     """
+    # 対象ファイル(xlsx/zip)の探索
+    paths = FileDiscovery.discover(inputs, file_filter=file_filter, max_workers=max_workers)
+
+    def is_target_member(member):
+        return file_filter.is_target_file(member.rsplit("/", 1)[-1], member)
+
+    def process_zip(zip_path):
+        """zipファイル内のxlsxファイルを処理"""
+        if zip_direct:
+            readable, unreadable = Zip.list_members(zip_path, extensions=['.xlsx'])
+            if not unreadable:
+                return [make_member_file(zip_path, info.filename) for info in readable if is_target_member(info.filename)], None
+        if extract_cache:
+            extracted_files = extract_cache.extract(zip_path, extensions=['.xlsx'])
+            return [{"fullpath": f, "archive": zip_path, "temp_dir": ""} for f in extracted_files if file_filter.is_target_file(os.path.basename(f))], None
+        extracted_files, temp_dir = Zip.extract_files_from_zip(zip_path, extensions=['.xlsx'])
+        return [{"fullpath": f, "archive": zip_path, "temp_dir": temp_dir} for f in extracted_files if file_filter.is_target_file(os.path.basename(f))], temp_dir
+
+    # zipファイルの一覧取得・展開を並列に実行
+    zip_paths = [path for path in paths if os.path.isfile(path) and Utility.get_ext_from_path(path).lower() == "zip"]
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        zip_results = dict(zip(zip_paths, executor.map(process_zip, zip_paths)))
+
     files = []
     temp_dirs = []
-    
-    def process_directory(dir_path):
-        """ディレクトリ内のxlsxとzipファイルを再帰的に処理"""
-        for entry in os.scandir(dir_path):
-            if entry.is_file():
-                ext = Utility.get_ext_from_path(entry.path)
-                if ext == "xlsx":
-                    files.append({"fullpath": entry.path, "temp_dir": ""})
-                elif ext == "zip":
-                    extracted_files, temp_dir = Zip.extract_files_from_zip(entry.path, extensions=['.xlsx'])
-                    files.extend([{"fullpath": f, "temp_dir": temp_dir} for f in extracted_files])
-                    temp_dirs.append(temp_dir)
-            elif entry.is_dir():
-                process_directory(entry.path)
-    
-    for input_path in inputs:
-        if os.path.isdir(input_path):
-            # ディレクトリの場合
-            process_directory(input_path)
-        else:
-            # ファイルの場合
-            ext = Utility.get_ext_from_path(input_path)
-            if ext == "xlsx":
-                files.append({"fullpath": input_path, "temp_dir": ""})
-            elif ext == "zip":
-                extracted_files, temp_dir = Zip.extract_files_from_zip(input_path, extensions=['.xlsx'])
-                files.extend([{"fullpath": f, "temp_dir": temp_dir} for f in extracted_files])
+    for path in paths:
+        if path in zip_results:
+            zip_files, temp_dir = zip_results[path]
+            files.extend(zip_files)
+            if temp_dir:
                 temp_dirs.append(temp_dir)
+            continue
+        if Utility.get_ext_from_path(path).lower() != "xlsx":
+            continue
+        zip_member = Zip.split_member_path(path)
+        if zip_member:
+            # ZIP内のxlsxファイル(再集計時に前回の集計データのパスが指定された場合)
+            files.append(make_member_file(*zip_member))
+        else:
+            files.append({"fullpath": path, "temp_dir": ""})
             
     return files, temp_dirs
 
-def make_selector_label(file, id):
-    """ファイル選択用のラベルを生成する"""
-    file_name = file["file"]
-    return f"{id}: {file_name}"
+def make_member_file(zip_path, member):
+    """ZIP内のファイルのファイル情報を作成する"""
+    return {"fullpath": Zip.member_path(zip_path, member), "archive": zip_path, "member": member, "temp_dir": ""}
 
-def _remove_duplicate_number(filename: str) -> str:
+def get_source_path(file):
     """
-    ファイル名から末尾の ' (数字)' パターンを削除する
-    
-    Args:
-        filename (str): 元のファイル名
-        
+    ファイルの実体のパスを取得する
+
     Returns:
-        str: ' (数字)' パターンを削除したファイル名
+        tuple: (ファイルのパス, ZIP内のパス) ZIP内のファイルでない場合、ZIP内のパスはNone
     """
-    # 末尾の ' (数字)' パターンを検索して削除
-    return re.sub(r' \(\d+\)(?=\.[^.]+$)', '', filename)
+    if file.get("member"):
+        return file["archive"], file["member"]
+    return file["fullpath"], None
 
-def file_processor(file, settings, id):
+def get_watch_path(file):
+    """変更を監視するファイルのパスを取得する(ZIP内のファイル・ZIPから展開したファイルはZIPファイルのパス)"""
+    return file.get("archive") or file["fullpath"]
+
+def aggregate_files(files, definition, max_workers: int = 0, previous_data: list = None, content_hash: bool = False, cache=None, executor=None, on_progress=None, on_result=None):
     """
-    個別のファイル処理
+    ファイル群を集計する
+
+    max_workers が2以上(0の場合はCPUコア数)のときはプロセスプールで並列に集計する。
+    結果は入力ファイルと同じ順序で返し、selector_labelの番号も入力順で採番する。
+    previous_data(前回の集計データ)がある場合、ファイルの指紋と集計設定が一致するファイルは
+    前回の集計結果を再利用し、変更されたファイルのみを集計する。
+    cache(集計結果のキャッシュ)がある場合、ファイル内容と集計設定が同じ集計結果をキャッシュから取得し、
+    新たに集計した結果はキャッシュに保存する。
+
+    Args:
+        files (list): 集計対象のファイル情報のリスト
+        definition (ReadDefinition.AggregateDefinition): 集計用の設定
+        max_workers (int): 並列数(0: CPUコア数, 1: 並列化しない)
+        previous_data (list): 前回の集計データ(gathered_data)
+        content_hash (bool): ファイルの指紋にファイル内容のハッシュを含めるかどうか
+        cache (AggregateCache.AggregateCache): 集計結果のキャッシュ(Noneの場合は使用しない)
+        executor (ProcessPoolExecutor): 集計に使用するプロセスプール(集計サービス等で起動済みのプールを使い回す場合に指定)
+        on_progress (callable): 集計の進捗(完了件数, 集計が必要な件数)を受け取る関数
+        on_result (callable): 新たに集計したファイルの集計結果を、集計が終わった順に受け取る関数(ファイルごとにプロジェクトへ反映する場合に指定)
     """
-    filename = Utility.get_filename_from_path(filepath=file["fullpath"])
-    
-    # データ集計
-    result = ReadData.aggregate_results(filepath=file["fullpath"], settings=settings)
-    
-    # ファイル情報を付与
-    result["file"] = _remove_duplicate_number(filename)
-    result["filepath"] = file["fullpath"]
-    result["identifier"] = file["identifier"] if file.get("identifier") else ""
-    result["selector_label"] = make_selector_label(result, id)
-    # 最終読込日時を記録
-    result["last_loaded"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    # ファイルの更新日時を記録
-    result["last_updated"] = datetime.fromtimestamp(os.path.getmtime(file["fullpath"])).strftime("%Y-%m-%d %H:%M:%S")
-    # ファイルのソースを記録
-    result["source"] = "sharepoint" if file.get("type") == "sharepoint" else "local"
-    
-    return result
+    # 前回の集計データ(ローカルファイルのみ)をファイルパスで引けるようにする
+    previous_by_path = {
+        data["filepath"]: data for data in (previous_data or [])
+        if "filepath" in data and data.get("source") == "local"
+    }
+
+    results = [None] * len(files)
+    jobs = []  # 集計が必要なファイル (インデックス, ファイル情報, 指紋)
+    cache_keys = {}  # 集計結果をキャッシュに保存するファイル (インデックス: キャッシュキー)
+    for index, file in enumerate(files):
+        source_path, member = get_source_path(file)
+        fingerprint = FileFingerprint.make(source_path, definition.settings_hash, content_hash=content_hash, member=member)
+        previous = previous_by_path.get(file["fullpath"])
+        if file.get("type") != "sharepoint" and FileFingerprint.is_reusable(previous, fingerprint):
+            # 変更のないファイルは前回の集計結果を再利用
+            results[index] = FileProcessor.attach_file_info(dict(previous), file, index+1)
+            continue
+
+        cache_key = AggregateCache.content_key(source_path, definition.settings_hash, fingerprint, member=member) if cache else None
+        cached = cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            # 他のプロジェクト等で集計済みの同じ内容のファイルはキャッシュの集計結果を使用
+            if fingerprint:
+                cached["fingerprint"] = fingerprint
+            results[index] = FileProcessor.attach_file_info(cached, file, index+1)
+        else:
+            jobs.append((index, file, fingerprint))
+            if cache_key:
+                cache_keys[index] = cache_key
+
+    if previous_by_path:
+        logger.info(f"再利用: {len(files) - len(jobs)}件 / 再集計: {len(jobs)}件")
+
+    _run_jobs(jobs, results, definition, max_workers, executor=executor, on_progress=on_progress, on_result=on_result)
+
+    # 新たに集計した結果をキャッシュに保存
+    if cache:
+        for index, cache_key in cache_keys.items():
+            cache.put(cache_key, FileProcessor.strip_file_info(results[index]))
+        cache.evict()
+        logger.info(cache.summary())
+    return results
+
+def _run_jobs(jobs, results, definition, max_workers, executor=None, on_progress=None, on_result=None):
+    """集計が必要なファイルを集計し、resultsの該当インデックスに格納する"""
+    if executor:
+        _run_jobs_in_pool(executor, jobs, results, definition, on_progress, on_result)
+        return
+
+    if max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(jobs))
+
+    # 並列化しない場合(ファイルが1件の場合を含む)はこのプロセスで順に集計
+    if max_workers <= 1:
+        for done, (index, file, fingerprint) in enumerate(tqdm(jobs)):
+            results[index] = FileProcessor.file_processor(file, definition, index+1, fingerprint)
+            if on_result: on_result(results[index])
+            if on_progress: on_progress(done+1, len(jobs))
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        _run_jobs_in_pool(executor, jobs, results, definition, on_progress, on_result)
+
+def _run_jobs_in_pool(executor, jobs, results, definition, on_progress=None, on_result=None):
+    futures = {executor.submit(FileProcessor.file_processor, file, definition, index+1, fingerprint): (index, file) for index, file, fingerprint in jobs}
+    for done, future in enumerate(tqdm(as_completed(futures), total=len(futures))):
+        index, file = futures[future]
+        try:
+            results[index] = future.result()
+        except Exception as e:
+            # ワーカープロセス自体が異常終了した場合もファイル単位のエラーとして扱う
+            results[index] = FileProcessor.attach_file_info(FileProcessor.make_read_error(e), file, index+1)
+        if on_result: on_result(results[index])
+        if on_progress: on_progress(done+1, len(futures))
 
 def validate_input_files(inputs):
     """
@@ -142,7 +235,95 @@ def filter_xlsx_files(inputs):
     """
     return [file_path for file_path in inputs if Utility.get_ext_from_path(file_path) == "xlsx"]
 
-def process_files(inputs, project_path="", on_reload=False, web_ui=False):
+def aggregate_sharepoint_files(sharepoint_files, project_data, settings, definition, max_workers=None, cache=None, executor=None, on_progress=None):
+    """
+    SharePointのファイルをダウンロードして集計する
+
+    全ファイルのダウンロードURLを1回でまとめて取得し(libs/UrlResolver.py)、取得したURLは有効期限付きで
+    プロジェクトデータ(download_urls)に保存する。ダウンロードできなかったファイルのURLは次回取得し直す。
+
+    Args:
+        sharepoint_files (list): プロジェクトファイルの取得元(type: sharepoint)のリスト。pathはSharePointのファイルのItemId
+        project_data (dict): プロジェクトデータ(download_urlsを更新する)
+        settings (dict): 設定
+        definition (AggregateDefinition): 集計用の設定
+
+    Returns:
+        list: 集計結果のリスト
+    """
+    sharepoint_settings = settings["sharepoint"]
+    download_settings = settings["download"]
+    url_cache = project_data.setdefault("download_urls", {})
+    item_ids = [file.get("path") for file in sharepoint_files]
+    # ダウンロードURLの取得
+    resolved = UrlResolver.resolve(item_ids, url_cache, resolver=sharepoint_settings["resolver"], ttl_minutes=sharepoint_settings["url_ttl_minutes"])
+    sharepoint_files = [file for file in sharepoint_files if file.get("path") in resolved]
+    if not sharepoint_files:
+        return []
+
+    # ファイルのダウンロード(URLは毎回変わるため、キャッシュのキーはItemIdとする)
+    item_ids = [file.get("path") for file in sharepoint_files]
+    paths, temp_dirs = DownloadFiles.download_files(
+        [resolved[item_id]["url"] for item_id in item_ids],
+        max_workers=download_settings["max_workers"],
+        cache_dir=os.path.join(settings["cache"]["dir"], "download") if settings["cache"]["download"]["enabled"] else None,
+        retries=download_settings["retries"],
+        backoff=download_settings["backoff"],
+        timeout=download_settings["timeout"],
+        cache_keys=item_ids,
+        filenames=[resolved[item_id]["name"] or None for item_id in item_ids],
+        keep_failed=True
+    )
+    # ダウンロードできなかったファイルのURL(有効期限切れなど)は次回取得し直す
+    UrlResolver.invalidate(url_cache, [item_id for item_id, path in zip(item_ids, paths) if not path])
+
+    # xlsxファイルのみ集計
+    files = [
+        {"fullpath": path, "type": "sharepoint", "identifier": file.get("identifier"), "temp_dir": ""}
+        for file, path in zip(sharepoint_files, paths) if path and filter_xlsx_files([path])
+    ]
+    try:
+        return aggregate_files(files, definition, max_workers, cache=cache, executor=executor, on_progress=on_progress) if files else []
+    finally:
+        for temp_dir in temp_dirs:
+            TempDir.cleanup_temp_dir(temp_dir)
+
+def make_result_publisher(project_path, settings):
+    """
+    集計が終わったファイルの集計結果を、順にプロジェクトへ反映する関数を作成する(aggregate_files の on_result に指定する)
+
+    再集計中も画面に集計済みのファイルの最新の集計結果を表示できるようにする。
+    集計データをストアに保存しない場合(JSONファイルに保存する場合)は、ファイルごとにJSONファイル全体を書き直すことになるため反映せず、
+    集計がすべて終わってから保存する。
+
+    Returns:
+        callable: 集計結果を受け取る関数(反映しない場合はNone)
+    """
+    if not project_path or not settings["result_store"]["enabled"]:
+        return None
+
+    def publish(result):
+        try:
+            Project.update_results(project_path, [result], use_store=True)
+        except Exception as e:
+            # 反映に失敗しても集計は継続する(集計後にまとめて保存する)
+            logger.warning(f"集計結果をプロジェクトに反映できませんでした: {result.get('filepath')} ({e})")
+    return publish
+
+def record_history(project_path, gathered_data, compact_after_days):
+    """
+    集計データのファイルごとの統計をプロジェクトの統計の履歴(libs/StatsHistory.py)に記録し、古いスナップショットを日ごとにまとめる
+    (前回のスナップショットと統計が同じ場合は記録しない)
+    """
+    try:
+        with StatsHistory.open_history(project_path) as history:
+            history.record(gathered_data, skip_unchanged=True)
+            history.compact(compact_after_days)
+    except Exception as e:
+        # 履歴の記録に失敗しても集計結果は保存済みのため処理を継続する
+        logger.warning(f"統計の履歴を記録できませんでした: {project_path} ({e})")
+
+def process_files(inputs, project_path="", on_reload=False, web_ui=False, use_cache=True, executor=None, on_progress=None, show_dialog=True):
     """
     ファイル処理のメイン関数
     
@@ -151,105 +332,241 @@ def process_files(inputs, project_path="", on_reload=False, web_ui=False):
         project_path (str): プロジェクトファイルのパス（オプション）
         on_reload (bool): データ再集計時のフラグ
         web_ui (bool): WebUI起動時のフラグ
+        use_cache (bool): 集計結果のキャッシュを使用するかどうか(Falseの場合は設定によらず使用しない)
+        executor (ProcessPoolExecutor): 集計に使用するプロセスプール(集計サービスから呼び出す場合に指定)
+        on_progress (callable): 集計の進捗(完了件数, 集計が必要な件数)を受け取る関数
+        show_dialog (bool): プロジェクトファイルの読込エラーをダイアログで通知するかどうか(Falseの場合は例外を送出する)
     """
     # 設定ファイルの読み込み
     settings = AppConfig.load_settings()
+    # 集計用の設定(読み込み定義・テストステータス)は1回だけ解釈して全ファイルで使い回す
+    definition = ReadDefinition.from_settings(settings)
+    # 集計の並列数
+    max_workers = settings["read_option"]["max_workers"]
+    # 差分集計(変更のないファイルは前回の集計結果を再利用)の設定
+    incremental = settings["read_option"]["incremental"]
+    content_hash = settings["read_option"]["content_hash"]
+    # ZIP内のxlsxファイルを解凍せずに読み込むかどうか
+    zip_direct = settings["read_option"]["zip_direct"]
+    # zipファイルの展開先のキャッシュ(変更のないzipファイルは展開しない)
+    extract_cache = ExtractCache.from_settings(settings)
+    # ディレクトリ探索の条件
+    file_filter = FileDiscovery.from_settings(settings)
+    discovery_workers = settings["discovery"]["max_workers"]
+    # プロジェクト間で共有する集計結果のキャッシュ
+    cache = AggregateCache.from_settings(settings) if use_cache else None
 
-    # 入力ファイルの検証
-    inputs = validate_input_files(inputs)
+    # このプロセスで作成した一時ディレクトリ(zipファイルの展開先)
+    temp_dirs = []
+    try:
+        # 入力ファイルの検証
+        inputs = validate_input_files(inputs)
 
-    # プロジェクトデータを初期化
-    project_data = {}
-    gathered_data = []  # 集計データも初期化
+        # プロジェクトデータを初期化
+        project_data = {}
+        gathered_data = []  # 集計データも初期化
+        previous_data = []  # 前回の集計データ(差分集計用)
 
-    # プロジェクトファイルのパスが指定されている場合はそのファイルを読み込む
-    if project_path:
-        with open(project_path, "r", encoding="utf-8") as f:
-            json_data = json.load(f)
-        project_data = json_data["project"]
+        # プロジェクトファイルのパスが指定されている場合はそのファイルを読み込む
+        if project_path:
+            json_data = Project.read_json(project_path)
+            project_data = json_data["project"]
+            if incremental:
+                previous_data = Project.load_gathered_data(project_path, json_data)
 
-    # 入力ファイルがある場合のみ処理を実行
-    if inputs:
-        # ファイルの拡張子を取得
-        ext = Utility.get_ext_from_path(inputs[0])
-        if ext == "json":
-            # プロジェクトファイル(jsonファイル)の場合
-            try:
-                with open(inputs[0], "r", encoding="utf-8") as f:
-                    json_data = json.load(f)
-
-                # プロジェクトデータを取得
-                if "project" in json_data:
-                    project_data = json_data["project"]
-                    project_path = inputs[0]
-
-                # ファイルの種類に応じて処理を分岐
-                local_files = []
-                sharepoint_files = []
+        # 入力ファイルがある場合のみ処理を実行
+        if inputs:
+            # ファイルの拡張子を取得
+            ext = Utility.get_ext_from_path(inputs[0])
+            if ext == "json":
+                # プロジェクトファイル(jsonファイル)の場合
+                try:
+                    json_data = Project.read_json(inputs[0])
+
+                    # プロジェクトデータを取得
+                    if "project" in json_data:
+                        project_data = json_data["project"]
+                        project_path = inputs[0]
+                        if incremental:
+                            previous_data = Project.load_gathered_data(project_path, json_data)
+
+                    # ファイルの種類に応じて処理を分岐
+                    local_files = []
+                    sharepoint_files = []
                 
-                # プロジェクトデータからファイル情報を取得
-                if "project" in json_data and "files" in json_data["project"]:
-                    for file in json_data["project"]["files"]:
-                        if file.get("type") == "local":
-                            file_info = {
-                                "fullpath": file.get("path"),
-                                "identifier": file.get("identifier"),
-                                "source": "local"
-                            }
-                            local_files.append(file_info)
-                        elif file.get("type") == "sharepoint":
-                            sharepoint_files.append(file.get("path"))
+                    # プロジェクトデータからファイル情報を取得
+                    if "project" in json_data and "files" in json_data["project"]:
+                        for file in json_data["project"]["files"]:
+                            if file.get("type") == "local":
+                                file_info = {
+                                    "fullpath": file.get("path"),
+                                    "identifier": file.get("identifier"),
+                                    "source": "local"
+                                }
+                                local_files.append(file_info)
+                            elif file.get("type") == "sharepoint":
+                                sharepoint_files.append(file)
                 
-                # localファイルの処理
-                if local_files:
-                    gathered_data = [file_processor(file, settings, i+1) for i, file in enumerate(tqdm(local_files))]
+                    # localファイルの処理
+                    if local_files:
+                        gathered_data = aggregate_files(local_files, definition, max_workers, previous_data=previous_data, content_hash=content_hash, cache=cache, executor=executor, on_progress=on_progress, on_result=make_result_publisher(project_path, settings))
                 
-                # sharepointファイルの処理
-                if sharepoint_files:
-                    for file in sharepoint_files:
-                        # ダウンロードURLの取得
-                        download_urls = []
-                        command = f"Get-DownloadUrl.ps1 -ItemId {file}"
-                        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-                        download_urls.append(result.stdout)
-                    # ファイルのダウンロード
-                    files, temp_dirs = DownloadFiles.download_files(download_urls)
-                    # xlsxファイルのみフィルタ
-                    files = filter_xlsx_files(files)
-                    # 全ファイルの集計処理
-                    if files:
-                        gathered_data.extend([file_processor(file, settings, i+1) for i, file in enumerate(tqdm(files))])
-
-            except Exception as e:
-                Dialog.show_messagebox(root=None, type="error", title="ファイル読込エラー", message=f"{str(e)}")
-                # プロジェクトファイルの読込に失敗した場合はデータ0件とする
-                gathered_data = []
-        else:
-            # xlsx/zipファイルを指定した場合
-            files, temp_dirs = get_xlsx_paths(inputs)
-            # 全ファイルの集計処理
-            gathered_data = [file_processor(file, settings, i+1) for i, file in enumerate(tqdm(files))]
-
-    # プロジェクトファイル保存（再集計後に即時保存）
-    if project_path:
-        Project.save_to_json(file_path=project_path, input_data=gathered_data, project_data=project_data)
-
-    # アプリケーションの起動
-    if not web_ui:
-        MainApp.run(pjdata=project_data, pjpath=project_path, indata=gathered_data, args=inputs, on_reload=on_reload)
-
-    # 再集計フラグファイルの削除（完了通知用）
-    if project_path:
-        flag_path = f"{project_path}.reloading"
-        if os.path.exists(flag_path):
-            os.remove(flag_path)
-
-    # 一時ディレクトリの掃除
+                    # sharepointファイルの処理
+                    if sharepoint_files:
+                        gathered_data.extend(aggregate_sharepoint_files(sharepoint_files, project_data, settings, definition, max_workers, cache=cache, executor=executor, on_progress=on_progress))
+
+                except Exception as e:
+                    if not show_dialog:
+                        raise
+                    Dialog.show_messagebox(root=None, type="error", title="ファイル読込エラー", message=f"{str(e)}")
+                    # プロジェクトファイルの読込に失敗した場合はデータ0件とする
+                    gathered_data = []
+            else:
+                # xlsx/zipファイルを指定した場合
+                files, temp_dirs = get_xlsx_paths(inputs, zip_direct=zip_direct, extract_cache=extract_cache, file_filter=file_filter, max_workers=discovery_workers)
+                # 全ファイルの集計処理
+                gathered_data = aggregate_files(files, definition, max_workers, previous_data=previous_data, content_hash=content_hash, cache=cache, executor=executor, on_progress=on_progress, on_result=make_result_publisher(project_path, settings))
+
+        # プロジェクトファイル保存（再集計後に即時保存）
+        if project_path:
+            Project.save_to_json(file_path=project_path, input_data=gathered_data, project_data=project_data, use_store=settings["result_store"]["enabled"], columnar=settings["result_store"]["columnar"])
+            # 再集計(集計サービスからの再集計を含む)の場合のみ、統計の履歴(ファイルごとの統計のスナップショット)を記録
+            # (プロジェクトを開いただけの場合は記録しない)
+            if settings["history"]["enabled"] and on_reload:
+                record_history(project_path, gathered_data, settings["history"]["compact_after_days"])
+
+        # アプリケーションの起動
+        # (画面のモジュールは集計サービス・WebUIからの再集計では使用しないため、画面を開く場合のみ読み込む)
+        if not web_ui:
+            import MainApp
+            MainApp.run(pjdata=project_data, pjpath=project_path, indata=gathered_data, args=inputs, on_reload=on_reload)
+
+        # 再集計フラグファイルの削除（完了通知用）
+        if project_path:
+            flag_path = f"{project_path}.reloading"
+            if os.path.exists(flag_path):
+                os.remove(flag_path)
+    finally:
+        # 集計・画面の表示が失敗した場合も、展開キャッシュの参照を解放し、容量を超えた分を削除
+        # (他のプロセスが使用中の展開先は削除しない)
+        extract_cache.release()
+        extract_cache.evict()
+        if extract_cache.hits or extract_cache.misses:
+            logger.info(extract_cache.summary())
+
+        # このプロセスで作成した一時ディレクトリの掃除
+        for temp_dir in temp_dirs:
+            TempDir.cleanup_temp_dir(temp_dir)
+
+def watch_project(project_path, use_cache=True):
+    """
+    プロジェクトのローカルファイルを監視し、保存されたファイルのみを再集計して集計データを更新し続ける(Ctrl+Cで終了)
+
+    監視対象はプロジェクトファイルの取得元(type: local)のパス(xlsx/zipファイル・ディレクトリ)。
+    取得元の設定がない場合は集計データのファイルパスを監視する。
+    変更が確定したファイルのみを集計し、プロジェクトファイルの集計データ(gathered_data)の該当ファイルの集計結果を置き換える。
+
+    Args:
+        project_path (str): プロジェクトファイルのパス
+        use_cache (bool): 集計結果のキャッシュを使用するかどうか
+    """
+    settings = AppConfig.load_settings()
+    definition = ReadDefinition.from_settings(settings)
+    max_workers = settings["read_option"]["max_workers"]
+    content_hash = settings["read_option"]["content_hash"]
+    zip_direct = settings["read_option"]["zip_direct"]
+    cache = AggregateCache.from_settings(settings) if use_cache else None
+    extract_cache = ExtractCache.from_settings(settings)
+    file_filter = FileDiscovery.from_settings(settings)
+    discovery_workers = settings["discovery"]["max_workers"]
+    watch_settings = settings["watch"]
+
+    json_data = Project.read_json(project_path)
+    gathered_data = Project.load_gathered_data(project_path, json_data)
+
+    # 監視対象のパスと識別子
+    identifiers = {}
+    for file in json_data.get("project", {}).get("files", []):
+        if file.get("type") == "local" and file.get("path"):
+            identifiers[file["path"]] = file.get("identifier") or ""
+    inputs = list(identifiers) or [data["filepath"] for data in gathered_data if data.get("source") == "local" and "filepath" in data]
+    if not inputs:
+        logger.warning("監視対象のローカルファイルがありません。")
+        return
+
+    def list_files(paths):
+        """パスから集計対象のファイルを取得する(zipファイルは展開キャッシュを使用して一覧取得・展開する)"""
+        target_files, _ = get_xlsx_paths(paths, zip_direct=zip_direct, extract_cache=extract_cache, file_filter=file_filter, max_workers=discovery_workers)
+        for file in target_files:
+            file["identifier"] = identifiers.get(file["fullpath"], "")
+        return target_files
+
+    files = []
+    source_paths = {}  # 監視対象のファイル(ZIP内のファイルはZIPファイル)のパス: 探索したパスのリスト
+    def list_sources():
+        """監視対象のファイルを探索し、変更を確認するファイル(ZIP内のファイルはZIPファイル)のパスを返す"""
+        nonlocal source_paths
+        source_paths = {}
+        for path in FileDiscovery.discover(inputs, file_filter=file_filter, max_workers=discovery_workers):
+            zip_member = Zip.split_member_path(path)
+            source_paths.setdefault(zip_member[0] if zip_member else path, []).append(path)
+        return list(source_paths)
+
+    def refresh(changed):
+        """変更されたファイルの集計対象のファイルを取り直し、集計するファイルを返す(zipファイルは更新後の内容で一覧取得・展開する)"""
+        nonlocal files
+        changed_files = list_files([path for source in changed for path in source_paths.get(source, [])])
+        files = [file for file in files if get_watch_path(file) not in changed] + changed_files
+        return changed_files
+
+    def update(target_files):
+        """対象ファイルを集計し、プロジェクトの集計データの該当ファイルの集計結果のみを置き換える"""
+        nonlocal gathered_data
+        results = aggregate_files(target_files, definition, max_workers, previous_data=gathered_data, content_hash=content_hash, cache=cache)
+        by_path = {result["filepath"]: result for result in results}
+        current_paths = {file["fullpath"] for file in files}
+        labels = {data.get("filepath"): data.get("selector_label") for data in gathered_data}
+        updated = []
+        removed = []
+        for data in gathered_data:
+            if data.get("source") == "local" and data.get("filepath") not in current_paths:
+                removed.append(data.get("filepath"))  # 監視対象からなくなったファイル
+                continue
+            updated.append(by_path.pop(data.get("filepath"), data))
+        updated.extend(by_path.values())  # 新たに追加されたファイル
+        for index, data in enumerate(updated):
+            if "file" in data:
+                data["selector_label"] = FileProcessor.make_selector_label(data, index+1)
+        gathered_data = updated
+        # 集計したファイルと、ファイルの追加・削除で選択用ラベルの番号が変わったファイルのみを反映
+        aggregated = {id(result) for result in results}
+        changed = [data for data in gathered_data if id(data) in aggregated or labels.get(data.get("filepath")) != data.get("selector_label")]
+        Project.update_results(project_path, changed, remove_filepaths=removed, use_store=settings["result_store"]["enabled"], columnar=settings["result_store"]["columnar"])
+        if settings["history"]["enabled"]:
+            record_history(project_path, gathered_data, settings["history"]["compact_after_days"])
+
+    watcher = FileWatcher.FileWatcher(list_sources, debounce=watch_settings["debounce"], rescan_interval=watch_settings["rescan_interval"])
+    watcher.start()
+    files = list_files(inputs)
+    # 監視開始時点で前回の集計から変更されているファイルを集計(変更のないファイルは前回の集計結果を再利用)
+    update(files)
+    logger.info(f"監視を開始しました: {project_path} ({len(files)}ファイル)")
+
     try:
-        if temp_dirs:
-            TempDir.cleanup_old_temp_dirs("_TEMP_")
-    except NameError:
-        pass
+        while True:
+            time.sleep(watch_settings["interval"])
+            changed = set(watcher.poll())
+            if not changed:
+                continue
+            logger.info(f"変更を検知しました: {', '.join(sorted(changed))}")
+            update(refresh(changed))
+            # 更新されたzipファイルの前のバージョンの展開先は参照が解放されているため、容量超過時は削除する
+            extract_cache.evict()
+    except KeyboardInterrupt:
+        logger.info("監視を終了しました。")
+    finally:
+        extract_cache.release()
+        extract_cache.evict()
 
 if __name__ == "__main__":
     # コマンドライン引数の設定
@@ -258,7 +575,15 @@ if __name__ == "__main__":
     parser.add_argument("--project", help="プロジェクトファイルのパス")
     parser.add_argument("--on_reload", action="store_true", help="データ再集計時のフラグ")
     parser.add_argument("--webui", action="store_true", help="WebUI起動時のフラグ")
+    parser.add_argument("--no-cache", action="store_true", help="集計結果のキャッシュを使用しない")
+    parser.add_argument("--watch", action="store_true", help="プロジェクトのファイルを監視し、変更されたファイルを再集計し続ける(--projectが必要)")
     parser.add_argument("data_files", nargs="*", help="処理するファイルのパス")
     args = parser.parse_args()
 
-    process_files(inputs=args.data_files, project_path=args.project, on_reload=args.on_reload, web_ui=args.webui)
+    if args.watch:
+        if not args.project:
+            parser.error("--watch には --project の指定が必要です")
+        watch_project(project_path=args.project, use_cache=not args.no_cache)
+        sys.exit(0)
+
+    process_files(inputs=args.data_files, project_path=args.project, on_reload=args.on_reload, web_ui=args.webui, use_cache=not args.no_cache)
@@ -11,18 +11,64 @@ from datetime import datetime, timedelta
 import pyperclip
 import base64
 
-from libs import AppConfig, Labels, DataConversion
+from libs import AppConfig, Labels, DataConversion, ServiceClient, Project, ResultStore, StatsHistory
 from libs.webui_chart_manager import ChartManager
 
-# プロジェクトデータの読み込み
+# プロジェクトファイル・集計データのストアの更新日時(読み込んだデータのキャッシュのキー)
+def _project_mtimes(project_path):
+    store_path = ResultStore.store_path(str(project_path))
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else 0 for path in (project_path, store_path, f"{store_path}-wal"))
+
+# プロジェクトデータの読み込み(プロジェクトファイル・集計データのストアが更新されるまでは読み込み済みのデータを使用)
+@st.cache_data(show_spinner=False, max_entries=10)
+def _load_project_data(project_path, mtimes):
+    return Project.load_from_json(project_path)
+
 def load_project_data(project_path):
     try:
-        with open(project_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_project_data(str(project_path), _project_mtimes(project_path))
+    except Exception as e:
+        st.error(f"プロジェクトファイルの読み込みに失敗しました: {str(e)}")
+        return None
+
+# プロジェクトの概要の読み込み(全体集計の表示用。ファイルごとの日付別・環境別・担当者別の件数は読み込まない)
+@st.cache_data(show_spinner=False, max_entries=10)
+def _load_project_summary(project_path, mtimes):
+    return Project.load_summary(project_path)
+
+def load_project_summary(project_path):
+    try:
+        return _load_project_summary(str(project_path), _project_mtimes(project_path))
     except Exception as e:
         st.error(f"プロジェクトファイルの読み込みに失敗しました: {str(e)}")
         return None
 
+# 選択したファイルの集計結果の読み込み(ファイル別集計の表示用)
+@st.cache_data(show_spinner=False, max_entries=50)
+def _load_file_data(project_path, selector_label, mtimes):
+    results = Project.load_file_results(project_path, [selector_label])
+    return results[0] if results else None
+
+def load_file_data(project_path, selector_label):
+    return _load_file_data(str(project_path), selector_label, _project_mtimes(project_path))
+
+# 統計の履歴の日ごとの合計の読み込み(集計結果の推移の表示用。履歴が更新されるまでは読み込み済みのデータを使用)
+@st.cache_data(show_spinner=False, max_entries=10)
+def _load_stats_history(project_path, mtimes):
+    if not StatsHistory.exists(project_path):
+        return {}
+    with StatsHistory.open_history(project_path) as history:
+        return history.daily()
+
+def load_stats_history(project_path):
+    history_path = StatsHistory.history_path(str(project_path))
+    mtimes = tuple(os.path.getmtime(path) if os.path.exists(path) else 0 for path in (history_path, f"{history_path}-wal"))
+    try:
+        return _load_stats_history(str(project_path), mtimes)
+    except Exception as e:
+        st.error(f"統計の履歴の読み込みに失敗しました: {str(e)}")
+        return {}
+
 # 進捗状況のグラフを作成
 def create_progress_chart(data, settings):
     return ChartManager.create_progress_chart(data, settings)
@@ -137,7 +183,8 @@ def load_display_settings():
     return settings.get("webui", {}).get("display_settings", {
         "axis_type": "時間軸で表示",  # デフォルト値
         "show_plan_line": True,  # デフォルト値
-        "show_bug_curve": False  # デフォルト値を追加
+        "show_bug_curve": False,  # デフォルト値を追加
+        "show_stats_history": False
     })
 
 # 表示設定を保存
@@ -224,15 +271,18 @@ def main():
     # 選択されたプロジェクトのPathオブジェクトを取得
     selected_project = project_options[selected_project_name]
 
-    # プロジェクトデータの読み込み
-    project_data = load_project_data(selected_project)
+    # プロジェクトの概要の読み込み(ファイルごとの件数は必要な場合のみ読み込む)
+    project_data = load_project_summary(selected_project)
     if not project_data:
         return
 
     # tsvデータ表示モードの場合
     if st.session_state.show_data:
+        full_data = load_project_data(selected_project)
+        if not full_data:
+            return
         # 集計データを2次元配列に変換
-        array_data = DataConversion.convert_to_2d_array(project_data["gathered_data"], settings)
+        array_data = DataConversion.convert_to_2d_array(full_data.get("gathered_data", []), settings)
         # TSV形式に変換
         tsv_data = "\n".join(["\t".join(map(str, row)) for row in array_data])
         
@@ -273,19 +323,46 @@ def main():
         help="テスト実施数と不具合検出数の関係を示すグラフを表示します"
     )
 
+    # 集計結果の推移の表示設定
+    show_stats_history = st.sidebar.toggle(
+        "集計結果の推移を表示",
+        value=display_settings.get("show_stats_history", False),
+        help="再集計のたびに記録した対象項目数・消化数・完了数の推移を表示します"
+    )
+
     # 設定が変更された場合は保存
     if (axis_type != display_settings["axis_type"] or
         show_plan_line != display_settings.get("show_plan_line", True) or
-        show_bug_curve != display_settings.get("show_bug_curve", False)):
+        show_bug_curve != display_settings.get("show_bug_curve", False) or
+        show_stats_history != display_settings.get("show_stats_history", False)):
         save_display_settings({
             "axis_type": axis_type,
             "show_plan_line": show_plan_line,
-            "show_bug_curve": show_bug_curve
+            "show_bug_curve": show_bug_curve,
+            "show_stats_history": show_stats_history
         })
         st.rerun()  # 設定を反映するために再読み込み
 
     # 再集計状態管理
-    if st.session_state.get('reload_state') == 'waiting':
+    if st.session_state.get('reload_state') == 'waiting' and st.session_state.get('reload_job'):
+        # 集計サービスに依頼した場合は依頼の状態を確認
+        job = ServiceClient.get_job(settings, st.session_state['reload_job'])
+        if job is None or job["state"] in ("done", "error"):
+            st.session_state['reload_state'] = 'idle'
+            st.session_state['reload_job'] = None
+            if job is None:
+                st.warning("集計サービスに接続できなくなりました。")
+            elif job["state"] == "error":
+                st.error(f"再集計に失敗しました。\n{job['message']}")
+            else:
+                st.success("再集計が完了しました。")
+                st.rerun()
+        else:
+            progress = f"（{job['done']}/{job['total']}）" if job["total"] else ""
+            st.info(f"再集計中です{progress}。しばらくお待ちください。")
+            time.sleep(1)
+            st.rerun()
+    elif st.session_state.get('reload_state') == 'waiting':
         flag_path = f"{str(selected_project)}.reloading"
         if not os.path.exists(flag_path):
             st.session_state['reload_state'] = 'idle'
@@ -320,6 +397,12 @@ def main():
         if st.button("🔄", key="reload_button", help="再集計を実行"):
             if selected_project:
                 project_path = str(selected_project)
+                # 集計サービスが起動している場合はサービスに依頼する
+                job_id = ServiceClient.submit_reload(settings, project_path)
+                if job_id:
+                    st.session_state['reload_job'] = job_id
+                    st.session_state['reload_state'] = 'waiting'
+                    st.rerun()
                 python_exe = sys.executable
                 flag_path = f"{project_path}.reloading"
                 with open(flag_path, "w") as f:
@@ -358,10 +441,20 @@ def main():
 
             # バグ収束曲線の表示
             if display_settings.get("show_bug_curve", False):
-                bug_curve_fig = ChartManager.create_bug_curve_chart(project_data, settings)
+                # ファイルごとの日付別の件数を使用するため、集計データを全て読み込む
+                full_data = load_project_data(selected_project)
+                bug_curve_fig = ChartManager.create_bug_curve_chart(full_data, settings) if full_data else None
                 if bug_curve_fig:
                     st.plotly_chart(bug_curve_fig, use_container_width=True, key=f"bug_curve_{selected_project_name}", config={"displayModeBar": False, "scrollZoom": False})
 
+            # 集計結果の推移の表示(集計データからは求めず、再集計時に記録した統計の履歴を使用)
+            if display_settings.get("show_stats_history", False):
+                history_fig = ChartManager.create_stats_history_chart(load_stats_history(selected_project), settings, axis_type)
+                if history_fig:
+                    st.plotly_chart(history_fig, use_container_width=True, key=f"stats_history_{selected_project_name}", config={"displayModeBar": False, "scrollZoom": False})
+                else:
+                    st.info("統計の履歴がありません。再集計すると記録されます。")
+
             # エラーとワーニングのあるデータを除外
             filtered_data = [d for d in project_data["gathered_data"] 
                            if "error" not in d and "warning" not in d]
@@ -552,10 +645,9 @@ def main():
             file_options = [d["selector_label"] for d in project_data["gathered_data"]]
             selected_file = st.selectbox("ファイルを選択", options=file_options)
             
-            # 選択されたファイルのデータを取得
-            matching_data = [d for d in project_data["gathered_data"] if d["selector_label"] == selected_file]
-            if matching_data:
-                file_data = matching_data[0]
+            # 選択されたファイルのデータを取得(選択したファイルの集計結果のみを読み込む)
+            file_data = load_file_data(selected_project, selected_file) if selected_file else None
+            if file_data:
                 if "error" not in file_data:
                     # PB図の表示
                     pb_fig = create_pb_chart({"gathered_data": [file_data]}, settings, axis_type, display_settings.get("show_plan_line", True))
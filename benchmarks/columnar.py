@@ -0,0 +1,95 @@
+"""集計データ(gathered_data)の列指向の形式の効果を計測するベンチマーク
+
+ReadData の日付別・担当者別の集計関数で、ファイル数・期間・環境数を指定した集計データを生成し、
+従来の形式(日付ごとの辞書)と列指向の形式(libs/ColumnarData.py)で以下を比較する。
+    size:      プロジェクトファイルに保存した場合のJSONのサイズ(Project.dumps_json)
+    load:      JSONの読込(WebUIのプロジェクトデータの読込。列指向の形式は従来の形式への変換を含む)
+    aggregate: 全ファイルの日付別の件数の合計(DataConversion.aggregate_all_daily)
+
+実行例:
+    python -m benchmarks.columnar --files 50 200 --days 120 --envs 4
+"""
+import json, time, random, argparse
+from datetime import datetime, timedelta
+
+import ReadData
+from libs import AppConfig, ReadDefinition, DataConversion, ColumnarData, Project
+
+PERSONS = ["Aさん", "Bさん", "Cさん", "Dさん", "Eさん"]
+START_DATE = datetime(2025, 1, 6)
+
+
+def create_gathered_data(definition: ReadDefinition.AggregateDefinition, files: int, days: int, envs: int, rows: int, seed: int = 0) -> list:
+    """集計データ(ファイルごとの daily / by_env / by_name)を生成する"""
+    rand = random.Random(seed)
+    results = definition.test_status.results
+    dates = [(START_DATE + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    gathered_data = []
+    for index in range(files):
+        # ファイルごとに実施期間をずらす
+        start = rand.randrange(0, max(days // 2, 1))
+        file_dates = dates[start:start + rand.randint(max(days // 4, 1), days)]
+        by_env, all_rows = {}, []
+        for env in range(envs):
+            env_rows = [(rand.choice(results), rand.choice(PERSONS), rand.choice(file_dates)) for _ in range(rows)]
+            by_env[f"環境{env + 1}"], _ = ReadData.get_daily(env_rows, definition.test_status)
+            all_rows.extend(env_rows)
+        daily, _ = ReadData.get_daily(all_rows, definition.test_status)
+        gathered_data.append({
+            "stats": {"all": len(all_rows)},
+            "daily": daily,
+            "by_name": ReadData.get_daily_by_name(all_rows),
+            "by_env": by_env,
+            "file": f"spec_{index}.xlsx",
+            "selector_label": f"{index + 1}: spec_{index}.xlsx",
+        })
+    return gathered_data
+
+
+def measure(func, repeat: int) -> float:
+    """最速値(秒)"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="集計データの列指向の形式のベンチマーク")
+    parser.add_argument("--files", type=int, nargs="+", default=[20, 100, 300], help="ファイル数")
+    parser.add_argument("--days", type=int, default=120, help="プロジェクトの期間(日数)")
+    parser.add_argument("--envs", type=int, default=3, help="ファイルごとの環境数")
+    parser.add_argument("--rows", type=int, default=300, help="環境ごとのテストケース数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数")
+    args = parser.parse_args()
+
+    with open(AppConfig.DEFAULT_JSON_NAME, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    definition = ReadDefinition.from_settings(settings)
+
+    for files in args.files:
+        gathered_data = create_gathered_data(definition, files, args.days, args.envs, args.rows)
+        encoded = ColumnarData.encode(gathered_data)
+        assert ColumnarData.decode(encoded) == gathered_data
+        assert DataConversion.aggregate_all_daily(encoded) == DataConversion.aggregate_all_daily(gathered_data)
+
+        project = {"project_name": "benchmark", "files": []}
+        dict_json = Project.dumps_json({"project": project, "gathered_data": gathered_data})
+        columnar_json = Project.dumps_json({"project": project, "gathered_data": encoded})
+        dict_load = measure(lambda: json.loads(dict_json), args.repeat)
+        columnar_load = measure(lambda: ColumnarData.decode(json.loads(columnar_json)["gathered_data"]), args.repeat)
+        dict_aggregate = measure(lambda: DataConversion.aggregate_all_daily(gathered_data), args.repeat)
+        columnar_aggregate = measure(lambda: DataConversion.aggregate_all_daily(encoded), args.repeat)
+
+        print(
+            f"[{files:>4}ファイル] "
+            f"size: {len(dict_json.encode()) / 1024 / 1024:.2f}MB -> {len(columnar_json.encode()) / 1024 / 1024:.2f}MB / "
+            f"load: {dict_load:.3f}s -> {columnar_load:.3f}s / "
+            f"aggregate: {dict_aggregate:.4f}s -> {columnar_aggregate:.4f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
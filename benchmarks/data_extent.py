@@ -0,0 +1,52 @@
+"""データ範囲の検出(empty_row_limit)の効果を計測するベンチマーク
+
+列全体に書式が設定され、実データの後ろに書式だけの空行が大量に続くブックを生成し、
+empty_row_limit を無効(0)にした場合と有効にした場合の集計時間を比較する。
+空行の数を増やしても、有効時の集計時間がほぼ一定であることを確認できる。
+
+実行例:
+    python -m benchmarks.data_extent --trailing-rows 10000 100000
+"""
+import os, json, time, argparse, tempfile
+
+import ReadData
+from libs import AppConfig, ReadDefinition
+from benchmarks.generator import create_spec_workbook
+
+
+def measure(filepath: str, settings: dict, repeat: int) -> float:
+    """ブック読込＋集計の平均時間(秒)を計測する"""
+    definition = ReadDefinition.from_settings(settings)
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ReadData.aggregate_results(filepath=filepath, definition=definition)
+        elapsed.append(time.perf_counter() - start)
+    return sum(elapsed) / len(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="データ範囲検出のベンチマーク")
+    parser.add_argument("--test-rows", type=int, default=500, help="実データの行数")
+    parser.add_argument("--trailing-rows", type=int, nargs="+", default=[10000, 50000, 100000], help="書式だけが設定された空行の数")
+    parser.add_argument("--limit", type=int, default=1000, help="有効時のempty_row_limit")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数")
+    args = parser.parse_args()
+
+    with open(AppConfig.DEFAULT_JSON_NAME, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for trailing_rows in args.trailing_rows:
+            filepath = os.path.join(temp_dir, f"data_extent_{trailing_rows}.xlsx")
+            create_spec_workbook(filepath, rows=args.test_rows, envs=1, trailing_rows=trailing_rows)
+
+            settings["read_option"]["empty_row_limit"] = 0
+            unlimited = measure(filepath, settings, args.repeat)
+            settings["read_option"]["empty_row_limit"] = args.limit
+            limited = measure(filepath, settings, args.repeat)
+            print(f"[空行 {trailing_rows:>7}行] 最終行まで: {unlimited:.3f}s / 範囲検出あり: {limited:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""ベンチマーク用の仕様書(テスト項目)ブックの生成
+
+ReadData._read_sheet が想定するレイアウトのブックを作成する。
+    1行目: 各セットの結果列にセット名(環境名)
+    2行目: ヘッダ行(# / 大項目 / 手順 / 期待結果 / 結果・担当者・日付・計画 × セット数)
+    3行目以降: テストケース
+
+実行例:
+    python -m benchmarks.generator spec.xlsx --sheets 3 --rows 5000 --envs 4 --fill-ratio 0.6 --trailing-rows 100000
+"""
+import shutil, random, zipfile, argparse
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
+
+# 固定列(#〜期待結果)の数、およびセットごとの列数(結果・担当者・日付・計画)
+FIXED_COLS = 4
+SET_COLS = 4
+
+RESULTS = ["Pass", "Fixed", "Fail", "Blocked", "Suspend", "N/A", "対象外"]
+START_DATE = datetime(2025, 1, 6)
+
+
+def create_spec_workbook(path: str, sheets: int = 1, rows: int = 1000, envs: int = 3, fill_ratio: float = 0.8,
+                         trailing_rows: int = 0, plan: bool = True, extra_sheets: int = 0, extra_rows: int = 0,
+                         seed: int = 0) -> dict:
+    """仕様書ブックを作成する
+
+    Args:
+        path: 保存先のパス
+        sheets: テスト項目シートの数
+        rows: シートごとのテストケース数
+        envs: 環境(結果・担当者・日付・計画)セットの数
+        fill_ratio: 結果が入力済みのセルの割合(0〜1)
+        trailing_rows: テストケースの後ろに続く、書式だけが設定された空行の数(列全体に書式を設定した状態の再現)
+        plan: 計画列を含めるかどうか
+        extra_sheets: テスト項目以外のシート(変更履歴など)の数
+        extra_rows: テスト項目以外のシートの行数
+        seed: 乱数のシード(同じ値なら同じブックを生成する)
+
+    Returns:
+        dict: 生成したブックの概要(シート数・行数など)
+    """
+    rand = random.Random(seed)
+    wb = Workbook(write_only=True)
+    set_cols = SET_COLS if plan else SET_COLS - 1
+    max_col = FIXED_COLS + set_cols * envs
+    fill = PatternFill("solid", fgColor="FFFF00")
+
+    for sheet_index in range(sheets):
+        ws = wb.create_sheet(title=f"テスト項目{sheet_index + 1}")
+
+        # 1行目: セット名 / 2行目: ヘッダ行
+        names = [None] * FIXED_COLS
+        header = ["#", "大項目", "手順", "期待結果"]
+        for env in range(envs):
+            names += [f"環境{env + 1}"] + [None] * (set_cols - 1)
+            header += ["結果", "担当者", "日付"] + (["計画"] if plan else [])
+        ws.append(names)
+        ws.append(header)
+
+        # テストケース
+        for case in range(rows):
+            row = [case + 1, f"機能{case // 50 + 1}", f"手順{case + 1}", f"期待結果{case + 1}"]
+            for env in range(envs):
+                plan_date = START_DATE + timedelta(days=(case * envs + env) % 60)
+                if rand.random() < fill_ratio:
+                    row += [rand.choice(RESULTS), f"担当者{rand.randint(1, 5)}", plan_date + timedelta(days=rand.randint(0, 3))]
+                else:
+                    row += [None, None, None]
+                if plan:
+                    row.append(plan_date)
+            ws.append(row)
+
+        # 書式だけが設定された空行
+        for _ in range(trailing_rows):
+            cells = []
+            for _ in range(max_col):
+                cell = WriteOnlyCell(ws)
+                cell.fill = fill
+                cells.append(cell)
+            ws.append(cells)
+
+    # テスト項目以外のシート
+    for sheet_index in range(extra_sheets):
+        ws = wb.create_sheet(title=f"変更履歴{sheet_index + 1}")
+        for r in range(extra_rows):
+            ws.append([r + 1, START_DATE + timedelta(days=r % 365), f"変更内容{r + 1}", "更新者"])
+
+    wb.save(path)
+
+    # 書込み専用モードはdimension(使用範囲)を出力しないため、Excelで保存した場合と同様に付与する
+    _add_dimensions(path, refs={
+        **{f"xl/worksheets/sheet{i + 1}.xml": f"A1:{_column_letter(max_col)}{rows + trailing_rows + 2}" for i in range(sheets)},
+        **{f"xl/worksheets/sheet{sheets + i + 1}.xml": f"A1:D{max(extra_rows, 1)}" for i in range(extra_sheets)},
+    })
+
+    return {
+        "sheets": sheets,
+        "rows": rows,
+        "envs": envs,
+        "fill_ratio": fill_ratio,
+        "trailing_rows": trailing_rows,
+        "plan": plan,
+        "extra_sheets": extra_sheets,
+        "extra_rows": extra_rows,
+        "seed": seed,
+        "data_rows": sheets * rows,  # 集計対象の行数(全シート合計)
+    }
+
+
+def _column_letter(col: int) -> str:
+    letters = ""
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _add_dimensions(path: str, refs: dict):
+    temp_path = path + ".tmp"
+    with zipfile.ZipFile(path, "r") as src, zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename in refs:
+                data = data.replace(b"<sheetViews>", f'<dimension ref="{refs[item.filename]}" /><sheetViews>'.encode(), 1)
+            dst.writestr(item, data)
+    shutil.move(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク用の仕様書ブックを生成する")
+    parser.add_argument("path", help="保存先のパス")
+    parser.add_argument("--sheets", type=int, default=1, help="テスト項目シートの数")
+    parser.add_argument("--rows", type=int, default=1000, help="シートごとのテストケース数")
+    parser.add_argument("--envs", type=int, default=3, help="環境セットの数")
+    parser.add_argument("--fill-ratio", type=float, default=0.8, help="結果が入力済みのセルの割合")
+    parser.add_argument("--trailing-rows", type=int, default=0, help="書式だけが設定された空行の数")
+    parser.add_argument("--no-plan", action="store_true", help="計画列を含めない")
+    parser.add_argument("--extra-sheets", type=int, default=0, help="テスト項目以外のシートの数")
+    parser.add_argument("--extra-rows", type=int, default=0, help="テスト項目以外のシートの行数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    args = parser.parse_args()
+
+    summary = create_spec_workbook(
+        args.path, sheets=args.sheets, rows=args.rows, envs=args.envs, fill_ratio=args.fill_ratio,
+        trailing_rows=args.trailing_rows, plan=not args.no_plan, extra_sheets=args.extra_sheets,
+        extra_rows=args.extra_rows, seed=args.seed
+    )
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""仕様書の読込・集計のスケーリングを計測するベンチマーク
+
+benchmarks.generator で生成したブックに対して、読込方式(通常モード / 読み取り専用モード / XMLリーダー)ごとに
+以下のフェーズを分けて計測し、結果をJSONファイルに出力する。
+    load:      ブックを開く(Excel.load)
+    scan:      対象シートのヘッダ行を特定し、集計対象の列データを読み込む(ReadData._read_sheet)
+    aggregate: 読み込んだ列データを集計する(ReadData._aggregate_sheets)
+
+各フェーズについて経過時間(最速値)、ピークメモリ(tracemalloc)、1秒あたりの処理行数を記録する。
+出力したJSONを残しておくことで、実行ごとの結果を比較できる。
+
+実行例:
+    python -m benchmarks.ingestion --sheets 3 --rows 5000 --envs 4 --trailing-rows 20000
+"""
+import os, sys, json, time, platform, argparse, tempfile, tracemalloc
+from datetime import datetime
+
+import openpyxl
+
+import ReadData
+from libs import AppConfig, ReadDefinition
+from libs import OpenpyxlWrapper as Excel
+from benchmarks.generator import create_spec_workbook
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# 計測する読込方式
+READ_MODES = {
+    "normal": {"read_only": False, "backend": Excel.BACKEND_OPENPYXL},
+    "read_only": {"read_only": True, "backend": Excel.BACKEND_OPENPYXL},
+    "xml": {"read_only": True, "backend": Excel.BACKEND_XML},
+}
+
+
+def run_phases(filepath: str, definition: ReadDefinition.AggregateDefinition) -> dict:
+    """load / scan / aggregate を順に実行し、フェーズごとの経過時間を返す"""
+    timings = {}
+
+    start = time.perf_counter()
+    workbook = Excel.load(
+        filepath,
+        read_only=definition.read_option.read_only,
+        backend=definition.read_option.backend,
+        sheet_keywords=definition.read_definition.sheet_search_keys,
+        sheet_ignores=definition.read_definition.sheet_search_ignores
+    )
+    timings["load"] = time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        sheet_names = Excel.get_sheetnames_by_keywords(
+            workbook,
+            keywords=definition.read_definition.sheet_search_keys,
+            ignores=definition.read_definition.sheet_search_ignores
+        )
+        sheets_columns = [ReadData._read_sheet(workbook=workbook, sheet_name=sheet_name, definition=definition) for sheet_name in sheet_names]
+        timings["scan"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = ReadData._aggregate_sheets(sheets_columns=sheets_columns, definition=definition)
+        timings["aggregate"] = time.perf_counter() - start
+    finally:
+        Excel.close(workbook)
+
+    if "error" in result:
+        raise RuntimeError(f"集計に失敗しました: {result['error']}")
+    return timings
+
+
+def run_phases_with_memory(filepath: str, definition: ReadDefinition.AggregateDefinition) -> dict:
+    """フェーズごとのピークメモリ(バイト)を計測する
+
+    tracemallocは処理を遅くするため、経過時間の計測とは別に1回だけ実行する。
+    各フェーズの値は、前のフェーズから保持しているメモリ(ブック・列データ)を含むピーク値。
+    """
+    peaks = {}
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        workbook = Excel.load(
+            filepath,
+            read_only=definition.read_option.read_only,
+            backend=definition.read_option.backend,
+            sheet_keywords=definition.read_definition.sheet_search_keys,
+            sheet_ignores=definition.read_definition.sheet_search_ignores
+        )
+        peaks["load"] = tracemalloc.get_traced_memory()[1]
+
+        try:
+            tracemalloc.reset_peak()
+            sheet_names = Excel.get_sheetnames_by_keywords(
+                workbook,
+                keywords=definition.read_definition.sheet_search_keys,
+                ignores=definition.read_definition.sheet_search_ignores
+            )
+            sheets_columns = [ReadData._read_sheet(workbook=workbook, sheet_name=sheet_name, definition=definition) for sheet_name in sheet_names]
+            peaks["scan"] = tracemalloc.get_traced_memory()[1]
+
+            tracemalloc.reset_peak()
+            ReadData._aggregate_sheets(sheets_columns=sheets_columns, definition=definition)
+            peaks["aggregate"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            Excel.close(workbook)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def benchmark(filepath: str, settings: dict, data_rows: int, repeat: int) -> dict:
+    definition = ReadDefinition.from_settings(settings)
+
+    # 経過時間はフェーズごとの最速値を採用
+    best = {}
+    for _ in range(repeat):
+        for phase, elapsed in run_phases(filepath, definition).items():
+            best[phase] = min(best.get(phase, elapsed), elapsed)
+    peaks = run_phases_with_memory(filepath, definition)
+
+    phases = {}
+    for phase, elapsed in best.items():
+        phases[phase] = {
+            "wall_time": round(elapsed, 6),
+            "peak_memory": peaks[phase],
+            "rows_per_second": round(data_rows / elapsed, 1) if elapsed else None,
+        }
+    total = sum(best.values())
+    phases["total"] = {
+        "wall_time": round(total, 6),
+        "peak_memory": max(peaks.values()),
+        "rows_per_second": round(data_rows / total, 1) if total else None,
+    }
+    return phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="仕様書の読込・集計のベンチマーク")
+    parser.add_argument("--sheets", type=int, default=3, help="テスト項目シートの数")
+    parser.add_argument("--rows", type=int, default=2000, help="シートごとのテストケース数")
+    parser.add_argument("--envs", type=int, default=3, help="環境セットの数")
+    parser.add_argument("--fill-ratio", type=float, default=0.8, help="結果が入力済みのセルの割合")
+    parser.add_argument("--trailing-rows", type=int, default=0, help="書式だけが設定された空行の数")
+    parser.add_argument("--extra-sheets", type=int, default=0, help="テスト項目以外のシートの数")
+    parser.add_argument("--extra-rows", type=int, default=0, help="テスト項目以外のシートの行数")
+    parser.add_argument("--modes", nargs="+", choices=list(READ_MODES), default=list(READ_MODES), help="計測する読込方式")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数")
+    parser.add_argument("--output", help="結果の出力先(省略時は benchmarks/results/ingestion_日時.json)")
+    args = parser.parse_args()
+
+    with open(AppConfig.DEFAULT_JSON_NAME, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filepath = os.path.join(temp_dir, "ingestion.xlsx")
+        workbook_info = create_spec_workbook(
+            filepath, sheets=args.sheets, rows=args.rows, envs=args.envs, fill_ratio=args.fill_ratio,
+            trailing_rows=args.trailing_rows, extra_sheets=args.extra_sheets, extra_rows=args.extra_rows
+        )
+        workbook_info["file_size"] = os.path.getsize(filepath)
+
+        results = {}
+        for mode in args.modes:
+            settings["read_option"].update(READ_MODES[mode])
+            results[mode] = benchmark(filepath, settings, workbook_info["data_rows"], args.repeat)
+            print(f"[{mode}] " + " / ".join(
+                f"{phase}: {values['wall_time']:.3f}s {values['peak_memory'] / 1024 / 1024:.1f}MB"
+                for phase, values in results[mode].items()
+            ))
+
+    output = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python": sys.version.split()[0],
+            "openpyxl": openpyxl.__version__,
+            "platform": platform.platform(),
+        },
+        "workbook": workbook_info,
+        "read_option": {key: value for key, value in settings["read_option"].items() if key not in ("read_only", "backend")},
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    output_path = args.output
+    if not output_path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"ingestion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=4, ensure_ascii=False)
+    print(f"結果を出力しました: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
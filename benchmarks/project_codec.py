@@ -0,0 +1,87 @@
+"""プロジェクトファイルの形式・圧縮・JSONライブラリ(libs/JsonCodec.py)ごとの保存・読込時間とサイズを計測するベンチマーク
+
+benchmarks/columnar.py と同じ方法でファイル数を指定した集計データを生成し、集計データをプロジェクトファイルに保存する場合
+(result_store.enabled が false の場合)の以下を比較する。
+    save: プロジェクトファイルの保存(Project.write_json)
+    load: プロジェクトファイルの読込(Project.read_json)
+    size: プロジェクトファイルのサイズ
+比較対象には従来の保存方法(標準ライブラリのjsonでインデントあり)を含める。
+インストールされていないJSONライブラリ(orjson)・圧縮形式(zstd)は計測しない。
+
+実行例:
+    python -m benchmarks.project_codec --files 500 --columnar
+"""
+import os, json, tempfile, argparse
+
+from libs import AppConfig, ReadDefinition, ColumnarData, Project, JsonCodec
+from benchmarks.columnar import create_gathered_data, measure
+
+
+def codecs() -> list:
+    """計測する形式・圧縮・JSONライブラリの組み合わせ"""
+    backends = ["json"] + (["orjson"] if JsonCodec.orjson is not None else [])
+    compressions = ["none", "gzip"] + (["zstd"] if JsonCodec.zstandard is not None else [])
+    result = [JsonCodec.JsonCodec(format="pretty", compression="none", backend=backend) for backend in backends]
+    for backend in backends:
+        for compression in compressions:
+            result.append(JsonCodec.JsonCodec(format="compact", compression=compression, backend=backend))
+    return result
+
+
+def save_legacy(file_path: str, data: dict):
+    """従来の保存方法"""
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_legacy(file_path: str) -> dict:
+    """従来の読込方法"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="プロジェクトファイルの形式・圧縮のベンチマーク")
+    parser.add_argument("--files", type=int, default=500, help="ファイル数")
+    parser.add_argument("--days", type=int, default=120, help="プロジェクトの期間(日数)")
+    parser.add_argument("--envs", type=int, default=3, help="ファイルごとの環境数")
+    parser.add_argument("--rows", type=int, default=300, help="環境ごとのテストケース数")
+    parser.add_argument("--columnar", action="store_true", help="集計データを列指向の形式で保存する")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数")
+    args = parser.parse_args()
+
+    with open(AppConfig.DEFAULT_JSON_NAME, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    definition = ReadDefinition.from_settings(settings)
+
+    gathered_data = create_gathered_data(definition, args.files, args.days, args.envs, args.rows)
+    if args.columnar:
+        gathered_data = ColumnarData.encode(gathered_data)
+    project = {"project_name": "benchmark", "files": [{"path": f"spec_{i}.xlsx", "type": "file"} for i in range(args.files)]}
+    data = {"project": project, "gathered_data": gathered_data}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "benchmark.json")
+
+        save_legacy(file_path, data)
+        legacy_size = os.path.getsize(file_path)
+        legacy_save = measure(lambda: save_legacy(file_path, data), args.repeat)
+        legacy_load = measure(lambda: load_legacy(file_path), args.repeat)
+        print(f"{'従来(json, indent=2)':<28} save: {legacy_save:.3f}s / load: {legacy_load:.3f}s / size: {legacy_size / 1024 / 1024:.2f}MB")
+
+        for codec in codecs():
+            Project.write_json(file_path, data, codec)
+            assert Project.read_json(file_path) == data
+            assert Project.load_header(file_path) == project
+            size = os.path.getsize(file_path)
+            save = measure(lambda: Project.write_json(file_path, data, codec), args.repeat)
+            load = measure(lambda: Project.read_json(file_path), args.repeat)
+            name = f"{codec.format}/{codec.compression}/{codec.backend}"
+            print(
+                f"{name:<28} save: {save:.3f}s / load: {load:.3f}s / size: {size / 1024 / 1024:.2f}MB "
+                f"(x{legacy_save / save:.1f} / x{legacy_load / load:.1f} / {size / legacy_size:.0%})"
+            )
+
+
+if __name__ == "__main__":
+    main()
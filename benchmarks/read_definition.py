@@ -0,0 +1,101 @@
+"""設定の事前解釈(ReadDefinition)による集計オーバーヘッドの削減を計測するマイクロベンチマーク
+
+- シートごと: ヘッダ行からの列番号の特定(設定の辞書＋Utility.find_colnum_by_keywords と KeywordMatcher の比較)
+- 行ごと: 日付別集計(設定の辞書・リストを参照する変更前の get_daily と、TestStatus を使う現行の get_daily の比較)
+
+実行例:
+    python -m benchmarks.read_definition --rows 100000
+"""
+import json, time, argparse
+from collections import defaultdict
+
+import ReadData
+from libs import AppConfig, ReadDefinition, Utility
+
+
+def legacy_get_daily(data, settings: dict):
+    """比較用: 設定の辞書を参照して行ごとにカウントを初期化する変更前の日付別集計"""
+    results = settings["test_status"]["results"]
+    completed_label = settings["test_status"]["labels"]["completed"]
+    executed_label = settings["test_status"]["labels"]["executed"]
+    plan_label = settings["test_status"]["labels"]["planned"]
+    result_count = defaultdict(lambda: defaultdict(int))
+    for result, name, date in data:
+        if not date: date = "no_date"
+        for key in results:
+            result_count[date][key] = result_count[date].get(key, 0)
+        result_count[date][completed_label] = result_count[date].get(completed_label, 0)
+        result_count[date][executed_label] = result_count[date].get(executed_label, 0)
+        result_count[date][plan_label] = result_count[date].get(plan_label, 0)
+        if result in results:
+            result_count[date][result] += 1
+        if result in settings["test_status"]["completed_results"]:
+            result_count[date][completed_label] += 1
+        if result in settings["test_status"]["executed_results"]:
+            result_count[date][executed_label] += 1
+    return result_count
+
+
+def legacy_find_columns(header: list, settings: dict) -> list:
+    """比較用: 設定の辞書からキーワードを取り出して列番号を特定する変更前の処理"""
+    read_definition = settings["read_definition"]
+    return [
+        Utility.find_colnum_by_keywords(lst=header, keywords=read_definition["result_row"]["keys"], ignore_words=read_definition["result_row"]["ignores"]),
+        Utility.find_colnum_by_keywords(lst=header, keywords=read_definition["person_row"]["keys"]),
+        Utility.find_colnum_by_keywords(lst=header, keywords=read_definition["date_row"]["keys"]),
+        Utility.find_colnum_by_keywords(lst=header, keywords=read_definition["plan_row"]["keys"]),
+        Utility.find_colnum_by_keywords(lst=header, keywords=read_definition["tobe_row"]["keys"]),
+    ]
+
+
+def compiled_find_columns(header: list, read_definition: ReadDefinition.ReadDefinition) -> list:
+    return [
+        read_definition.result.find_colnums(header),
+        read_definition.person.find_colnums(header),
+        read_definition.date.find_colnums(header),
+        read_definition.plan.find_colnums(header),
+        read_definition.tobe.find_colnums(header),
+    ]
+
+
+def timeit(func, repeat: int) -> float:
+    """最速値(秒)を返す"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="設定の事前解釈のマイクロベンチマーク")
+    parser.add_argument("--rows", type=int, default=100000, help="日付別集計の行数")
+    parser.add_argument("--sheets", type=int, default=1000, help="列番号を特定するシート数")
+    parser.add_argument("--envs", type=int, default=5, help="ヘッダ行の環境(結果・担当者・日付・計画)セット数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数")
+    args = parser.parse_args()
+
+    with open(AppConfig.DEFAULT_JSON_NAME, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    definition = ReadDefinition.from_settings(settings)
+
+    # シートごとの処理: ヘッダ行からの列番号の特定
+    header = ["#", "大項目", "中項目", "手順", "期待結果", "備考"]
+    for i in range(args.envs):
+        header += [f"結果{i + 1}", f"担当者{i + 1}", f"日付{i + 1}", f"計画{i + 1}"]
+    legacy = timeit(lambda: [legacy_find_columns(header, settings) for _ in range(args.sheets)], args.repeat)
+    compiled = timeit(lambda: [compiled_find_columns(header, definition.read_definition) for _ in range(args.sheets)], args.repeat)
+    print(f"[列番号の特定] 変更前: {legacy / args.sheets * 1e6:.2f}us/シート / ReadDefinition: {compiled / args.sheets * 1e6:.2f}us/シート")
+
+    # 行ごとの処理: 日付別集計
+    results = list(definition.test_status.results) + [None]
+    data = [[results[i % len(results)], "tester", f"2025-01-{i % 28 + 1:02d}" if i % 7 else None] for i in range(args.rows)]
+    legacy = timeit(lambda: legacy_get_daily(data, settings), args.repeat)
+    compiled = timeit(lambda: ReadData.get_daily(data=data, test_status=definition.test_status), args.repeat)
+    print(f"[日付別集計] 変更前: {legacy / args.rows * 1e9:.0f}ns/行 / TestStatus: {compiled / args.rows * 1e9:.0f}ns/行")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""対象外シートの読み飛ばし効果を計測するベンチマーク
+
+テスト項目シートに加えて、大きな対象外シート(変更履歴・マスタ等)を多数含むブックを生成し、
+全シートを解析して読み込んだ場合と、シート名で対象シートを絞り込んでから読み込んだ場合の
+再集計時間(ブック読込＋集計)を比較する。
+
+実行例:
+    python -m benchmarks.sheet_selection --extra-sheets 10 --extra-rows 5000
+"""
+import os, json, time, argparse, tempfile
+
+from openpyxl import load_workbook
+
+import ReadData
+from libs import AppConfig, ReadDefinition
+from libs import OpenpyxlWrapper as Excel
+from benchmarks.generator import create_spec_workbook
+
+
+def measure(filepath: str, settings: dict, select_sheets: bool, repeat: int) -> float:
+    """ブック読込＋集計の平均時間(秒)を計測する"""
+    definition = ReadDefinition.from_settings(settings)
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if select_sheets:
+            ReadData.aggregate_results(filepath=filepath, definition=definition)
+        else:
+            # 従来どおり全シートを解析してから対象シートを絞り込む
+            workbook = load_workbook(filepath, read_only=settings["read_option"]["read_only"])
+            try:
+                ReadData._aggregate_workbook(workbook=workbook, definition=definition)
+            finally:
+                Excel.close(workbook)
+        elapsed.append(time.perf_counter() - start)
+    return sum(elapsed) / len(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="対象外シート読み飛ばしのベンチマーク")
+    parser.add_argument("--test-rows", type=int, default=500, help="テスト項目シートの行数")
+    parser.add_argument("--extra-sheets", type=int, default=5, help="対象外シートの数")
+    parser.add_argument("--extra-rows", type=int, default=3000, help="対象外シートの行数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数")
+    args = parser.parse_args()
+
+    with open(AppConfig.DEFAULT_JSON_NAME, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filepath = os.path.join(temp_dir, "sheet_selection.xlsx")
+        create_spec_workbook(filepath, rows=args.test_rows, envs=1, extra_sheets=args.extra_sheets, extra_rows=args.extra_rows)
+
+        for read_only in (False, True):
+            settings["read_option"]["read_only"] = read_only
+            all_sheets = measure(filepath, settings, select_sheets=False, repeat=args.repeat)
+            selected = measure(filepath, settings, select_sheets=True, repeat=args.repeat)
+            mode = "read_only" if read_only else "normal"
+            print(f"[{mode}] 全シート解析: {all_sheets:.3f}s / 対象シートのみ: {selected:.3f}s ({all_sheets / selected:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
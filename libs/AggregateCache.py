@@ -0,0 +1,127 @@
+import os, json, zipfile, tempfile
+
+from libs import FileFingerprint
+
+# ファイル内容のハッシュと集計設定のハッシュをキーとして、ReadData.aggregate_results の結果をディスクに保存する。
+# 同じ仕様書を複数のプロジェクトで集計する場合も、内容と設定が同じであれば集計結果を使い回す。
+# 1エントリ1ファイル(<キー>.json)で保存し、合計サイズが上限を超えた場合は最終利用日時(更新日時)が古いものから削除する。
+
+CACHE_SUBDIR = "aggregate"
+ENTRY_EXT = ".json"
+
+
+class AggregateCache:
+    def __init__(self, cache_dir: str, max_size_mb: int = 200):
+        """
+        Args:
+            cache_dir: キャッシュの保存先ディレクトリ
+            max_size_mb: キャッシュの合計サイズの上限(MB)。0の場合は上限なし
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash: str, settings_hash: str) -> str:
+        return f"{content_hash}_{settings_hash[:16]}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ENTRY_EXT)
+
+    def get(self, key: str) -> dict:
+        """キャッシュから集計結果を取得する(見つからない場合はNone)"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            # 存在しない・壊れているエントリはミスとして扱う
+            self.misses += 1
+            return None
+
+        # 更新日時を最終利用日時として更新(LRUでの削除順に使用)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: dict):
+        """集計結果をキャッシュに保存する(エラーの結果は保存しない)"""
+        if "error" in result:
+            return
+        # 書込み途中のファイルを他のプロセスが読まないよう、一時ファイルに書き出してから置き換える
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(temp_path, self._entry_path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.stores += 1
+
+    def evict(self):
+        """合計サイズが上限を超えている場合、最終利用日時が古いエントリから削除する"""
+        if self.max_size <= 0:
+            return
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(ENTRY_EXT):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.evictions += 1
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def clear(self):
+        """キャッシュを全て削除する"""
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(ENTRY_EXT):
+                os.remove(entry.path)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "stores": self.stores, "evictions": self.evictions}
+
+    def summary(self) -> str:
+        return f"キャッシュ: ヒット {self.hits}件 / ミス {self.misses}件 / 保存 {self.stores}件 / 削除 {self.evictions}件"
+
+
+def from_settings(settings: dict) -> AggregateCache:
+    """設定から集計結果のキャッシュを作成する(無効の場合はNone)"""
+    cache_settings = settings["cache"]
+    if not cache_settings["aggregate"]["enabled"]:
+        return None
+    return AggregateCache(
+        cache_dir=os.path.join(cache_settings["dir"], CACHE_SUBDIR),
+        max_size_mb=cache_settings["aggregate"]["max_size_mb"]
+    )
+
+
+def content_key(filepath: str, settings_hash: str, fingerprint: dict = None, member: str = None) -> str:
+    """ファイルのキャッシュキーを作成する(指紋に内容のハッシュがあれば再計算しない)"""
+    if fingerprint and fingerprint.get("hash"):
+        content_hash = fingerprint["hash"]
+    else:
+        try:
+            content_hash = FileFingerprint.file_hash(filepath, member)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return None
+    return AggregateCache.make_key(content_hash, settings_hash)
@@ -1,12 +1,67 @@
-import os, json, codecs
+import os, json, copy, tempfile, threading, time
+from contextlib import contextmanager
+
+from libs import FileLock
+
+# 設定(DefaultConfig.json に UserConfig.json を補完したもの)の読み書き。
+# 読み込んだ設定はプロセス内にキャッシュし、どちらかのファイルが更新される(更新日時・サイズが変わる)まではファイルを読み直さない。
+# UserConfig.json は不足しているキーを補完して内容が変わった場合のみ書き込む。
+# 書き込みは一時ファイルに書き出してから置き換え、複数のプロセス(GUI・WebUI・StartProcess)の書き込みはロックファイルで順番に行うため、
+# 他のプロセスが書き込み途中のファイルを読むことはない。
 
 USER_JSON_NAME = "UserConfig.json"
 DEFAULT_JSON_NAME = "DefaultConfig.json"
+REPLACE_RETRIES = 5  # 置き換え先を他のプロセスが開いている場合(Windows)の再試行回数
+
+# {(UserConfig.jsonのパス, DefaultConfig.jsonのパス): (ファイルの状態, 設定)}
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(json_name: str):
+    """設定ファイルの書き込みを他のプロセス・スレッドと排他する"""
+    with _cache_lock, FileLock.lock(json_name):
+        yield
+
+
+def _stat(path: str):
+    """キャッシュの有効性の判定に使用するファイルの状態(存在しない場合はNone)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _write_json(settings, json_name: str):
+    """一時ファイルに書き出してから置き換える"""
+    directory = os.path.dirname(os.path.abspath(json_name))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(json_name), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(settings, f, indent=4, ensure_ascii=False)
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(temp_path, json_name)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(0.1 * (attempt + 1))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 
 # 設定の保存
 def save_settings(settings, json_name:str=USER_JSON_NAME):
-    with codecs.open(json_name, "w", "utf-8") as f:
-        json.dump(settings, f, indent=4, ensure_ascii=False)
+    with _file_lock(json_name):
+        _write_json(settings, json_name)
+        # 保存した設定をキャッシュに反映(次回の読込はファイルの状態から判定し直す)
+        for key in [key for key in _cache if key[0] == json_name]:
+            del _cache[key]
 
 
 def merge_missing_keys(default_data, user_data):
@@ -20,34 +75,52 @@ def merge_missing_keys(default_data, user_data):
             user_data[key] = merge_missing_keys(value, user_data.get(key, {}))
     return user_data
 
+
+def _read_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 # 設定の読込
 def load_settings(user_config_path=USER_JSON_NAME, default_config_path=DEFAULT_JSON_NAME):
     """
     DefaultConfig.jsonを元にUserConfig.jsonに不足しているキーを補完する。
     UserConfig.jsonがなければ作成する。
 
+    どちらのファイルも前回の読込から更新されていない場合は、キャッシュした設定のコピーを返す。
+    UserConfig.jsonは補完によって内容が変わった場合のみ書き込む。
+
     :param user_config_path: UserConfig.jsonのパス
     :param default_config_path: DefaultConfig.jsonのパス
     """
+    key = (user_config_path, default_config_path)
+    state = (_stat(user_config_path), _stat(default_config_path))
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == state:
+        return copy.deepcopy(cached[1])
+
     # DefaultConfig.json の読み込み
     if not os.path.exists(default_config_path):
         raise FileNotFoundError(f"{default_config_path} が見つかりません。")
-
-    with open(default_config_path, "r", encoding="utf-8") as f:
-        default_data = json.load(f)
+    default_data = _read_json(default_config_path)
 
     # UserConfig.json の読み込み（なければ空の辞書）
-    if os.path.exists(user_config_path):
-        with open(user_config_path, "r", encoding="utf-8") as f:
-            user_data = json.load(f)
-    else:
-        user_data = {}
+    user_data = _read_json(user_config_path) if os.path.exists(user_config_path) else None
 
     # 不足キーを補完
-    updated_data = merge_missing_keys(default_data, user_data)
+    updated_data = merge_missing_keys(default_data, copy.deepcopy(user_data) if user_data is not None else {})
 
-    # 更新後のUserConfig.jsonを書き込み
-    with open(user_config_path, "w", encoding="utf-8") as f:
-        json.dump(updated_data, f, indent=4, ensure_ascii=False)
+    if updated_data != user_data:
+        # 補完によって内容が変わった場合のみUserConfig.jsonを書き込み
+        # (ロックを取得してから読み直し、他のプロセスが先に書き込んだ内容を上書きしない)
+        with _file_lock(user_config_path):
+            user_data = _read_json(user_config_path) if os.path.exists(user_config_path) else None
+            updated_data = merge_missing_keys(default_data, copy.deepcopy(user_data) if user_data is not None else {})
+            if updated_data != user_data:
+                _write_json(updated_data, user_config_path)
+        state = (_stat(user_config_path), _stat(default_config_path))
 
-    return updated_data
\ No newline at end of file
+    with _cache_lock:
+        _cache[key] = (state, updated_data)
+    return copy.deepcopy(updated_data)
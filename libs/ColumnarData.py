@@ -0,0 +1,174 @@
+import bisect
+from operator import add
+
+# 集計データ(gathered_data)の日付別・環境別・担当者別の件数を列指向の形式で表す。
+#
+# 従来の形式は日付ごとに結果タイプ(Pass, Fixed, ..., 完了数, 消化数, 計画数)の辞書を持ち、環境別はさらに環境ごとに同じ形を繰り返す。
+# 列指向の形式では、全ファイル共通の日付(昇順)と結果タイプの一覧を1回だけ持ち、ファイル・環境ごとの件数は
+# 日付の位置(start)から始まる整数の行列として持つ。
+#
+#   {
+#       "format": "columnar", "version": 1,
+#       "dates": ["2025-02-11", ...],            全ファイルの日付(昇順)
+#       "labels": ["Pass", ..., "計画数"],        結果タイプの一覧
+#       "results": [                             ファイルごとの集計結果(daily / by_env / by_name 以外は従来のまま)
+#           {..., "daily": {"start": 0, "counts": [[6, 0, 1, ...], null, ...]},
+#                 "by_name": {"start": 0, "persons": ["Aさん", ...], "counts": [[3, 4], ...]},
+#                 "by_env": {"環境a": {"start": 0, "counts": [...]}, ...}}
+#       ]
+#   }
+#
+# 行列の行は dates[start + i] の日付の件数。その日付のデータがない場合は null、
+# 結果タイプの構成が labels と異なる日付(旧形式のデータなど)は従来の辞書のまま保持するため、従来の形式と相互に欠落なく変換できる。
+# 担当者別の件数は persons の順で、その日に件数がない担当者は null とする。
+
+FORMAT = "columnar"
+VERSION = 1
+
+
+def is_encoded(data) -> bool:
+    """列指向の形式の集計データかどうか"""
+    return isinstance(data, dict) and data.get("format") == FORMAT
+
+
+def _collect(gathered_data: list) -> tuple[list, list]:
+    dates = set()
+    labels = None
+    for result in gathered_data:
+        daily_list = [result.get("daily") or {}] + list((result.get("by_env") or {}).values())
+        for daily in daily_list:
+            dates.update(daily)
+            if labels is None:
+                labels = next((list(values) for values in daily.values()), None)
+        dates.update(result.get("by_name") or {})
+    return sorted(dates), labels or []
+
+
+def _encode_daily(daily: dict, date_index: dict, labels: list) -> dict:
+    if not daily:
+        return {"start": 0, "counts": []}
+    positions = [date_index[date] for date in daily]
+    start = min(positions)
+    counts = [None] * (max(positions) - start + 1)
+    for position, values in zip(positions, daily.values()):
+        counts[position - start] = [values[label] for label in labels] if list(values) == labels else values
+    return {"start": start, "counts": counts}
+
+
+def _decode_daily(encoded: dict, dates: list, labels: list) -> dict:
+    start = encoded["start"]
+    daily = {}
+    for i, row in enumerate(encoded["counts"]):
+        if row is None:
+            continue
+        daily[dates[start + i]] = dict(zip(labels, row)) if isinstance(row, list) else row
+    return daily
+
+
+def _encode_by_name(by_name: dict, date_index: dict) -> dict:
+    persons = sorted({person for counts in by_name.values() for person in counts})
+    encoded = _encode_daily(
+        {date: {person: counts.get(person) for person in persons} for date, counts in by_name.items()}, date_index, persons
+    )
+    encoded["persons"] = persons
+    return encoded
+
+
+def _decode_by_name(encoded: dict, dates: list) -> dict:
+    persons = encoded["persons"]
+    start = encoded["start"]
+    return {
+        dates[start + i]: {person: count for person, count in zip(persons, row) if count is not None}
+        for i, row in enumerate(encoded["counts"]) if row is not None
+    }
+
+
+def encode(gathered_data: list) -> dict:
+    """
+    集計データを列指向の形式に変換する
+
+    Args:
+        gathered_data (list): 集計データ(従来の形式)
+
+    Returns:
+        dict: 列指向の形式の集計データ
+    """
+    dates, labels = _collect(gathered_data)
+    date_index = {date: i for i, date in enumerate(dates)}
+    results = []
+    for result in gathered_data:
+        encoded = dict(result)
+        if "daily" in result:
+            encoded["daily"] = _encode_daily(result["daily"] or {}, date_index, labels)
+        if "by_name" in result:
+            encoded["by_name"] = _encode_by_name(result["by_name"] or {}, date_index)
+        if "by_env" in result:
+            encoded["by_env"] = {env: _encode_daily(daily, date_index, labels) for env, daily in (result["by_env"] or {}).items()}
+        results.append(encoded)
+    return {"format": FORMAT, "version": VERSION, "dates": dates, "labels": labels, "results": results}
+
+
+def decode(data) -> list:
+    """
+    列指向の形式の集計データを従来の形式に変換する(従来の形式の場合はそのまま返す)
+
+    Args:
+        data (dict | list): 集計データ
+
+    Returns:
+        list: 集計データ(従来の形式)
+    """
+    if not is_encoded(data):
+        return data
+    dates, labels = data["dates"], data["labels"]
+    gathered_data = []
+    for encoded in data["results"]:
+        result = dict(encoded)
+        if "daily" in encoded:
+            result["daily"] = _decode_daily(encoded["daily"], dates, labels)
+        if "by_name" in encoded:
+            result["by_name"] = _decode_by_name(encoded["by_name"], dates)
+        if "by_env" in encoded:
+            result["by_env"] = {env: _decode_daily(daily, dates, labels) for env, daily in encoded["by_env"].items()}
+        gathered_data.append(result)
+    return gathered_data
+
+
+def aggregate_daily(data: dict, date_from: str = None, date_to: str = None) -> dict:
+    """
+    列指向の形式の集計データから、全ファイルの日付別の件数を合計する(エラー・ワーニングのあるファイルは除く)
+
+    DataConversion.aggregate_all_daily と同じ結果を、辞書を展開せずに行列の行単位で合計して求める。
+
+    Returns:
+        dict: {日付: {結果タイプ: 件数}}
+    """
+    dates, labels = data["dates"], data["labels"]
+    lower = bisect.bisect_left(dates, date_from) if date_from else 0
+    upper = bisect.bisect_right(dates, date_to) if date_to else len(dates)
+    totals = [None] * len(dates)
+    extra = {}  # 結果タイプの構成が labels と異なる日付の件数
+    for result in data["results"]:
+        if "error" in result or "warning" in result or "daily" not in result:
+            continue
+        start = result["daily"]["start"]
+        for i, row in enumerate(result["daily"]["counts"], start):
+            if row is None or not lower <= i < upper:
+                continue
+            if isinstance(row, list):
+                total = totals[i]
+                totals[i] = row[:] if total is None else list(map(add, total, row))
+            else:
+                counts = extra.setdefault(i, {})
+                for key, value in row.items():
+                    counts[key] = counts.get(key, 0) + value
+
+    daily = {}
+    for i in range(lower, upper):
+        if totals[i] is None and i not in extra:
+            continue
+        counts = dict(zip(labels, totals[i])) if totals[i] is not None else {}
+        for key, value in extra.get(i, {}).items():
+            counts[key] = counts.get(key, 0) + value
+        daily[dates[i]] = counts
+    return daily
@@ -1,4 +1,4 @@
-from libs import Utility, Labels
+from libs import Utility, Labels, ColumnarData
 from collections import defaultdict
 
 def convert_to_2d_array(data, settings):
@@ -145,6 +145,9 @@ def _extract_file_data(file_data: dict) -> dict:
     }
 
 def aggregate_all_daily(data):
+    # 列指向の形式の集計データは行列のまま合計する
+    if ColumnarData.is_encoded(data):
+        return ColumnarData.aggregate_daily(data)
     result = defaultdict(lambda: defaultdict(int))
     for record in data:
         # エラーまたはワーニングのあるデータは除外
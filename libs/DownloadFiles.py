@@ -1,48 +1,197 @@
 import os
+import json
+import time
+import hashlib
 import tempfile
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from libs import Logger
+
+logger = Logger.get_logger(__name__, console=True, file=False, trace_line=False)
 
 TEMP_DIR_PREFIX = "_TEMP_"  # 一時フォルダの識別用プレフィックス
+CHUNK_SIZE = 1024 * 1024
+META_NAME = "meta.json"
+RETRY_STATUS = {429, 500, 502, 503, 504}  # 再試行するステータスコード
 
-def download_files(sharepoint_files: list) -> tuple[list, str]:
+
+class DownloadCache:
+    """
+    ダウンロードしたファイルをキー(URLまたはファイルのID)ごとに保存し、ETag / Last-Modified を記録する。
+    次回のダウンロード時は条件付きGET(If-None-Match / If-Modified-Since)で問い合わせ、
+    304(変更なし)の場合は保存済みのファイルを使用する。
     """
-    SharePointのダウンロードURLからファイルをダウンロードし、一時フォルダに保存する
 
-    Args:
-        sharepoint_files (list): ダウンロードURLのリスト
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest()[:32])
+
+    def load(self, key: str) -> dict:
+        """保存済みのファイルの情報(ファイルが残っていない場合はNone)"""
+        try:
+            with open(os.path.join(self.entry_dir(key), META_NAME), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if os.path.exists(meta["path"]) else None
+
+    def save(self, key: str, url: str, path: str, response: requests.Response):
+        meta = {
+            "url": url,
+            "path": path,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        with open(os.path.join(self.entry_dir(key), META_NAME), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def summary(self) -> str:
+        return f"ダウンロードキャッシュ: 変更なし {self.hits}件 / ダウンロード {self.misses}件"
+
+
+def create_session(max_workers: int) -> requests.Session:
+    """並列数分の接続を使い回すセッションを作成する"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-    Returns:
-        tuple[list, str]: (ダウンロードしたファイルのパスのリスト, 一時フォルダのパス)
-    """
-    # 一時フォルダを作成（識別しやすい名前）
-    temp_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
-    downloaded_files = []
 
-    for url in sharepoint_files:
+def _get_with_retry(session: requests.Session, url: str, headers: dict, retries: int, backoff: float, timeout: float) -> requests.Response:
+    """接続エラー・一時的なエラー(429/5xx)の場合は間隔を倍にしながら再試行する"""
+    for attempt in range(retries + 1):
         try:
-            # ファイル名を取得（URLの最後の部分）
-            parsed_url = urlparse(url)
-            filename = os.path.basename(parsed_url.path)
-            if not filename:
-                # ファイル名が取得できない場合はスキップ
-                continue
+            response = session.get(url, headers=headers, stream=True, timeout=timeout)
+            if response.status_code not in RETRY_STATUS or attempt == retries:
+                return response
+            response.close()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * (2 ** attempt))
 
-            # ファイルをダウンロード
-            response = requests.get(url)
-            response.raise_for_status()  # エラーチェック
 
-            # 一時フォルダにファイルを保存
-            file_path = os.path.join(temp_dir, filename)
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+def _download(session: requests.Session, url: str, key: str, filename: str, dest_dir: str, cache: DownloadCache, retries: int, backoff: float, timeout: float) -> str:
+    """1ファイルをダウンロードし、保存したファイルのパスを返す(keyはキャッシュのキー)"""
+    # ファイル名を取得（指定がなければURLの最後の部分）
+    filename = filename or os.path.basename(urlparse(url).path)
+    if not filename:
+        # ファイル名が取得できない場合はスキップ
+        return None
 
-            temp_dirs = [temp_dir]
+    headers = {}
+    meta = cache.load(key) if cache else None
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        dest_dir = os.path.dirname(meta["path"])
+    elif cache:
+        dest_dir = cache.entry_dir(key)
+        os.makedirs(dest_dir, exist_ok=True)
+    else:
+        # 同名のファイルが上書きされないようURLごとにフォルダを分ける
+        dest_dir = os.path.join(dest_dir, hashlib.sha256(url.encode("utf-8")).hexdigest()[:16])
+        os.makedirs(dest_dir, exist_ok=True)
 
-            downloaded_files.append(file_path)
+    response = _get_with_retry(session, url, headers, retries, backoff, timeout)
+    with response:
+        if meta and response.status_code == 304:
+            # 変更なし: 保存済みのファイルを使用
+            cache.count(hit=True)
+            return meta["path"]
+        response.raise_for_status()  # エラーチェック
 
+        # 本文を分割して一時ファイルに書き出し、書き終えてから置き換える(メモリに全体を保持しない)
+        file_path = os.path.join(dest_dir, filename)
+        fd, temp_path = tempfile.mkstemp(dir=dest_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if cache:
+            cache.count(hit=False)
+            cache.save(key, url, file_path, response)
+    return file_path
+
+
+def download_files(sharepoint_files: list, max_workers: int = 4, cache_dir: str = None, retries: int = 3,
+                   backoff: float = 0.5, timeout: float = 60, session: requests.Session = None,
+                   cache_keys: list = None, filenames: list = None, keep_failed: bool = False) -> tuple[list, list]:
+    """
+    SharePointのダウンロードURLからファイルを並列にダウンロードする
+
+    cache_dirを指定した場合はキャッシュのキーごとに保存し、次回は条件付きGETで変更がなければ保存済みのファイルを使用する。
+    指定しない場合は一時フォルダに保存する。
+
+    Args:
+        sharepoint_files (list): ダウンロードURLのリスト
+        max_workers (int): 同時にダウンロードする数
+        cache_dir (str): ダウンロードしたファイルの保存先(キャッシュ)
+        retries (int): 接続エラー・一時的なエラーの場合の再試行回数
+        backoff (float): 再試行までの待ち時間(秒)。再試行ごとに倍にする
+        timeout (float): 接続・受信のタイムアウト(秒)
+        session (requests.Session): 使用するセッション(認証の設定など。省略時は作成する)
+        cache_keys (list): URLごとのキャッシュのキー(省略時はURL)。ダウンロードURLが毎回変わる場合に、ファイルのIDなど変わらない値を指定する
+        filenames (list): URLごとの保存するファイル名(省略時はURLの最後の部分)
+        keep_failed (bool): ダウンロードできなかったURLの位置にNoneを残すかどうか(URLとファイルのパスを対応付ける場合に指定する)
+
+    Returns:
+        tuple[list, list]: (ダウンロードしたファイルのパスのリスト(URLの順), 一時フォルダのパスのリスト)
+    """
+    max_workers = max(min(max_workers, len(sharepoint_files)), 1)
+    cache = DownloadCache(cache_dir) if cache_dir else None
+    temp_dirs = []
+    dest_dir = None
+    if not cache:
+        # 一時フォルダを作成（識別しやすい名前）
+        dest_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
+        temp_dirs.append(dest_dir)
+
+    own_session = session is None
+    session = session or create_session(max_workers)
+
+    def download(url, key, filename):
+        try:
+            return _download(session, url, key, filename, dest_dir, cache, retries, backoff, timeout)
         except Exception as e:
-            print(f"Error downloading {url}: {str(e)}")
-            continue
+            logger.error(f"Error downloading {url}: {str(e)}")
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            downloaded_files = list(executor.map(download, sharepoint_files, cache_keys or sharepoint_files, filenames or [None] * len(sharepoint_files)))
+            if not keep_failed:
+                downloaded_files = [path for path in downloaded_files if path]
+    finally:
+        if own_session:
+            session.close()
 
-    return downloaded_files, temp_dirs 
\ No newline at end of file
+    if cache:
+        logger.info(cache.summary())
+    return downloaded_files, temp_dirs
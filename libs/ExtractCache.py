@@ -0,0 +1,267 @@
+import os, json, shutil, hashlib, zipfile, threading
+
+from libs import FileFingerprint, FileLock, Zip
+
+# zipファイルの展開先を管理するキャッシュ。
+# zipファイルのパス・サイズ・更新日時(またはファイル内容のハッシュ)をキーとして展開先のディレクトリを決め、
+# 変更のないzipファイルは前回の展開結果をそのまま使用する(展開しない)。
+#
+# 展開先を使用中のプロセスは、エントリ内の参照ファイル(.refs/<pid>)を開いたままロックしておく。
+# 削除(容量超過時)はロックされた参照ファイルがないエントリのみを対象とするため、
+# 同時に実行されている他のプロセス(WebUIからの再集計など)が読込中の展開先は削除しない。
+# プロセスが異常終了した場合もロックはOSによって解放されるため、残った参照ファイルは使用中とみなさない。
+#
+# エントリの読込(マニフェストの確認・展開・参照ファイルのロック)と削除(使用中の確認・ディレクトリの削除)は、
+# エントリごとのロックファイル(<キー>.lock)で排他する。削除は他のプロセスがロック中のエントリを待たずにスキップするため、
+# 使用中の確認から削除までの間に他のプロセスが展開先の使用を始めることはない。
+# 展開途中で異常終了したプロセスの一時ディレクトリ(<キー>.<pid>.tmp)は、ロックされていなければ削除時に取り除く。
+# 削除したエントリのロックファイルは、ロック中に削除する。
+#
+# zipファイルが更新されてキーが変わった場合、このプロセスは古いエントリの参照を解放する(監視モードなど、
+# プロセスが長時間動き続ける場合も古いエントリを削除の対象にする)。
+
+CACHE_SUBDIR = "extract"
+MANIFEST_NAME = ".manifest.json"
+REFS_DIR = ".refs"
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(f):
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+else:
+    import fcntl
+
+    def _lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+class ExtractCache:
+    def __init__(self, cache_dir: str, max_size_mb: int = 1024, content_hash: bool = False):
+        """
+        Args:
+            cache_dir: 展開先の保存先ディレクトリ
+            max_size_mb: 展開したファイルの合計サイズの上限(MB)。0の場合は上限なし
+            content_hash: zipファイルの変更有無を更新日時ではなくファイル内容のハッシュで判定するかどうか
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 * 1024
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._refs = {}  # このプロセスが使用中のエントリ (エントリのディレクトリ: 参照ファイル)
+        self._entries = {}  # zipファイルごとの使用中のエントリ (zipファイルのパス: エントリのディレクトリ)
+        self._lock = threading.Lock()  # 複数のスレッドから展開する場合の件数・参照の更新用
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, zip_path: str) -> str:
+        """zipファイルのパス・サイズ・更新日時(またはファイル内容のハッシュ)からキーを作成する"""
+        stat = os.stat(zip_path)
+        version = FileFingerprint.file_hash(zip_path) if self.content_hash else stat.st_mtime_ns
+        source = f"{os.path.abspath(zip_path)}|{stat.st_size}|{version}"
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+
+    def extract(self, zip_path: str, extensions=None) -> list:
+        """
+        zipファイルを展開し、指定した拡張子のファイルのフルパスをリストで返却する。
+        前回展開したときからzipファイルが変更されていない場合は展開せずに前回の展開結果を返す。
+
+        :param zip_path: ZIPファイルのパス
+        :param extensions: フィルタする拡張子のリスト (例: ['.xlsx'])。None の場合はすべてのファイルを取得。
+        :return: ファイルのフルパスのリスト
+        """
+        if not zipfile.is_zipfile(zip_path):
+            raise ValueError("指定されたファイルはZIPファイルではありません")
+
+        entry_dir = os.path.join(self.cache_dir, self.make_key(zip_path))
+        # 他のプロセスが同じエントリを削除・展開中の場合は完了を待ってから、マニフェストの確認と参照ファイルのロックを行う
+        with FileLock.lock(entry_dir):
+            manifest = self._read_manifest(entry_dir)
+            hit = manifest is not None and manifest["extensions"] == _normalize(extensions)
+            if not hit:
+                manifest = self._create_entry(zip_path, entry_dir, extensions)
+
+            # 使用中であることを記録し、最終利用日時を更新(容量超過時の削除順に使用)
+            with self._lock:
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                self._acquire(entry_dir)
+                # zipファイルが更新された場合は、前のバージョンのエントリの参照を解放する
+                previous = self._entries.get(os.path.abspath(zip_path))
+                if previous and previous != entry_dir:
+                    self._release(previous)
+                self._entries[os.path.abspath(zip_path)] = entry_dir
+            os.utime(os.path.join(entry_dir, MANIFEST_NAME))
+        return [os.path.join(entry_dir, *path.split("/")) for path in manifest["files"]]
+
+    def _create_entry(self, zip_path: str, entry_dir: str, extensions) -> dict:
+        """一時ディレクトリに展開してから、エントリのディレクトリに置き換える(エントリのロック中に呼び出す)"""
+        work_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            members = Zip.filter_members(zip_ref.infolist(), extensions)
+            for info in members:
+                zip_ref.extract(info, work_dir)
+        manifest = {
+            "zip": os.path.abspath(zip_path),
+            "extensions": _normalize(extensions),
+            "files": [info.filename for info in members],
+            "size": sum(info.file_size for info in members),
+        }
+        with open(os.path.join(work_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        # 拡張子の条件が異なる古いエントリは使用中でなければ置き換える
+        if os.path.isdir(entry_dir) and not self._is_in_use(entry_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.rename(work_dir, entry_dir)
+        except OSError:
+            # 他のプロセスが先に展開を完了していればそちらを使用する
+            shutil.rmtree(work_dir, ignore_errors=True)
+            existing = self._read_manifest(entry_dir)
+            if existing is None or existing["extensions"] != manifest["extensions"]:
+                raise
+            return existing
+        return manifest
+
+    @staticmethod
+    def _read_manifest(entry_dir: str) -> dict:
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _acquire(self, entry_dir: str):
+        """エントリの参照ファイルを作成し、プロセスの終了(release)までロックしておく"""
+        if entry_dir in self._refs:
+            return
+        refs_dir = os.path.join(entry_dir, REFS_DIR)
+        os.makedirs(refs_dir, exist_ok=True)
+        f = open(os.path.join(refs_dir, str(os.getpid())), "a+b")
+        try:
+            _lock(f)
+        except OSError:
+            f.close()
+            raise
+        self._refs[entry_dir] = f
+
+    def _release(self, entry_dir: str):
+        """エントリの参照ファイルのロックを解放して削除する"""
+        f = self._refs.pop(entry_dir, None)
+        if f is None:
+            return
+        path = f.name
+        f.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def release(self):
+        """このプロセスが使用中のエントリの参照を解放する"""
+        for entry_dir in list(self._refs):
+            self._release(entry_dir)
+        self._entries = {}
+
+    @staticmethod
+    def _is_in_use(entry_dir: str) -> bool:
+        """他のプロセスがロックしている参照ファイルがあるかどうか(ロックされていない参照ファイルは削除する)"""
+        refs_dir = os.path.join(entry_dir, REFS_DIR)
+        if not os.path.isdir(refs_dir):
+            return False
+        in_use = False
+        for entry in os.scandir(refs_dir):
+            try:
+                with open(entry.path, "a+b") as f:
+                    _lock(f)
+            except OSError:
+                # ロックできない参照ファイルは使用中
+                in_use = True
+                continue
+            try:
+                os.remove(entry.path)
+            except OSError:
+                in_use = True
+        return in_use
+
+    def evict(self):
+        """
+        展開途中で残った一時ディレクトリを削除し、
+        展開したファイルの合計サイズが上限を超えている場合、使用中でないエントリを最終利用日時が古いものから削除する
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(FileLock.LOCK_SUFFIX):
+                self._remove_stale_lock(entry.path[:-len(FileLock.LOCK_SUFFIX)])
+                continue
+            if not entry.is_dir():
+                continue
+            if entry.name.endswith(".tmp"):
+                self._remove_work_dir(entry.path)
+                continue
+            manifest = self._read_manifest(entry.path)
+            try:
+                last_used = os.stat(os.path.join(entry.path, MANIFEST_NAME)).st_mtime_ns
+            except OSError:
+                manifest = None
+            if manifest is None:
+                # 展開中・他のプロセスが削除済みのエントリ
+                continue
+            entries.append((last_used, manifest["size"], entry.path))
+            total += manifest["size"]
+        if self.max_size <= 0 or total <= self.max_size:
+            return
+
+        for _, size, entry_dir in sorted(entries):
+            if entry_dir in self._refs:
+                continue
+            # 他のプロセスが読込・展開中のエントリは待たずにスキップし、使用中でないことを確認してからロック中に削除する
+            with FileLock.try_lock(entry_dir) as locked:
+                if not locked or self._is_in_use(entry_dir):
+                    continue
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                FileLock.remove(entry_dir)
+            self.evictions += 1
+            total -= size
+            if total <= self.max_size:
+                break
+
+    @staticmethod
+    def _remove_stale_lock(entry_dir: str):
+        """エントリが存在しないロックファイル(削除時に削除できなかったもの)を削除する"""
+        if os.path.isdir(entry_dir):
+            return
+        with FileLock.try_lock(entry_dir) as locked:
+            if locked and not os.path.isdir(entry_dir):
+                FileLock.remove(entry_dir)
+
+    @staticmethod
+    def _remove_work_dir(work_dir: str):
+        """展開途中で異常終了したプロセスの一時ディレクトリ(<キー>.<pid>.tmp)を削除する(展開中のエントリはロックされているため削除しない)"""
+        entry_dir = os.path.join(os.path.dirname(work_dir), os.path.basename(work_dir).split(".", 1)[0])
+        with FileLock.try_lock(entry_dir) as locked:
+            if locked:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def summary(self) -> str:
+        return f"展開キャッシュ: ヒット {self.hits}件 / ミス {self.misses}件 / 削除 {self.evictions}件"
+
+
+def _normalize(extensions) -> list:
+    return sorted({ext.lower() for ext in extensions}) if extensions else []
+
+
+def from_settings(settings: dict) -> ExtractCache:
+    """設定からzipファイルの展開キャッシュを作成する"""
+    cache_settings = settings["cache"]
+    return ExtractCache(
+        cache_dir=os.path.join(cache_settings["dir"], CACHE_SUBDIR),
+        max_size_mb=cache_settings["extract"]["max_size_mb"],
+        content_hash=settings["read_option"]["content_hash"]
+    )
@@ -0,0 +1,130 @@
+import os
+import stat
+import fnmatch
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+from libs import Utility, Logger
+
+# 入力パス(ファイル・ディレクトリ)から集計対象のファイル(xlsx/zip)を探索する。
+# ネットワーク共有上の深いディレクトリでも時間がかからないよう、ディレクトリの一覧取得をスレッドプールで並列に行う。
+# Excelのロックファイル(~$*.xlsx)・隠しファイルは対象外とし、設定の include / exclude パターンで絞り込む。
+
+logger = Logger.get_logger(__name__, console=True, file=False, trace_line=False)
+
+TARGET_EXTENSIONS = ("xlsx", "zip")
+LOCK_FILE_PREFIX = "~$"
+
+
+@dataclass(frozen=True)
+class FileFilter:
+    """探索対象のファイルの条件(discovery)
+
+    パターンはファイル名・ディレクトリ名、または入力ディレクトリ(zipファイルの場合はzip内)からの相対パスと照合する。
+    """
+    include: tuple = ()  # いずれかに一致するファイルのみ対象とする(空の場合は全て)
+    exclude: tuple = ()  # いずれかに一致するファイル・ディレクトリは対象外とする
+
+    def _match(self, patterns: tuple, name: str, relpath: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relpath, pattern) for pattern in patterns)
+
+    def is_target_file(self, name: str, relpath: str = None) -> bool:
+        relpath = relpath or name
+        if name.startswith(LOCK_FILE_PREFIX) or name.startswith("."):
+            return False
+        if self.include and not self._match(self.include, name, relpath):
+            return False
+        return not self._match(self.exclude, name, relpath)
+
+    def is_target_dir(self, name: str, relpath: str) -> bool:
+        if name.startswith("."):
+            return False
+        return not self._match(self.exclude, name, relpath)
+
+
+def from_settings(settings: dict) -> FileFilter:
+    discovery = settings["discovery"]
+    return FileFilter(include=tuple(discovery["include"]), exclude=tuple(discovery["exclude"]))
+
+
+def _is_hidden(entry: os.DirEntry) -> bool:
+    """Windowsの隠し属性が設定されているかどうか(名前が.で始まるものはFileFilterで除外する)"""
+    if os.name != "nt":
+        return False
+    try:
+        return bool(entry.stat(follow_symlinks=False).st_file_attributes & stat.FILE_ATTRIBUTE_HIDDEN)
+    except OSError:
+        return False
+
+
+def _list_dir(root: str, dir_path: str, file_filter: FileFilter) -> tuple:
+    """ディレクトリ直下の対象ファイルとサブディレクトリを取得する"""
+    files, dirs = [], []
+    try:
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if _is_hidden(entry):
+                    continue
+                relpath = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                if entry.is_dir():
+                    if file_filter.is_target_dir(entry.name, relpath):
+                        dirs.append(entry.path)
+                elif entry.is_file():
+                    if Utility.get_ext_from_path(entry.path).lower() in TARGET_EXTENSIONS and file_filter.is_target_file(entry.name, relpath):
+                        files.append(entry.path)
+    except OSError as e:
+        # 権限のないディレクトリ等は読み飛ばして探索を継続する
+        logger.warning(f"ディレクトリを読み込めませんでした: {dir_path} ({e})")
+    return files, dirs
+
+
+def _scan_tree(root: str, file_filter: FileFilter, executor: ThreadPoolExecutor) -> list:
+    """ディレクトリを階層ごとに並列に探索し、対象ファイルのパスを返す"""
+    files = []
+    pending = [root]
+    while pending:
+        next_pending = []
+        for dir_files, dirs in executor.map(lambda dir_path: _list_dir(root, dir_path, file_filter), pending):
+            files.extend(dir_files)
+            next_pending.extend(dirs)
+        pending = next_pending
+    return files
+
+
+def discover(inputs: list, file_filter: FileFilter = FileFilter(), max_workers: int = 8) -> list:
+    """
+    入力パスから集計対象のファイル(xlsx/zip)のパスを取得する
+
+    ディレクトリ内のファイルはパス順に並べ、入力パスの順序で連結する。
+    同じファイルが複数の入力パスに含まれる場合は最初の1件のみとする。
+    存在しないパス(zip内のファイルのパスなど)はそのまま返す。
+
+    Args:
+        inputs: 入力パス(ファイル・ディレクトリ)のリスト
+        file_filter: 探索対象のファイルの条件
+        max_workers: ディレクトリの一覧取得の並列数
+
+    Returns:
+        list: 対象ファイルのパスのリスト
+    """
+    manifest = []
+    seen = set()
+
+    def add(path):
+        key = os.path.normcase(os.path.abspath(path))
+        if key not in seen:
+            seen.add(key)
+            manifest.append(path)
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        for input_path in inputs:
+            if os.path.isdir(input_path):
+                for path in sorted(_scan_tree(input_path, file_filter, executor), key=os.path.normcase):
+                    add(path)
+            elif not os.path.exists(input_path):
+                add(input_path)
+            elif Utility.get_ext_from_path(input_path).lower() in TARGET_EXTENSIONS:
+                # 直接指定されたファイルはロックファイル・隠しファイルのみ除外する
+                if FileFilter().is_target_file(os.path.basename(input_path)):
+                    add(input_path)
+    return manifest
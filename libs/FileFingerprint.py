@@ -0,0 +1,79 @@
+import os
+import hashlib
+import zipfile
+
+# ファイルの指紋(サイズ・更新日時・内容のハッシュ)と集計設定のハッシュを組み合わせて、
+# 前回の集計結果をそのまま再利用できるかどうかを判定する。
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(filepath: str, member: str = None) -> str:
+    """ファイル内容のSHA-256ハッシュを取得する(memberを指定した場合はZIPファイル内のファイル)"""
+    digest = hashlib.sha256()
+    if member:
+        with zipfile.ZipFile(filepath, "r") as zip_ref, zip_ref.open(member) as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make(filepath: str, settings_hash: str, content_hash: bool = False, member: str = None) -> dict:
+    """ファイルの指紋を作成する
+
+    Args:
+        filepath: 対象ファイルのパス(memberを指定した場合はZIPファイルのパス)
+        settings_hash: 集計設定のハッシュ(ReadDefinition.AggregateDefinition.settings_hash)
+        content_hash: ファイル内容のハッシュも含めるかどうか(サイズ・更新日時が同じでも内容の変更を検知する)
+        member: ZIPファイル内のファイルのパス
+
+    Returns:
+        dict: 指紋。ファイルが存在しない場合はNone
+    """
+    if member:
+        return _make_member(filepath, member, settings_hash, content_hash)
+
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+
+    fingerprint = {
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "settings": settings_hash
+    }
+    if content_hash:
+        fingerprint["hash"] = file_hash(filepath)
+    return fingerprint
+
+
+def _make_member(zip_path: str, member: str, settings_hash: str, content_hash: bool) -> dict:
+    """ZIPファイル内のファイルの指紋(中央ディレクトリのサイズ・更新日時・CRCから作成し、解凍しない)"""
+    try:
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            info = zip_ref.getinfo(member)
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+
+    fingerprint = {
+        "size": info.file_size,
+        "mtime": "%04d-%02d-%02dT%02d:%02d:%02d" % info.date_time,
+        "crc": info.CRC,
+        "settings": settings_hash
+    }
+    if content_hash:
+        fingerprint["hash"] = file_hash(zip_path, member)
+    return fingerprint
+
+
+def is_reusable(previous: dict, fingerprint: dict) -> bool:
+    """前回の集計結果が再利用できるかどうか(指紋が一致し、エラーになっていない場合のみ)"""
+    if not previous or not fingerprint or "error" in previous:
+        return False
+    return previous.get("fingerprint") == fingerprint
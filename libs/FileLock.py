@@ -0,0 +1,121 @@
+import os, threading
+from contextlib import contextmanager
+
+# ファイルの書き込みを複数のプロセス(GUI・WebUI・StartProcess・集計サービス)・スレッドで順番に行うためのロック。
+# 対象ファイルと同じ場所のロックファイル(xxx.lock)を排他ロックする。ロックファイルは通常は削除しない。
+# 対象が削除される場合(展開キャッシュのエントリなど)はロック中に remove でロックファイルも削除できる。
+# 削除前のロックファイルを開いてロックを待っていたプロセスは、ロックの取得後にロックファイルが置き換わっていることを検知して開き直す。
+
+LOCK_SUFFIX = ".lock"
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(f):
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _try_lock(f):
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _try_lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+# {ロックファイルのパス: スレッド間のロック}
+_thread_locks = {}
+_thread_locks_lock = threading.Lock()
+
+
+def lock_path(path: str) -> str:
+    return os.path.abspath(path) + LOCK_SUFFIX
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_lock:
+        return _thread_locks.setdefault(path, threading.Lock())
+
+
+def _open_locked(path: str, blocking: bool):
+    """ロックファイルを開いてロックする(待たない場合にロックできなければNone)"""
+    while True:
+        f = open(path, "a+")
+        f.seek(0)
+        try:
+            if blocking:
+                _lock(f)
+            else:
+                _try_lock(f)
+        except OSError:
+            f.close()
+            if blocking:
+                raise
+            return None
+        # ロックを待つ間に他のプロセスがロックファイルを削除した場合は、新しいロックファイルで取り直す
+        try:
+            if os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                return f
+        except OSError:
+            pass
+        _unlock(f)
+        f.close()
+
+
+@contextmanager
+def lock(path: str):
+    """ファイルの書き込みを他のプロセス・スレッドと排他する"""
+    path = lock_path(path)
+    with _thread_lock(path):
+        f = _open_locked(path, blocking=True)
+        try:
+            yield
+        finally:
+            _unlock(f)
+            f.close()
+
+
+@contextmanager
+def try_lock(path: str):
+    """
+    ロックを待たずに排他を試みる(他のプロセス・スレッドがロック中の場合は待たずにFalseを返す)
+
+    with try_lock(path) as locked:
+        if locked:
+            ...
+    """
+    path = lock_path(path)
+    thread_lock = _thread_lock(path)
+    if not thread_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        f = _open_locked(path, blocking=False)
+        if f is None:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            _unlock(f)
+            f.close()
+    finally:
+        thread_lock.release()
+
+
+def remove(path: str):
+    """ロックファイルを削除する(対象を削除する場合に、ロック中に呼び出す)"""
+    try:
+        os.remove(lock_path(path))
+    except OSError:
+        # Windowsでは他のプロセスが開いている間は削除できないため、残ったロックファイルは次回以降に削除する
+        pass
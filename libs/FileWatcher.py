@@ -0,0 +1,71 @@
+import os
+import time
+
+# ファイルの変更をポーリングで検知する。
+# 保存中のファイルを読み込まないよう、サイズ・更新日時が debounce 秒間変化しなくなってから変更として通知する。
+# 監視対象のファイルの一覧は rescan_interval 秒ごとに取り直し、ディレクトリに追加・削除されたファイルも検知する。
+
+
+def _stat(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class FileWatcher:
+    def __init__(self, list_files, debounce: float = 3.0, rescan_interval: float = 30.0):
+        """
+        Args:
+            list_files: 監視対象のファイルのパスのリストを返す関数
+            debounce: 変更を通知するまでの待ち時間(秒)。この間にさらに変更された場合は待ち直す
+            rescan_interval: 監視対象のファイルの一覧を取り直す間隔(秒)
+        """
+        self.list_files = list_files
+        self.debounce = debounce
+        self.rescan_interval = rescan_interval
+        self._paths = []
+        self._snapshot = {}  # 通知済みの状態 (パス: (サイズ, 更新日時))
+        self._pending = {}   # 変更を検知して待機中のファイル (パス: ((サイズ, 更新日時), 最後に変化を検知した時刻))
+        self._last_scan = None
+
+    def start(self):
+        """現在の状態を基準として監視を開始する"""
+        self._paths = list(self.list_files())
+        self._snapshot = {path: _stat(path) for path in self._paths}
+        self._pending = {}
+        self._last_scan = time.monotonic()
+
+    def poll(self) -> list:
+        """
+        前回からの変更を確認する
+
+        Returns:
+            list: 変更(追加・更新・削除)が確定したファイルのパスのリスト
+        """
+        now = time.monotonic()
+        if now - self._last_scan >= self.rescan_interval:
+            self._paths = list(self.list_files())
+            self._last_scan = now
+            # 一覧からなくなったファイルは削除として扱う
+            for path in set(self._snapshot) - set(self._paths):
+                del self._snapshot[path]
+                self._pending[path] = (None, now)
+
+        for path in self._paths:
+            stat = _stat(path)
+            if path in self._snapshot and stat == self._snapshot[path]:
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != stat:
+                # 新たな変更を検知したら待ち直す
+                self._pending[path] = (stat, now)
+
+        settled = [path for path, (_, changed_at) in self._pending.items() if now - changed_at >= self.debounce]
+        for path in settled:
+            stat, _ = self._pending.pop(path)
+            if path in self._paths:
+                self._snapshot[path] = stat
+        return settled
@@ -0,0 +1,149 @@
+import io, os, json, gzip, time, tempfile
+from dataclasses import dataclass
+
+from libs import Logger
+
+# プロジェクトファイルのJSONの読み書き。
+#   - format: compact(改行・インデントなし。既定) / pretty(インデントあり)
+#   - compression: none(既定) / gzip / zstd(zstandard がインストールされている場合)
+#   - backend: auto(orjson がインストールされていれば使用) / json(標準ライブラリ) / orjson
+# 読込時は先頭のバイト列から圧縮形式を判定するため、書き込み時の設定によらず従来のインデント付きのファイルも含めて読み込める。
+
+logger = Logger.get_logger(__name__, console=True, file=False, trace_line=False)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ("compact", "pretty")
+COMPRESSIONS = ("none", "gzip", "zstd")
+BACKENDS = ("auto", "json", "orjson")
+
+UTF8_BOM = b"\xef\xbb\xbf"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+REPLACE_RETRIES = 5  # 置き換え先を他のプロセスが開いている場合(Windows)の再試行回数
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    format: str = "compact"
+    compression: str = "none"
+    backend: str = "auto"
+
+    @property
+    def pretty(self) -> bool:
+        return self.format == "pretty"
+
+    def _use_orjson(self) -> bool:
+        return orjson is not None and self.backend in ("auto", "orjson")
+
+    def serialize(self, data) -> bytes:
+        """JSONのバイト列に変換する(圧縮はしない)"""
+        if self._use_orjson():
+            # 文字列以外のキー(日付別の集計の数値キーなど)は標準のjsonと同じく文字列に変換する
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if self.pretty else 0)
+            try:
+                return orjson.dumps(data, option=option)
+            except TypeError:
+                # orjsonが扱えない値(64bitを超える整数など)は標準のjsonで変換する
+                pass
+        if self.pretty:
+            return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def compress(self, raw: bytes) -> bytes:
+        if self.compression == "gzip":
+            return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+        return raw
+
+    def dumps(self, data) -> bytes:
+        """設定の形式・圧縮でバイト列に変換する"""
+        return self.compress(self.serialize(data))
+
+
+def decompress(raw: bytes) -> bytes:
+    """先頭のバイト列から圧縮形式を判定して展開する(圧縮されていない場合はそのまま返す)"""
+    if raw.startswith(GZIP_MAGIC):
+        return gzip.decompress(raw)
+    if raw.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstd形式で圧縮されたファイルの読み込みには zstandard のインストールが必要です。")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return raw
+
+
+def loads(raw: bytes):
+    """バイト列(圧縮されていてもよい)を読み込む"""
+    raw = decompress(raw)
+    if raw.startswith(UTF8_BOM):
+        raw = raw[len(UTF8_BOM):]
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjsonが読み込めない値(標準のjsonが出力するNaN・Infinityなど)は標準のjsonで読み込む
+            pass
+    return json.loads(raw.decode("utf-8"))
+
+
+def read(path: str):
+    """JSONファイル(圧縮されていてもよい)を読み込む"""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def open_text(path: str):
+    """JSONファイルをテキストとして先頭から順に読み込むためのファイルオブジェクトを開く(圧縮されている場合は展開しながら読む)"""
+    f = open(path, "rb")
+    magic = f.read(len(ZSTD_MAGIC))
+    f.seek(0)
+    if magic.startswith(GZIP_MAGIC):
+        return io.TextIOWrapper(gzip.GzipFile(fileobj=f), encoding="utf-8")
+    if magic.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            f.close()
+            raise RuntimeError("zstd形式で圧縮されたファイルの読み込みには zstandard のインストールが必要です。")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(f, closefd=True), encoding="utf-8")
+    return io.TextIOWrapper(f, encoding="utf-8-sig")
+
+
+def write_bytes(path: str, raw: bytes):
+    """一時ファイルに書き出してから置き換える(書き込み途中のファイルを他のプロセスが読まないようにする)"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(temp_path, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(0.1 * (attempt + 1))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def from_settings(settings: dict) -> JsonCodec:
+    option = settings["project_file"]
+    compression = option["compression"]
+    if compression == "zstd" and zstandard is None:
+        logger.warning("zstandard がインストールされていないため、gzip形式で圧縮します。")
+        compression = "gzip"
+    if option["backend"] == "orjson" and orjson is None:
+        logger.warning("orjson がインストールされていないため、標準ライブラリのjsonを使用します。")
+    return JsonCodec(format=option["format"], compression=compression, backend=option["backend"])
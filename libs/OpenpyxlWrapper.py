@@ -1,11 +1,48 @@
 from openpyxl import load_workbook, Workbook
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
 from openpyxl.utils import column_index_from_string
 from datetime import datetime
+from libs import XlsxXmlReader
 
-def load(file_path:str, auto_create:bool=False):
-    # ブックを開く
+# 読込バックエンド
+BACKEND_OPENPYXL = "openpyxl"  # openpyxlで読み込む
+BACKEND_XML = "xml"            # xlsxのXMLを直接読み込む(値の読込専用)
+
+class _SelectedSheetsReader(ExcelReader):
+    """指定されたシートのみを解析するExcelReader(通常モード用)"""
+
+    def __init__(self, filename, sheet_filter, read_only=False):
+        super().__init__(filename, read_only=read_only)
+        self.sheet_filter = sheet_filter
+
+    def read_worksheets(self):
+        # シート一覧(workbook.xml)の段階で対象外のシートを除外し、中身を解析しない
+        find_sheets = self.parser.find_sheets
+        self.parser.find_sheets = lambda: (
+            (sheet, rel) for sheet, rel in find_sheets() if self.sheet_filter(sheet.name)
+        )
+        super().read_worksheets()
+
+def load(file_path:str, auto_create:bool=False, read_only:bool=False, backend:str=BACKEND_OPENPYXL, sheet_keywords:list=None, sheet_ignores:list=None):
+    # ブックを開く（read_only=Trueの場合は読み取り専用のストリーミングモード）
+    # sheet_keywordsを指定した場合は、シート名が条件に合うシートのみを読み込む
     try:
-        wb = load_workbook(file_path)
+        if backend == BACKEND_XML:
+            # XMLを直接読み込む軽量リーダー(セル・スタイルのオブジェクトを構築しない)
+            # シートの中身は参照されるまで解析しないため、対象外のシートは読み込まれない
+            wb = XlsxXmlReader.load_workbook(file_path)
+        elif read_only or not sheet_keywords:
+            # 読み取り専用モードもシートの中身は参照時に読み込まれる
+            wb = load_workbook(file_path, read_only=read_only)
+        else:
+            # 通常モードは読込時に全シートを解析するため、対象シートに絞ってから解析する
+            reader = _SelectedSheetsReader(
+                file_path,
+                sheet_filter=lambda sheet_name: _should_include_sheet(sheet_name, sheet_keywords, sheet_ignores or []),
+            )
+            reader.read()
+            wb = reader.wb
     except FileNotFoundError:
         # ファイルが存在しない場合、新規作成
         if auto_create:
@@ -16,6 +53,10 @@ def load(file_path:str, auto_create:bool=False):
         raise PermissionError(f"Error: '{file_path}' は他のプログラムによって開かれています。")
     return wb
 
+def close(workbook):
+    # 読み取り専用モードで開いたブックはファイルハンドルを保持しているため明示的に閉じる
+    workbook.close()
+
 def create_sheet(workbook, sheet_name:str, overwrite:bool=False):
     # 既存のデータシートがあれば削除
     if overwrite and sheet_name in workbook.sheetnames:
@@ -25,7 +66,19 @@ def create_sheet(workbook, sheet_name:str, overwrite:bool=False):
 
 
 def get_sheet_by_name(workbook, sheet_name:str):
-    return workbook[sheet_name]
+    sheet = workbook[sheet_name]
+    # 読み取り専用モードの最終行・最終列はシートの<dimension>の値で、作成したツールによっては実際の範囲と異なる(例: A1のみ)ため使用しない
+    # (行の走査はシートの末尾まで行い、空行が続いた時点で打ち切る)
+    # (<dimension>の最終行はシート上の最終行の表示用に残す)
+    if isinstance(sheet, ReadOnlyWorksheet) and not hasattr(sheet, "dimension_max_row"):
+        sheet.dimension_max_row = sheet.max_row
+        sheet.reset_dimensions()
+    return sheet
+
+
+def get_max_row(sheet, last_row: int = 0) -> int:
+    """シート上の最終行(読み取り専用モードでは<dimension>の最終行と値が入っている最終行の大きい方)"""
+    return max(sheet.max_row or getattr(sheet, "dimension_max_row", None) or 0, last_row)
 
 
 def get_sheetnames_by_keyword(workbook, keyword:str):
@@ -79,42 +132,141 @@ def _should_include_sheet(sheet_name: str, keywords: list, ignores: list) -> boo
 
 def find_row(sheet, search_col:str, search_str:str):
     try:
-        # 列名
-        col_num = column_index_from_string(search_col) - 1
-
-        # 指定列をループして値を確認
-        for row in sheet.iter_rows(min_col=1, max_col=1):
-            cell = row[col_num]  # 指定列のセル
-            if cell.value == search_str:  # 値が search_str のセル
-                return cell.row
+        # 列番号
+        col_num = column_index_from_string(search_col)
+
+        # 指定列を1行目から順に走査して値を確認
+        for row_num, row in enumerate(sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=col_num, max_col=col_num, values_only=True), start=1):
+            if row and row[0] == search_str:  # 値が search_str のセル
+                return row_num
         return None
     except Exception as e:
         print(f"Error: {e}")
 
 
+def find_row_values(sheet, search_col:str, search_str:str, max_row:int=None):
+    """指定列の値が search_str の行を上から探し、行番号と行全体の値をまとめて取得する
+
+    行を探す走査でそのまま行の値も取り出すため、find_row → get_row_values のように
+    シートを2回走査しない。max_row を指定した場合はその行までしか探さない（0/Noneはシートの最終行まで）。
+
+    Returns:
+        tuple: (行番号, 行の値のリスト)。見つからない場合は (None, [])
+    """
+    try:
+        # 列番号
+        col_num = column_index_from_string(search_col)
+
+        # 探索範囲(シートの最終行を超える範囲は走査しない)
+        if not max_row or (sheet.max_row is not None and sheet.max_row < max_row):
+            max_row = sheet.max_row
+
+        for row_num, row in enumerate(sheet.iter_rows(min_row=1, max_row=max_row, values_only=True), start=1):
+            if len(row) >= col_num and row[col_num - 1] == search_str:  # 値が search_str のセル
+                return row_num, list(row)
+        return None, []
+    except Exception as e:
+        print(f"Error: {e}")
+        return None, []
+
+
 def get_row_values(sheet, row_num:int):
-    return [cell.value for cell in sheet[row_num]]
+    for row in sheet.iter_rows(min_row=row_num, max_row=row_num, values_only=True):
+        return list(row)
+    return []
 
 
-def get_column_values(sheet, col_nums: list, header_row: int = 1, ignore_header=False):
+def _iter_column_values(sheet, col_nums: list, min_row: int):
+    """指定列の値を1行ずつ取得する
+
+    ランダムアクセス(sheet.cell)は読み取り専用モードでは都度XMLを解析し直すため、
+    iter_rowsで行単位に読み進めて必要な列の値だけを取り出す。
+    """
+    min_col = min(col_nums, default=1)
+    max_col = max(col_nums, default=1)
+    offsets = [col_num - min_col for col_num in col_nums]
+    for row in sheet.iter_rows(min_row=min_row, max_row=sheet.max_row, min_col=min_col, max_col=max_col, values_only=True):
+        yield [row[offset] for offset in offsets]
+
+
+def get_multiple_columns_data(sheet, col_sets: list, header_row: int = 1, ignore_header=False, convert_dates: list = None, empty_row_limit: int = 0):
+    """複数の列セットのデータを1回の行走査でまとめて取得する
+
+    Args:
+        sheet: 対象のシート
+        col_sets: 列番号リストのリスト（例: [[15, 16, 17], [18], [12]]）
+        header_row: ヘッダ行の行番号
+        ignore_header: ヘッダ行を除外するかどうか
+        convert_dates: セットごとに日付を'%Y-%m-%d'形式の文字列に変換するかどうか（デフォルト: 全セット変換）
+        empty_row_limit: 全列が空の行がこの行数だけ連続したら走査を打ち切る（0の場合はシートの最終行まで走査）
+
+    Returns:
+        list: col_setsと同じ順序で、各セットの行データ(行ごとの値のリスト)を格納したリスト
+    """
     if ignore_header:
         header_row += 1
-    return [[sheet.cell(row=i, column=col_num).value for col_num in col_nums] for i in range(header_row, sheet.max_row + 1)]
+    if convert_dates is None:
+        convert_dates = [True] * len(col_sets)
 
+    # 全セットの列をまとめて1回だけ走査する
+    all_cols = [col_num for col_nums in col_sets for col_num in col_nums]
+    results = [[] for _ in col_sets]
+    empty_rows = 0  # 連続する空行の数
+    for values in _iter_column_values(sheet, all_cols, header_row):
+        # 書式だけが設定された空行が続く場合はデータの終端とみなして打ち切る
+        if empty_row_limit:
+            if any(value is not None for value in values):
+                empty_rows = 0
+            else:
+                empty_rows += 1
+                if empty_rows >= empty_row_limit:
+                    break
+        pos = 0
+        for set_index, col_nums in enumerate(col_sets):
+            row = values[pos:pos + len(col_nums)]
+            pos += len(col_nums)
+            if convert_dates[set_index]:
+                row = [value.strftime('%Y-%m-%d') if isinstance(value, datetime) else value for value in row]
+            results[set_index].append(row)
+    return results
 
-def get_columns_data(sheet, col_nums: list, header_row: int = 1, ignore_header=False):
+
+def get_last_data_row(columns_data: list, header_row: int = 1, ignore_header=False) -> int:
+    """get_multiple_columns_dataで取得したデータから、値が入っている最終行の行番号を取得する
+
+    値が1つもない場合はヘッダ行の行番号を返す。
+    """
     if ignore_header:
         header_row += 1
-    data = [[cell.value.strftime('%Y-%m-%d') if isinstance(cell.value, datetime) else cell.value 
-             for col_num in col_nums 
-             for cell in [sheet.cell(row=i, column=col_num)]] 
-            for i in range(header_row, sheet.max_row + 1)]
-    return data
+    last_index = -1
+    for set_data in columns_data:
+        for index in range(len(set_data) - 1, last_index, -1):
+            if any(value is not None for value in set_data[index]):
+                last_index = index
+                break
+    return header_row + last_index
 
-def get_cell_value(sheet, col:int, row:int, replace_newline=False):
-    value = sheet.cell(row=row, column=col).value
+
+def get_column_values(sheet, col_nums: list, header_row: int = 1, ignore_header=False):
+    return get_multiple_columns_data(sheet, [col_nums], header_row=header_row, ignore_header=ignore_header, convert_dates=[False])[0]
+
+
+def get_columns_data(sheet, col_nums: list, header_row: int = 1, ignore_header=False):
+    return get_multiple_columns_data(sheet, [col_nums], header_row=header_row, ignore_header=ignore_header)[0]
+
+def _format_cell_value(value, replace_newline=False):
     if replace_newline:
         if value and isinstance(value, str):  # 値が文字列の場合のみ変換
             return value.replace("\n", "_")
     else:
         return value
+
+def get_cell_value(sheet, col:int, row:int, replace_newline=False):
+    return get_cell_values(sheet, cols=[col], row=row, replace_newline=replace_newline)[0]
+
+def get_cell_values(sheet, cols:list, row:int, replace_newline=False):
+    # 同じ行の複数セルを1回の読込で取得する
+    values = [None] * len(cols)
+    for values in _iter_column_values(sheet, cols, row):
+        break
+    return [_format_cell_value(value, replace_newline) for value in values]
@@ -1,44 +1,293 @@
+import re
 import json
 import os
-from libs import Utility, DataConversion
+from libs import Utility, AppConfig, DataConversion, ResultStore, ColumnarData, JsonCodec, FileLock
 
-def save_to_json(file_path: str, input_data: list, all_data: dict = None, project_data: dict = None) -> None:
+HEADER_CHUNK_SIZE = 64 * 1024  # プロジェクト設定のみを読み込む場合の読込単位
+
+def save_to_json(file_path: str, input_data: list, all_data: dict = None, project_data: dict = None, use_store: bool = None, columnar: bool = None, codec: JsonCodec.JsonCodec = None) -> None:
     """プロジェクトデータをJSONファイルに保存する
 
     Args:
         file_path (str): 保存先のJSONファイルパス
-        input_data (list): 集計データ
+        input_data (list): 集計データ。Noneの場合は保存済みの集計データ(JSONファイル・ストア)をそのまま残し、プロジェクト設定データのみを保存する
         project_data (dict, optional): プロジェクト設定データ。
             指定されていない場合は、file_pathのJSONファイルから読み込む。
             JSONファイルが存在しない場合は空の辞書を使用。
+        use_store (bool, optional): 集計データをSQLiteのストア(libs/ResultStore.py)に保存するかどうか。
+            Trueの場合はJSONファイルにはプロジェクト設定データのみを保存する。
+            Falseの場合は集計データもJSONファイルに保存し、ストアがあれば削除する。
+            指定されていない場合は、ストアがあればストアに保存する。
+        columnar (bool, optional): JSONファイルに保存する集計データを列指向の形式(libs/ColumnarData.py)にするかどうか。
+            指定されていない場合は、既存のJSONファイルの集計データの形式に合わせる。
+        codec (JsonCodec.JsonCodec, optional): JSONファイルの形式・圧縮(libs/JsonCodec.py)。
+            指定されていない場合は、設定(project_file)に従う。
 
     Raises:
         Exception: ファイルの保存に失敗した場合
     """
     try:
-        # 既存のJSONファイルがある場合は読み込む
-        existing_data = {}
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
+        # 他のプロセスの書き込み(ファイルごとの更新など)と排他する
+        with FileLock.lock(file_path):
+            # 既存のJSONファイルがある場合は読み込む
+            existing_data = {}
+            if os.path.exists(file_path):
+                existing_data = read_json(file_path)
                 # project_dataが指定されていない場合は、既存のデータを使用
                 if project_data is None:
                     project_data = existing_data.get("project", {})
-        elif project_data is None:
-            # ファイルが存在せず、project_dataも指定されていない場合は空の辞書を使用
-            project_data = {}
+            elif project_data is None:
+                # ファイルが存在せず、project_dataも指定されていない場合は空の辞書を使用
+                project_data = {}
         
-        # projectキーにproject_dataを保存
-        existing_data["project"] = project_data
-        # 最終読込日時を保存（最も遅い日時を使用）
-        existing_data["project"]["last_loaded"] = Utility.get_latest_time(input_data)
+            # projectキーにproject_dataを保存(先頭に置き、集計データを読まずにプロジェクト設定のみを読み込めるようにする)
+            existing_data = {"project": project_data, **{key: value for key, value in existing_data.items() if key != "project"}}
+            if input_data is None:
+                # プロジェクト設定データのみを保存(集計データは読み込んだ内容のまま書き戻す)
+                write_json(file_path, existing_data, codec)
+                return
+
+            # 最終読込日時を保存（最も遅い日時を使用）
+            existing_data["project"]["last_loaded"] = Utility.get_latest_time(input_data)
 
-        # gathered_dataキーに現在のinput_dataを保存
-        existing_data["gathered_data"] = input_data
+            if use_store is None:
+                use_store = ResultStore.exists(file_path)
+            if use_store:
+                # 集計データはストアに保存し、JSONファイルにはプロジェクト設定データのみを保存
+                with ResultStore.open_store(file_path) as store:
+                    store.replace(input_data)
+                existing_data.pop("gathered_data", None)
+            else:
+                if columnar is None:
+                    columnar = ColumnarData.is_encoded(existing_data.get("gathered_data"))
+                # gathered_dataキーに現在のinput_dataを保存
+                existing_data["gathered_data"] = ColumnarData.encode(input_data) if columnar else input_data
 
-        # JSONファイルに保存
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=2)
+            # JSONファイルに保存
+            write_json(file_path, existing_data, codec)
+
+            if not use_store:
+                ResultStore.remove(file_path)
             
     except Exception as e:
-        raise Exception(f"データの保存に失敗しました。\n{str(e)}") 
\ No newline at end of file
+        raise Exception(f"データの保存に失敗しました。\n{str(e)}") 
+
+def merge_results(gathered_data: list, results: list, remove_filepaths: list = None) -> list:
+    """集計データの同じファイルパスの集計結果を置き換える(該当する集計結果がないファイルは末尾に追加する)
+
+    Args:
+        gathered_data (list): 集計データ
+        results (list): 置き換える集計結果のリスト
+        remove_filepaths (list, optional): 集計データから削除するファイルパス
+
+    Returns:
+        list: 置き換えた集計データ(gathered_dataは変更しない)
+    """
+    remove_filepaths = set(remove_filepaths or [])
+    by_path = {result.get("filepath"): result for result in results}
+    merged = [
+        by_path.pop(data.get("filepath"), data) for data in gathered_data
+        if data.get("filepath") not in remove_filepaths
+    ]
+    merged.extend(by_path.values())
+    return merged
+
+def update_results(file_path: str, results: list, remove_filepaths: list = None, use_store: bool = None, columnar: bool = None, codec: JsonCodec.JsonCodec = None) -> None:
+    """プロジェクトの集計データのうち、指定したファイルの集計結果のみを置き換える
+
+    同じファイルパスの集計結果を置き換え(なければ末尾に追加し)、他のファイルの集計結果はそのまま残す。
+    監視モード・並列集計・差分集計で、集計が終わったファイルから順に反映するために使用する。
+    他のプロセスの書き込みとはロックファイルで排他し、ストアはファイルをまとめて1つのトランザクションで、
+    JSONファイルは一時ファイルに書き出してから置き換えるため、読み込む側は常に更新前か更新後の完全なデータを読み込む。
+
+    Args:
+        file_path (str): プロジェクトファイルのパス
+        results (list): 置き換える集計結果のリスト
+        remove_filepaths (list, optional): 集計データから削除するファイルパス
+        use_store (bool, optional): 集計データをストアに保存するかどうか(save_to_jsonと同じ)
+        columnar (bool, optional): JSONファイルに保存する集計データを列指向の形式にするかどうか(save_to_jsonと同じ)
+        codec (JsonCodec.JsonCodec, optional): JSONファイルの形式・圧縮(save_to_jsonと同じ)
+
+    Raises:
+        Exception: ファイルの保存に失敗した場合
+    """
+    try:
+        with FileLock.lock(file_path):
+            json_data = read_json(file_path) if os.path.exists(file_path) else {}
+            json_data = {"project": json_data.get("project", {}), **{key: value for key, value in json_data.items() if key != "project"}}
+            # 最終読込日時は更新したファイルの日時が遅ければ更新する
+            last_loaded = Utility.get_latest_time([json_data["project"], *results])
+            if last_loaded:
+                json_data["project"]["last_loaded"] = last_loaded
+
+            if use_store is None:
+                use_store = ResultStore.exists(file_path)
+            if use_store:
+                with ResultStore.open_store(file_path) as store:
+                    if "gathered_data" in json_data:
+                        # JSONファイルの集計データをストアに移行
+                        store.replace(merge_results(ColumnarData.decode(json_data.pop("gathered_data")), results, remove_filepaths))
+                    else:
+                        store.update(results, remove_filepaths)
+            else:
+                if columnar is None:
+                    columnar = ColumnarData.is_encoded(json_data.get("gathered_data"))
+                gathered_data = merge_results(load_gathered_data(file_path, json_data), results, remove_filepaths)
+                json_data["gathered_data"] = ColumnarData.encode(gathered_data) if columnar else gathered_data
+
+            # ストアの集計データのみを更新した場合もJSONファイルを保存し直す(画面側で更新を検知できるようにする)
+            write_json(file_path, json_data, codec)
+
+            if not use_store:
+                ResultStore.remove(file_path)
+
+    except Exception as e:
+        raise Exception(f"データの保存に失敗しました。\n{str(e)}")
+
+def dumps_json(data: dict) -> str:
+    """プロジェクトファイルの内容をJSON文字列に変換する
+
+    列指向の形式の集計データは1行で出力する(行列の要素ごとに改行するとサイズが大きくなるため)。
+    """
+    if not ColumnarData.is_encoded(data.get("gathered_data")):
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    data = dict(data)
+    gathered_data = data.pop("gathered_data")
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    gathered_json = json.dumps(gathered_data, ensure_ascii=False, separators=(",", ":"))
+    return f'{text[:-2]},\n  "gathered_data": {gathered_json}\n}}' if data else f'{{\n  "gathered_data": {gathered_json}\n}}'
+
+def default_codec() -> JsonCodec.JsonCodec:
+    """設定(project_file)に従ったプロジェクトファイルの形式・圧縮"""
+    return JsonCodec.from_settings(AppConfig.load_settings())
+
+def encode_json(data: dict, codec: JsonCodec.JsonCodec = None) -> bytes:
+    """プロジェクトファイルの内容を保存するバイト列に変換する
+
+    インデントありの形式(pretty)で列指向の形式の集計データを含む場合は dumps_json と同じ形式で出力する。
+    """
+    codec = codec or default_codec()
+    if codec.pretty and ColumnarData.is_encoded(data.get("gathered_data")):
+        return codec.compress(dumps_json(data).encode("utf-8"))
+    return codec.dumps(data)
+
+def write_json(file_path: str, data: dict, codec: JsonCodec.JsonCodec = None) -> None:
+    """プロジェクトファイルを保存する(一時ファイルに書き出してから置き換える)"""
+    JsonCodec.write_bytes(file_path, encode_json(data, codec))
+
+def read_json(file_path: str) -> dict:
+    """プロジェクトファイルを読み込む(形式・圧縮は自動で判定する。集計データがストアにある場合も読み込まない)"""
+    return JsonCodec.read(file_path)
+
+def load_gathered_data(file_path: str, json_data: dict) -> list:
+    """プロジェクトの集計データを取得する
+
+    JSONファイルに集計データ(gathered_data)があればそれを使用し、なければストアから読み込む。
+
+    Args:
+        file_path (str): プロジェクトファイルのパス
+        json_data (dict): 読み込んだプロジェクトファイルの内容
+
+    Returns:
+        list: 集計データ(集計データがない場合は空のリスト)
+    """
+    if "gathered_data" in json_data:
+        return ColumnarData.decode(json_data["gathered_data"])
+    if ResultStore.exists(file_path):
+        with ResultStore.open_store(file_path) as store:
+            return store.load()
+    return []
+
+def load_from_json(file_path: str) -> dict:
+    """プロジェクトファイルを読み込む(集計データがストアにある場合はgathered_dataに読み込む)
+
+    Args:
+        file_path (str): プロジェクトファイルのパス
+
+    Returns:
+        dict: プロジェクトファイルの内容(project・gathered_data)
+    """
+    json_data = read_json(file_path)
+    if "gathered_data" in json_data or ResultStore.exists(file_path):
+        json_data["gathered_data"] = load_gathered_data(file_path, json_data)
+    return json_data
+
+def _parse_header(text: str):
+    """JSON文字列の先頭からprojectキーの値を解析する(projectより前に他のキーがある・文字列が途中までの場合はNone)"""
+    decoder = json.JSONDecoder()
+    pattern = re.compile(r'\s*\{\s*"project"\s*:\s*')
+    match = pattern.match(text)
+    if not match:
+        return None
+    try:
+        header, _ = decoder.raw_decode(text, match.end())
+    except ValueError:
+        return None
+    return header
+
+def load_header(file_path: str) -> dict:
+    """プロジェクトファイルのプロジェクト設定(project)のみを読み込む
+
+    ファイルの先頭から少しずつ読み込み、projectの値を解析できた時点で読込を終了する(集計データは読み込まない)。
+    projectが先頭にない形式のファイルはファイル全体を読み込む。圧縮されたファイルは展開しながら読み込む。
+
+    Args:
+        file_path (str): プロジェクトファイルのパス
+
+    Returns:
+        dict: プロジェクト設定
+    """
+    with JsonCodec.open_text(file_path) as f:
+        text = ""
+        while True:
+            chunk = f.read(HEADER_CHUNK_SIZE)
+            text += chunk
+            header = _parse_header(text)
+            if header is not None:
+                return header
+            if not chunk:
+                break
+    return json.loads(text).get("project", {})
+
+def _strip_counts(result: dict) -> dict:
+    return {key: value for key, value in result.items() if key not in ResultStore.COUNT_KEYS}
+
+def load_summary(file_path: str) -> dict:
+    """プロジェクトの概要(全体集計の表示に必要なデータ)を読み込む
+
+    集計データがストアにある場合は、ファイルごとの日付別・環境別・担当者別の件数を読み込まずに、
+    ファイル一覧(件数を除く集計結果)と全ファイルの日付別の件数の合計のみを取得する。
+
+    Args:
+        file_path (str): プロジェクトファイルのパス
+
+    Returns:
+        dict: project(プロジェクト設定)・gathered_data(件数を除く集計結果のリスト)・summary(daily: 全ファイルの日付別の件数の合計)
+    """
+    # 集計データがストアにある場合、プロジェクトファイルはプロジェクト設定のみの小さなファイル
+    json_data = read_json(file_path)
+    if "gathered_data" not in json_data and ResultStore.exists(file_path):
+        with ResultStore.open_store(file_path) as store:
+            json_data["gathered_data"] = store.files()
+            json_data["summary"] = {"daily": store.daily()}
+        return json_data
+    gathered_data = load_gathered_data(file_path, json_data)
+    json_data["gathered_data"] = [_strip_counts(result) for result in gathered_data]
+    json_data["summary"] = {"daily": DataConversion.aggregate_all_daily(gathered_data)}
+    return json_data
+
+def load_file_results(file_path: str, selector_labels: list) -> list:
+    """指定したファイル(選択用ラベル)の集計結果のみを読み込む
+
+    Args:
+        file_path (str): プロジェクトファイルのパス
+        selector_labels (list): 読み込むファイルの選択用ラベル
+
+    Returns:
+        list: 集計結果のリスト
+    """
+    json_data = read_json(file_path)
+    if "gathered_data" not in json_data and ResultStore.exists(file_path):
+        with ResultStore.open_store(file_path) as store:
+            return store.load(selector_labels=selector_labels)
+    return [result for result in load_gathered_data(file_path, json_data) if result.get("selector_label") in selector_labels]
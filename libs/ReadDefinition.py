@@ -0,0 +1,130 @@
+import re
+import json
+import hashlib
+from dataclasses import dataclass
+
+# 集計処理で参照する設定(read_definition / read_option / test_status)を、
+# 実行ごとに1回だけ解釈して不変オブジェクトにまとめる。
+# シートや行ごとに設定の辞書を引き直したり、キーワードのリストを走査し直したりしないようにする。
+
+
+@dataclass(frozen=True)
+class KeywordMatcher:
+    """ヘッダのセル値がキーワードのいずれかを含むか判定する(Utility.find_colnum_by_keywords と同じ判定)"""
+    keywords: tuple = ()
+    pattern: re.Pattern = None         # キーワードを連結した正規表現(キーワードなしの場合はNone)
+    ignores: frozenset = frozenset()  # 完全一致で除外する語
+
+    @classmethod
+    def from_keywords(cls, keywords: list, ignores: list = None):
+        pattern = re.compile("|".join(re.escape(keyword) for keyword in keywords)) if keywords else None
+        return cls(keywords=tuple(keywords), pattern=pattern, ignores=frozenset(ignores or []))
+
+    def match(self, item) -> bool:
+        if not item or self.pattern is None:
+            return False
+        text = str(item)
+        return self.pattern.search(text) is not None and text not in self.ignores
+
+    def find_colnums(self, header: list) -> list:
+        """キーワードに一致する列番号(1始まり)のリストを取得する"""
+        return [i + 1 for i, item in enumerate(header) if self.match(item)]
+
+
+@dataclass(frozen=True)
+class ReadDefinition:
+    """読み込み定義(read_definition)"""
+    sheet_search_keys: tuple
+    sheet_search_ignores: tuple
+    header_search_col: str
+    header_search_key: str
+    header_max_search_row: int
+    tobe: KeywordMatcher
+    result: KeywordMatcher
+    person: KeywordMatcher
+    date: KeywordMatcher
+    plan: KeywordMatcher
+    excluded: frozenset
+
+
+@dataclass(frozen=True)
+class ReadOption:
+    """読込オプション(read_option)"""
+    read_only: bool
+    backend: str
+    empty_row_limit: int
+
+
+@dataclass(frozen=True)
+class TestStatus:
+    """テストステータス(test_status)と実施状況の名称"""
+    results: tuple               # 結果タイプ(集計結果のキーの並び順)
+    result_set: frozenset        # 結果タイプ(判定用)
+    completed_results: frozenset
+    executed_results: frozenset
+    completed_label: str
+    executed_label: str
+    planned_label: str
+    not_started_name: str
+    in_progress_name: str
+    completed_name: str
+
+
+@dataclass(frozen=True)
+class AggregateDefinition:
+    """集計処理で使用する設定一式"""
+    read_definition: ReadDefinition
+    read_option: ReadOption
+    test_status: TestStatus
+    settings_hash: str = ""  # 集計結果に影響する設定のハッシュ(前回の集計結果を再利用できるかの判定に使用)
+
+
+def from_settings(settings: dict) -> AggregateDefinition:
+    """設定(AppConfig.load_settingsの戻り値)から集計用の設定オブジェクトを作成する"""
+    read_definition = settings["read_definition"]
+    read_option = settings["read_option"]
+    test_status = settings["test_status"]
+    state = settings["app"]["state"]
+
+    # 集計結果に影響する設定のみを対象にハッシュを作成(読込方式や並列数は結果に影響しないため含めない)
+    hash_source = {
+        "read_definition": read_definition,
+        "test_status": test_status,
+        "state": {key: value["name"] for key, value in state.items()},
+        "empty_row_limit": read_option["empty_row_limit"],
+    }
+    settings_hash = hashlib.sha256(json.dumps(hash_source, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+    return AggregateDefinition(
+        read_definition=ReadDefinition(
+            sheet_search_keys=tuple(read_definition["sheet_search_keys"]),
+            sheet_search_ignores=tuple(read_definition["sheet_search_ignores"]),
+            header_search_col=read_definition["header"]["search_col"],
+            header_search_key=read_definition["header"]["search_key"],
+            header_max_search_row=read_definition["header"]["max_search_row"],
+            tobe=KeywordMatcher.from_keywords(read_definition["tobe_row"]["keys"]),
+            result=KeywordMatcher.from_keywords(read_definition["result_row"]["keys"], ignores=read_definition["result_row"]["ignores"]),
+            person=KeywordMatcher.from_keywords(read_definition["person_row"]["keys"]),
+            date=KeywordMatcher.from_keywords(read_definition["date_row"]["keys"]),
+            plan=KeywordMatcher.from_keywords(read_definition["plan_row"]["keys"]),
+            excluded=frozenset(read_definition["excluded"]),
+        ),
+        read_option=ReadOption(
+            read_only=read_option["read_only"],
+            backend=read_option["backend"],
+            empty_row_limit=read_option["empty_row_limit"],
+        ),
+        test_status=TestStatus(
+            results=tuple(test_status["results"]),
+            result_set=frozenset(test_status["results"]),
+            completed_results=frozenset(test_status["completed_results"]),
+            executed_results=frozenset(test_status["executed_results"]),
+            completed_label=test_status["labels"]["completed"],
+            executed_label=test_status["labels"]["executed"],
+            planned_label=test_status["labels"]["planned"],
+            not_started_name=state["not_started"]["name"],
+            in_progress_name=state["in_progress"]["name"],
+            completed_name=state["completed"]["name"],
+        ),
+        settings_hash=settings_hash,
+    )
@@ -0,0 +1,335 @@
+import os
+import json
+import sqlite3
+
+from libs import ColumnarData, JsonCodec
+
+# プロジェクトの集計データ(gathered_data)をSQLiteに保存する。
+# プロジェクトファイル(xxx.json)と同じ場所に xxx.db を作成し、ファイルごとの集計結果(files)と
+# 日付別・環境別・担当者別の件数(daily / env_daily / person_daily)を正規化したテーブルに分けて保存する。
+# 件数のテーブルはファイル・日付・環境・担当者で索引を作成しているため、全データを読み込まずに一部のファイル・期間だけを取得・合計できる。
+# ファイルごとの保存(upsert)はトランザクションで行い、途中で失敗しても他のファイルの集計結果は壊れない。
+# 環境名はファイルごとに files.envs にも保存し、日付のある件数がない環境も読み込み時に復元する。
+
+SCHEMA_VERSION = 2
+DB_EXT = ".db"
+
+# 件数のテーブルに分けて保存する集計結果のキー
+COUNT_KEYS = ("daily", "by_env", "by_name")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    filepath TEXT,
+    selector_label TEXT,
+    file TEXT,
+    identifier TEXT,
+    source TEXT,
+    last_loaded TEXT,
+    last_updated TEXT,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL,
+    envs TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_filepath ON files(filepath);
+CREATE INDEX IF NOT EXISTS idx_files_selector_label ON files(selector_label);
+CREATE TABLE IF NOT EXISTS daily (
+    file_id INTEGER NOT NULL REFERENCES files(file_id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_daily_file ON daily(file_id);
+CREATE INDEX IF NOT EXISTS idx_daily_date ON daily(date);
+CREATE TABLE IF NOT EXISTS env_daily (
+    file_id INTEGER NOT NULL REFERENCES files(file_id) ON DELETE CASCADE,
+    env TEXT NOT NULL,
+    date TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_env_daily_file ON env_daily(file_id);
+CREATE INDEX IF NOT EXISTS idx_env_daily_env ON env_daily(env, date);
+CREATE INDEX IF NOT EXISTS idx_env_daily_date ON env_daily(date);
+CREATE TABLE IF NOT EXISTS person_daily (
+    file_id INTEGER NOT NULL REFERENCES files(file_id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    person TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_person_daily_file ON person_daily(file_id);
+CREATE INDEX IF NOT EXISTS idx_person_daily_person ON person_daily(person, date);
+CREATE INDEX IF NOT EXISTS idx_person_daily_date ON person_daily(date);
+"""
+
+
+def store_path(project_path: str) -> str:
+    """プロジェクトファイルの集計データの保存先(プロジェクトファイルと同じ場所の .db ファイル)"""
+    return os.path.splitext(project_path)[0] + DB_EXT
+
+
+def exists(project_path: str) -> bool:
+    return os.path.isfile(store_path(project_path))
+
+
+def remove(project_path: str):
+    """集計データの保存先を削除する(集計データをプロジェクトファイルに保存する設定に戻した場合)"""
+    path = store_path(project_path)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _status(result: dict) -> str:
+    if "error" in result:
+        return "error"
+    if "warning" in result:
+        return "warning"
+    return "ok"
+
+
+def _in_clause(column: str, values) -> tuple[str, list]:
+    values = list(values)
+    return f"{column} IN ({','.join('?' * len(values))})", values
+
+
+class ResultStore:
+    """
+    プロジェクトの集計データのSQLiteストア
+
+    集計結果の読み込み(load)は保存した集計結果(dict)と同じ内容・キーの順序で返す。
+    日付別・環境別・担当者別の件数は、ファイル・期間などで絞り込んで合計した値を直接取得できる(daily / by_env / by_name)。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        # 集計中(書き込み中)も画面から読み込めるようにする
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self._migrate()
+            self.conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+
+    def _migrate(self):
+        """以前のバージョンのスキーマで作成したストアを更新する"""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(files)")}
+        if "envs" not in columns:
+            # バージョン1: 環境名の列がない(既存の集計結果は日付のある件数がある環境のみ復元される)
+            self.conn.execute("ALTER TABLE files ADD COLUMN envs TEXT")
+            self.conn.execute("UPDATE meta SET value = ? WHERE key = 'schema_version'", (str(SCHEMA_VERSION),))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # ---- 保存 ----
+
+    def _insert(self, result: dict, position: int, file_id: int = None) -> int:
+        # 件数以外の集計結果はJSONで保存する(件数のキーは順序を保つためNoneとして残す)
+        data = {key: (None if key in COUNT_KEYS else value) for key, value in result.items()}
+        # 環境名は件数の有無によらず保存する(日付のある件数がない環境も復元するため)
+        envs = list(result["by_env"]) if result.get("by_env") else None
+        cursor = self.conn.execute(
+            "INSERT INTO files(file_id, position, filepath, selector_label, file, identifier, source, last_loaded, last_updated, status, data, envs)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (file_id, position, result.get("filepath"), result.get("selector_label"), result.get("file"), result.get("identifier"),
+             result.get("source"), result.get("last_loaded"), result.get("last_updated"), _status(result),
+             json.dumps(data, ensure_ascii=False), json.dumps(envs, ensure_ascii=False) if envs is not None else None)
+        )
+        file_id = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT INTO daily(file_id, date, key, count) VALUES (?, ?, ?, ?)",
+            ((file_id, date, key, count) for date, values in (result.get("daily") or {}).items() for key, count in values.items())
+        )
+        self.conn.executemany(
+            "INSERT INTO env_daily(file_id, env, date, key, count) VALUES (?, ?, ?, ?, ?)",
+            ((file_id, env, date, key, count)
+             for env, daily in (result.get("by_env") or {}).items() for date, values in daily.items() for key, count in values.items())
+        )
+        self.conn.executemany(
+            "INSERT INTO person_daily(file_id, date, person, count) VALUES (?, ?, ?, ?)",
+            ((file_id, date, person, count) for date, values in (result.get("by_name") or {}).items() for person, count in values.items())
+        )
+        return file_id
+
+    def replace(self, results: list):
+        """全ファイルの集計結果を置き換える(1つのトランザクションで行う)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+            for position, result in enumerate(results):
+                self._insert(result, position)
+
+    def _upsert(self, result: dict):
+        row = self.conn.execute(
+            "SELECT file_id, position FROM files WHERE filepath IS ? ORDER BY position LIMIT 1", (result.get("filepath"),)
+        ).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM files WHERE file_id = ?", (row["file_id"],))
+            self._insert(result, row["position"], row["file_id"])
+        else:
+            position = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM files").fetchone()[0]
+            self._insert(result, position)
+
+    def _delete(self, filepaths: list):
+        if filepaths:
+            where, params = _in_clause("filepath", filepaths)
+            self.conn.execute(f"DELETE FROM files WHERE {where}", params)
+
+    def upsert(self, result: dict):
+        """
+        1ファイルの集計結果を保存する(同じファイルパスの集計結果があれば置き換え、なければ末尾に追加する)
+
+        ファイルごとに1つのトランザクションで行う。
+        """
+        with self.conn:
+            self._upsert(result)
+
+    def delete(self, filepaths: list):
+        """指定したファイルパスの集計結果を削除する"""
+        with self.conn:
+            self._delete(filepaths)
+
+    def update(self, results: list, remove_filepaths: list = None):
+        """複数ファイルの集計結果の保存(upsert)・削除を1つのトランザクションで行う"""
+        with self.conn:
+            self._delete(remove_filepaths)
+            for result in results:
+                self._upsert(result)
+
+    # ---- 読み込み ----
+
+    def _file_rows(self, filepaths=None, selector_labels=None) -> list:
+        conditions, params = [], []
+        for column, values in (("filepath", filepaths), ("selector_label", selector_labels)):
+            if values is not None:
+                where, values = _in_clause(column, values)
+                conditions.append(where)
+                params.extend(values)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.conn.execute(f"SELECT file_id, data, envs FROM files{where} ORDER BY position", params).fetchall()
+
+    def load(self, filepaths: list = None, selector_labels: list = None, include_counts: bool = True) -> list:
+        """
+        集計結果を読み込む
+
+        Args:
+            filepaths (list): 読み込むファイルパス(省略時は全ファイル)
+            selector_labels (list): 読み込むファイルの選択用ラベル(省略時は全ファイル)
+            include_counts (bool): 日付別・環境別・担当者別の件数を含めるかどうか(Falseの場合はファイル一覧・統計のみ)
+
+        Returns:
+            list: 集計結果のリスト(集計時の順)
+        """
+        rows = self._file_rows(filepaths, selector_labels)
+        results = {row["file_id"]: json.loads(row["data"]) for row in rows}
+        if not include_counts:
+            for result in results.values():
+                for key in COUNT_KEYS:
+                    result.pop(key, None)
+            return list(results.values())
+
+        file_ids = list(results)
+        counts = {file_id: {key: {} for key in COUNT_KEYS if key in result} for file_id, result in results.items()}
+        # 環境は保存した順に復元する(日付のある件数がない環境は空のまま)
+        for row in rows:
+            if row["envs"] and "by_env" in counts[row["file_id"]]:
+                counts[row["file_id"]]["by_env"] = {env: {} for env in json.loads(row["envs"])}
+        # 件数は保存した順(rowid順)に読み込み、集計結果のキーの順序を復元する
+        for chunk in (file_ids[i:i + 500] for i in range(0, len(file_ids), 500)):
+            where, params = _in_clause("file_id", chunk)
+            for row in self.conn.execute(f"SELECT file_id, date, key, count FROM daily WHERE {where} ORDER BY rowid", params):
+                counts[row[0]].setdefault("daily", {}).setdefault(row[1], {})[row[2]] = row[3]
+            for row in self.conn.execute(f"SELECT file_id, env, date, key, count FROM env_daily WHERE {where} ORDER BY rowid", params):
+                counts[row[0]].setdefault("by_env", {}).setdefault(row[1], {}).setdefault(row[2], {})[row[3]] = row[4]
+            for row in self.conn.execute(f"SELECT file_id, date, person, count FROM person_daily WHERE {where} ORDER BY rowid", params):
+                counts[row[0]].setdefault("by_name", {}).setdefault(row[1], {})[row[2]] = row[3]
+        for file_id, result in results.items():
+            result.update(counts[file_id])
+        return list(results.values())
+
+    def files(self) -> list:
+        """ファイル一覧(件数を除く集計結果)を読み込む"""
+        return self.load(include_counts=False)
+
+    def _count_conditions(self, filepaths, date_from, date_to, extra=()) -> tuple[str, list]:
+        # エラー・ワーニングのあるファイルは合計に含めない(DataConversion.aggregate_all_daily と同じ)
+        conditions = ["f.status = 'ok'"]
+        params = []
+        if filepaths is not None:
+            where, values = _in_clause("f.filepath", filepaths)
+            conditions.append(where)
+            params.extend(values)
+        if date_from:
+            conditions.append("c.date >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("c.date <= ?")
+            params.append(date_to)
+        for column, values in extra:
+            if values is not None:
+                where, values = _in_clause(column, values)
+                conditions.append(where)
+                params.extend(values)
+        return " AND ".join(conditions), params
+
+    def daily(self, filepaths: list = None, date_from: str = None, date_to: str = None) -> dict:
+        """日付別の件数を合計する {日付: {結果: 件数}}"""
+        where, params = self._count_conditions(filepaths, date_from, date_to)
+        result = {}
+        for row in self.conn.execute(
+            f"SELECT c.date, c.key, SUM(c.count) FROM daily c JOIN files f ON f.file_id = c.file_id"
+            f" WHERE {where} GROUP BY c.date, c.key ORDER BY c.date, MIN(c.rowid)", params
+        ):
+            result.setdefault(row[0], {})[row[1]] = row[2]
+        return result
+
+    def by_env(self, envs: list = None, filepaths: list = None, date_from: str = None, date_to: str = None) -> dict:
+        """環境別・日付別の件数を合計する {環境: {日付: {結果: 件数}}}"""
+        where, params = self._count_conditions(filepaths, date_from, date_to, (("c.env", envs),))
+        result = {}
+        for row in self.conn.execute(
+            f"SELECT c.env, c.date, c.key, SUM(c.count) FROM env_daily c JOIN files f ON f.file_id = c.file_id"
+            f" WHERE {where} GROUP BY c.env, c.date, c.key ORDER BY c.env, c.date, MIN(c.rowid)", params
+        ):
+            result.setdefault(row[0], {}).setdefault(row[1], {})[row[2]] = row[3]
+        return result
+
+    def by_name(self, persons: list = None, filepaths: list = None, date_from: str = None, date_to: str = None) -> dict:
+        """担当者別・日付別の件数を合計する {日付: {担当者: 件数}}"""
+        where, params = self._count_conditions(filepaths, date_from, date_to, (("c.person", persons),))
+        result = {}
+        for row in self.conn.execute(
+            f"SELECT c.date, c.person, SUM(c.count) FROM person_daily c JOIN files f ON f.file_id = c.file_id"
+            f" WHERE {where} GROUP BY c.date, c.person ORDER BY c.date, MIN(c.rowid)", params
+        ):
+            result.setdefault(row[0], {})[row[1]] = row[2]
+        return result
+
+    # ---- JSONとの変換 ----
+
+    def import_json(self, json_path: str):
+        """プロジェクトファイル(JSON。圧縮されていてもよい)の集計データ(gathered_data)を取り込む"""
+        self.replace(ColumnarData.decode(JsonCodec.read(json_path).get("gathered_data", [])))
+
+    def export_json(self, json_path: str, project_data: dict):
+        """集計データを従来のプロジェクトファイル(JSON)の形式で書き出す"""
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"project": project_data, "gathered_data": self.load()}, f, ensure_ascii=False, indent=2)
+
+
+def open_store(project_path: str) -> ResultStore:
+    """プロジェクトファイルの集計データのストアを開く(存在しない場合は作成する)"""
+    return ResultStore(store_path(project_path))
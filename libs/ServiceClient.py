@@ -0,0 +1,47 @@
+import json
+from urllib import request, error
+
+# 常駐型の集計サービス(AggregationService.py)のクライアント。
+# サービスに接続できない場合はNoneを返すため、呼び出し側は従来どおりStartProcess.pyの起動で再集計する。
+
+TIMEOUT = 2  # 秒
+
+
+def _base_url(settings: dict) -> str:
+    return f"http://{settings['service']['host']}:{settings['service']['port']}"
+
+
+def _call(url: str, data: dict = None) -> dict:
+    body = json.dumps(data).encode("utf-8") if data is not None else None
+    req = request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST" if body else "GET")
+    try:
+        with request.urlopen(req, timeout=TIMEOUT) as res:
+            return json.loads(res.read().decode("utf-8"))
+    except (error.URLError, OSError, ValueError):
+        return None
+
+
+def is_running(settings: dict) -> bool:
+    """集計サービスが起動しているかどうか"""
+    return _call(f"{_base_url(settings)}/health") is not None
+
+
+def submit_reload(settings: dict, project_path: str) -> str:
+    """
+    プロジェクトの再集計を依頼する
+
+    Returns:
+        str: 依頼のID。サービスに接続できない場合はNone
+    """
+    result = _call(f"{_base_url(settings)}/jobs", {"project_path": project_path})
+    return result.get("job_id") if result else None
+
+
+def get_job(settings: dict, job_id: str) -> dict:
+    """
+    依頼の状態を取得する
+
+    Returns:
+        dict: 依頼の状態(state: queued / running / done / error、done / total: 集計の進捗)。取得できない場合はNone
+    """
+    return _call(f"{_base_url(settings)}/jobs/{job_id}")
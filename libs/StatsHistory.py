@@ -0,0 +1,222 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+# プロジェクトの集計結果の統計(stats)の履歴をSQLiteに保存する。
+# プロジェクトファイル(xxx.json)と同じ場所に xxx.history.db を作成し、再集計のたびにファイルごとの統計のスナップショットを追記する。
+# 集計データ(gathered_data)は再集計で上書きされるが、履歴は追記のみのため、過去の時点の件数(総数・対象外・消化数など)の推移を
+# シートの日付から集計し直さずに取得できる。
+# 一定の日数を過ぎたスナップショットは、日ごとに最後のスナップショットのみを残す(compact)。
+# 再集計で統計が変わらなかった場合は、前回のスナップショットと同じ内容を記録しない(skip_unchanged)。
+
+SCHEMA_VERSION = 1
+DB_EXT = ".history.db"
+
+# スナップショットに記録する統計のキー
+STATS_KEYS = ("all", "excluded", "available", "executed", "completed", "incompleted", "planned")
+
+_STATS_COLUMNS = ", ".join(f'"{key}"' for key in STATS_KEYS)
+_FILE_STATS_COLUMNS = ", ".join(f'f."{key}"' for key in STATS_KEYS)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    snapshot_id INTEGER PRIMARY KEY,
+    taken_at TEXT NOT NULL,
+    day TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_day ON snapshots(day, taken_at);
+CREATE TABLE IF NOT EXISTS file_stats (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(snapshot_id) ON DELETE CASCADE,
+    filepath TEXT,
+    file TEXT,
+    identifier TEXT,
+    status TEXT NOT NULL,
+    {", ".join(f'"{key}" INTEGER' for key in STATS_KEYS)}
+);
+CREATE INDEX IF NOT EXISTS idx_file_stats_snapshot ON file_stats(snapshot_id);
+CREATE INDEX IF NOT EXISTS idx_file_stats_filepath ON file_stats(filepath, snapshot_id);
+"""
+
+
+def history_path(project_path: str) -> str:
+    """プロジェクトファイルの統計の履歴の保存先(プロジェクトファイルと同じ場所の .history.db ファイル)"""
+    return os.path.splitext(project_path)[0] + DB_EXT
+
+
+def exists(project_path: str) -> bool:
+    return os.path.isfile(history_path(project_path))
+
+
+def _day_range(date_from: str, date_to: str) -> tuple[str, list]:
+    conditions, params = [], []
+    if date_from:
+        conditions.append("s.day >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("s.day <= ?")
+        params.append(date_to)
+    return " AND ".join(conditions), params
+
+
+class StatsHistory:
+    """
+    プロジェクトの集計結果の統計の履歴(追記のみ)
+
+    スナップショットは再集計ごと(snapshot_id)のファイル別の統計。期間(日付: YYYY-MM-DD)を指定して、
+    スナップショットごと・日ごと(その日の最後のスナップショット)の全ファイルの合計、ファイルごとの推移を取得できる。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    # ---- 記録 ----
+
+    def _latest_rows(self) -> list:
+        """最後のスナップショットのファイルごとの統計(記録順)。スナップショットがない場合はNone"""
+        snapshot_id = self.conn.execute("SELECT MAX(snapshot_id) FROM snapshots").fetchone()[0]
+        if snapshot_id is None:
+            return None
+        return [
+            tuple(row) for row in self.conn.execute(
+                f"SELECT filepath, file, identifier, status, {_STATS_COLUMNS} FROM file_stats WHERE snapshot_id = ? ORDER BY rowid",
+                (snapshot_id,)
+            )
+        ]
+
+    def record(self, gathered_data: list, taken_at: datetime = None, skip_unchanged: bool = False) -> int:
+        """
+        集計データのファイルごとの統計をスナップショットとして記録する(統計のないファイル(エラー)は記録しない)
+
+        Args:
+            gathered_data (list): 集計データ
+            taken_at (datetime): 記録日時(省略時は現在日時)
+            skip_unchanged (bool): 最後のスナップショットとファイルごとの統計が同じ場合は記録しないかどうか
+
+        Returns:
+            int: スナップショットのID(記録しなかった場合はNone)
+        """
+        taken_at = taken_at or datetime.now()
+        rows = []
+        for result in gathered_data:
+            stats = result.get("stats")
+            if not stats:
+                continue
+            rows.append((
+                result.get("filepath"), result.get("file"), result.get("identifier"), "warning" if "warning" in result else "ok",
+                *(stats.get(key) for key in STATS_KEYS)
+            ))
+        with self.conn:
+            if skip_unchanged and self._latest_rows() == rows:
+                return None
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots(taken_at, day) VALUES (?, ?)",
+                (taken_at.strftime("%Y-%m-%d %H:%M:%S"), taken_at.strftime("%Y-%m-%d"))
+            )
+            snapshot_id = cursor.lastrowid
+            self.conn.executemany(
+                f"INSERT INTO file_stats(snapshot_id, filepath, file, identifier, status, {_STATS_COLUMNS})"
+                f" VALUES ({', '.join('?' * (len(STATS_KEYS) + 5))})",
+                ((snapshot_id, *row) for row in rows)
+            )
+        return snapshot_id
+
+    def compact(self, keep_days: int, now: datetime = None) -> int:
+        """
+        keep_days 日より前のスナップショットを、日ごとに最後のスナップショットのみにする
+
+        Returns:
+            int: 削除したスナップショットの数
+        """
+        border = ((now or datetime.now()) - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM snapshots WHERE day < ? AND snapshot_id NOT IN"
+                " (SELECT MAX(snapshot_id) FROM snapshots WHERE day < ? GROUP BY day)",
+                (border, border)
+            )
+        return cursor.rowcount
+
+    # ---- 読み込み ----
+
+    def snapshots(self, date_from: str = None, date_to: str = None) -> list:
+        """スナップショットの一覧 [{"snapshot_id": ID, "taken_at": 記録日時}] (記録順)"""
+        where, params = _day_range(date_from, date_to)
+        return [
+            dict(row) for row in self.conn.execute(
+                f"SELECT s.snapshot_id, s.taken_at FROM snapshots s{' WHERE ' + where if where else ''} ORDER BY s.snapshot_id", params
+            )
+        ]
+
+    def _totals(self, date_from, date_to, filepaths, latest_of_day: bool) -> list:
+        # ワーニングのあるファイルは合計に含めない(全体集計の表示と同じ)
+        conditions, params = ["f.status = 'ok'"], []
+        where, values = _day_range(date_from, date_to)
+        if where:
+            conditions.append(where)
+            params.extend(values)
+        if filepaths is not None:
+            conditions.append(f"f.filepath IN ({','.join('?' * len(filepaths))})")
+            params.extend(filepaths)
+        if latest_of_day:
+            conditions.append("s.snapshot_id IN (SELECT MAX(snapshot_id) FROM snapshots GROUP BY day)")
+        sums = ", ".join(f'SUM(f."{key}") AS "{key}"' for key in STATS_KEYS)
+        return self.conn.execute(
+            f"SELECT s.snapshot_id, s.taken_at, s.day, COUNT(*) AS files, {sums} FROM snapshots s JOIN file_stats f ON f.snapshot_id = s.snapshot_id"
+            f" WHERE {' AND '.join(conditions)} GROUP BY s.snapshot_id ORDER BY s.snapshot_id", params
+        ).fetchall()
+
+    def totals(self, date_from: str = None, date_to: str = None, filepaths: list = None) -> list:
+        """
+        スナップショットごとの全ファイル(filepaths指定時はそのファイル)の統計の合計(記録順)
+        [{"snapshot_id": ID, "taken_at": 記録日時, "files": ファイル数, 統計: 件数}]
+        (記録日時は秒単位のため、同じ秒に記録されたスナップショットも別の行として返す)
+        """
+        return [
+            {"snapshot_id": row["snapshot_id"], "taken_at": row["taken_at"], "files": row["files"], **{key: row[key] for key in STATS_KEYS}}
+            for row in self._totals(date_from, date_to, filepaths, latest_of_day=False)
+        ]
+
+    def daily(self, date_from: str = None, date_to: str = None, filepaths: list = None) -> dict:
+        """日ごと(その日の最後のスナップショット)の統計の合計 {日付: {"files": ファイル数, 統計: 件数}}"""
+        return {
+            row["day"]: {"files": row["files"], **{key: row[key] for key in STATS_KEYS}}
+            for row in self._totals(date_from, date_to, filepaths, latest_of_day=True)
+        }
+
+    def file_history(self, filepath: str, date_from: str = None, date_to: str = None) -> list:
+        """
+        1ファイルの統計の推移(記録順。ワーニングのある時点も含む)
+        [{"snapshot_id": ID, "taken_at": 記録日時, 統計: 件数}]
+        """
+        where, params = _day_range(date_from, date_to)
+        rows = self.conn.execute(
+            f"SELECT s.snapshot_id, s.taken_at, {_FILE_STATS_COLUMNS} FROM snapshots s"
+            f" JOIN file_stats f ON f.snapshot_id = s.snapshot_id WHERE f.filepath = ?{' AND ' + where if where else ''}"
+            f" ORDER BY s.snapshot_id", [filepath, *params]
+        )
+        return [{"snapshot_id": row["snapshot_id"], "taken_at": row["taken_at"], **{key: row[key] for key in STATS_KEYS}} for row in rows]
+
+
+def open_history(project_path: str) -> StatsHistory:
+    """プロジェクトファイルの統計の履歴を開く(存在しない場合は作成する)"""
+    return StatsHistory(history_path(project_path))
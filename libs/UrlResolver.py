@@ -0,0 +1,90 @@
+import json
+import importlib
+import subprocess
+from datetime import datetime, timedelta
+
+from libs import Logger
+
+# SharePointのファイル(ItemId)からダウンロードURLを取得する。
+# 全ファイルのItemIdをまとめて1回で解決し、{ItemId: {"url": ダウンロードURL, "name": ファイル名}} を返す。
+# 解決方法(リゾルバ)は設定の sharepoint.resolver で切り替える。
+#   - 登録済みの名前("powershell"など)
+#   - "モジュール名:関数名"(ItemIdのリストを受け取り、上記の辞書を返す関数)
+# 取得したURLは有効期限付きでプロジェクトデータ(download_urls)に保存し、期限内の再集計では解決し直さない。
+
+logger = Logger.get_logger(__name__, console=True, file=False, trace_line=False)
+
+SCRIPT_PATH = "GetDownloadUrl.ps1"
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+RESOLVERS = {}
+
+
+def register(name: str):
+    """リゾルバを登録するデコレータ"""
+    def decorator(func):
+        RESOLVERS[name] = func
+        return func
+    return decorator
+
+
+@register("powershell")
+def resolve_with_powershell(item_ids: list) -> dict:
+    """GetDownloadUrl.ps1 を1回だけ起動し、全ItemIdのダウンロードURLを取得する"""
+    command = [
+        "powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-File", SCRIPT_PATH,
+        "-ItemIds", ",".join(item_ids)
+    ]
+    # PowerShellの出力はUTF-8(BOMが付く環境もあるため utf-8-sig で読み込む)
+    result = subprocess.run(command, capture_output=True, text=True, encoding="utf-8-sig")
+    if result.returncode != 0:
+        raise RuntimeError(f"ダウンロードURLの取得に失敗しました。\n{result.stderr.strip()}")
+    return json.loads(result.stdout or "{}")
+
+
+def get_resolver(name: str):
+    if name in RESOLVERS:
+        return RESOLVERS[name]
+    module_name, _, func_name = name.partition(":")
+    if not func_name:
+        raise ValueError(f"リゾルバが見つかりません: {name}")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def resolve(item_ids: list, url_cache: dict, resolver: str = "powershell", ttl_minutes: int = 50, now: datetime = None) -> dict:
+    """
+    ItemIdのダウンロードURLを取得する(有効期限内のURLはurl_cacheのものを使用する)
+
+    Args:
+        item_ids: SharePointのファイルのItemIdのリスト
+        url_cache: 取得済みのURL {ItemId: {"url", "name", "expires"}}。新たに取得したURLを追加し、期限切れのURLを削除する
+        resolver: リゾルバの名前
+        ttl_minutes: 取得したURLの有効期限(分)
+        now: 現在日時(省略時は現在)
+
+    Returns:
+        dict: {ItemId: {"url": ダウンロードURL, "name": ファイル名}}。取得できなかったItemIdは含まない
+    """
+    now = now or datetime.now()
+    for item_id in [item_id for item_id, entry in url_cache.items() if entry.get("expires", "") <= now.strftime(DATETIME_FORMAT)]:
+        del url_cache[item_id]
+
+    unresolved = list(dict.fromkeys(item_id for item_id in item_ids if item_id not in url_cache))
+    if unresolved:
+        resolved = get_resolver(resolver)(unresolved)
+        expires = (now + timedelta(minutes=ttl_minutes)).strftime(DATETIME_FORMAT)
+        for item_id in unresolved:
+            entry = resolved.get(item_id)
+            if not entry or not entry.get("url"):
+                logger.warning(f"ダウンロードURLを取得できませんでした: {item_id}")
+                continue
+            url_cache[item_id] = {"url": entry["url"], "name": entry.get("name", ""), "expires": expires}
+
+    logger.info(f"ダウンロードURL: 取得 {len(unresolved)}件 / 取得済み {len(item_ids) - len(unresolved)}件")
+    return {item_id: {"url": url_cache[item_id]["url"], "name": url_cache[item_id]["name"]} for item_id in item_ids if item_id in url_cache}
+
+
+def invalidate(url_cache: dict, item_ids: list):
+    """ダウンロードに失敗したURL(有効期限切れなど)を削除し、次回は取得し直す"""
+    for item_id in item_ids:
+        url_cache.pop(item_id, None)
@@ -0,0 +1,406 @@
+import re
+import zipfile
+import posixpath
+from datetime import datetime, date, time, timedelta
+from xml.etree.ElementTree import iterparse, fromstring
+
+# xlsx(SpreadsheetML)を openpyxl を使わずに直接読み込む軽量リーダー
+# 集計に必要な「値」だけを iter_rows で取り出すことを目的とし、
+# セル・スタイルのオブジェクトモデルは構築しない。
+# OpenpyxlWrapper から利用される範囲（sheetnames / ブック[シート名] / close、
+# シートの max_row / max_column / iter_rows(values_only=True)）のみ openpyxl(読み取り専用モード)と互換の動作をする。
+
+SHEET_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+SHEET_TAG = f"{{{SHEET_MAIN_NS}}}sheet"
+WORKBOOK_PR_TAG = f"{{{SHEET_MAIN_NS}}}workbookPr"
+DIMENSION_TAG = f"{{{SHEET_MAIN_NS}}}dimension"
+SHEET_DATA_TAG = f"{{{SHEET_MAIN_NS}}}sheetData"
+ROW_TAG = f"{{{SHEET_MAIN_NS}}}row"
+CELL_TAG = f"{{{SHEET_MAIN_NS}}}c"
+VALUE_TAG = f"{{{SHEET_MAIN_NS}}}v"
+FORMULA_TAG = f"{{{SHEET_MAIN_NS}}}f"
+INLINE_STRING_TAG = f"{{{SHEET_MAIN_NS}}}is"
+STRING_ITEM_TAG = f"{{{SHEET_MAIN_NS}}}si"
+TEXT_TAG = f"{{{SHEET_MAIN_NS}}}t"
+RICH_TEXT_TAG = f"{{{SHEET_MAIN_NS}}}r"
+NUM_FMT_TAG = f"{{{SHEET_MAIN_NS}}}numFmt"
+CELL_XFS_TAG = f"{{{SHEET_MAIN_NS}}}cellXfs"
+XF_TAG = f"{{{SHEET_MAIN_NS}}}xf"
+RELATIONSHIP_TAG = f"{{{PKG_REL_NS}}}Relationship"
+
+# Excelシリアル値の基準日
+WINDOWS_EPOCH = datetime(1899, 12, 30)
+MAC_EPOCH = datetime(1904, 1, 1)
+SECS_PER_DAY = 86400
+
+# 組込みの表示形式のうち日付・時刻として扱うもの（openpyxlの組込み形式テーブルと同じ判定）
+BUILTIN_DATE_FORMAT_IDS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+BUILTIN_TIMEDELTA_FORMAT_IDS = {46}
+
+# 表示形式が日付・経過時間かを判定するための正規表現
+LITERAL_GROUP = r'".*?"'  # 引用符で囲まれた文字列
+LOCALE_GROUP = r'\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]'  # 時・分・秒以外の角括弧
+STRIP_RE = re.compile(f"{LITERAL_GROUP}|{LOCALE_GROUP}")
+DATE_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+TIMEDELTA_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+
+
+def is_date_format(fmt: str) -> bool:
+    if fmt is None:
+        return False
+    fmt = STRIP_RE.sub("", fmt.split(";")[0])  # 正の数の書式のみ参照
+    return DATE_RE.search(fmt) is not None
+
+
+def is_timedelta_format(fmt: str) -> bool:
+    if fmt is None:
+        return False
+    return TIMEDELTA_RE.search(fmt.split(";")[0]) is not None
+
+
+def from_excel(value, epoch=WINDOWS_EPOCH, as_timedelta=False):
+    """Excelのシリアル値をdatetime(時刻のみの場合はtime、経過時間の場合はtimedelta)に変換する"""
+    if as_timedelta:
+        td = timedelta(days=value)
+        if td.microseconds:
+            # ミリ秒単位に丸める
+            td = timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+
+    day, fraction = divmod(value, 1)
+    diff = timedelta(milliseconds=round(fraction * SECS_PER_DAY * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        # 時刻のみ
+        mins, seconds = divmod(diff.seconds, 60)
+        hours, mins = divmod(mins, 60)
+        return time(hours, mins, seconds, diff.microseconds)
+    # 1900年うるう年バグ(1900/2/29が存在する扱い)の補正
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        day += 1
+    return epoch + timedelta(days=day) + diff
+
+
+def _from_iso8601(value: str):
+    """t="d" のセル(ISO8601形式の日時文字列)を変換する"""
+    try:
+        if "T" in value or " " in value:
+            return datetime.fromisoformat(value.rstrip("Z"))
+        if ":" in value:
+            return time.fromisoformat(value)
+        return date.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+def _cast_number(value: str):
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def column_index(ref: str) -> int:
+    """セル参照(例: "AB12")から列番号(1始まり)を取得する"""
+    col = 0
+    for char in ref:
+        if char.isdigit():
+            break
+        col = col * 26 + (ord(char.upper()) - 64)
+    return col
+
+
+def column_letter(col: int) -> str:
+    letters = ""
+    while col > 0:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _row_index(ref: str) -> int:
+    return int(ref.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz$"))
+
+
+def _text_content(element) -> str:
+    """<si>/<is>要素からテキストを取得する(ふりがな<rPh>は含めない)"""
+    snippets = []
+    text = element.find(TEXT_TAG)
+    if text is not None and text.text is not None:
+        snippets.append(text.text)
+    for run in element.findall(RICH_TEXT_TAG):
+        run_text = run.find(TEXT_TAG)
+        if run_text is not None and run_text.text is not None:
+            snippets.append(run_text.text)
+    return "".join(snippets)
+
+
+class Workbook:
+    """xlsxファイルのシート一覧と共有文字列・スタイル情報を保持するブック"""
+
+    def __init__(self, file):
+        self._archive = zipfile.ZipFile(file, "r")
+        self._shared_strings = None
+        self._date_styles = None
+        self._timedelta_styles = None
+        self.epoch = WINDOWS_EPOCH
+        self._sheets = {}
+        self._read_workbook()
+
+    def _read_workbook(self):
+        # シートIDと実体パスの対応(xl/_rels/workbook.xml.rels)
+        targets = {}
+        rels_path = "xl/_rels/workbook.xml.rels"
+        if rels_path in self._archive.namelist():
+            rels = fromstring(self._archive.read(rels_path))
+            for rel in rels.iter(RELATIONSHIP_TAG):
+                target = rel.get("Target", "")
+                if target.startswith("/"):
+                    target = target.lstrip("/")
+                else:
+                    target = posixpath.normpath(posixpath.join("xl", target))
+                targets[rel.get("Id")] = target
+
+        # シート名と並び順(xl/workbook.xml)
+        workbook = fromstring(self._archive.read("xl/workbook.xml"))
+        workbook_pr = workbook.find(WORKBOOK_PR_TAG)
+        if workbook_pr is not None and workbook_pr.get("date1904") in ("1", "true"):
+            self.epoch = MAC_EPOCH
+        for sheet in workbook.iter(SHEET_TAG):
+            path = targets.get(sheet.get(f"{{{REL_NS}}}id"))
+            if path:
+                self._sheets[sheet.get("name")] = Worksheet(self, sheet.get("name"), path)
+
+    @property
+    def sheetnames(self) -> list:
+        return list(self._sheets.keys())
+
+    def __getitem__(self, sheet_name: str):
+        try:
+            return self._sheets[sheet_name]
+        except KeyError:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+    @property
+    def shared_strings(self) -> list:
+        # 共有文字列は最初にシートの値を読む時点で一度だけ読み込む
+        if self._shared_strings is None:
+            self._shared_strings = []
+            path = "xl/sharedStrings.xml"
+            if path in self._archive.namelist():
+                with self._archive.open(path) as src:
+                    for _, element in iterparse(src):
+                        if element.tag == STRING_ITEM_TAG:
+                            self._shared_strings.append(_text_content(element).replace("x005F_", ""))
+                            element.clear()
+        return self._shared_strings
+
+    @property
+    def date_styles(self) -> set:
+        if self._date_styles is None:
+            self._read_styles()
+        return self._date_styles
+
+    @property
+    def timedelta_styles(self) -> set:
+        if self._timedelta_styles is None:
+            self._read_styles()
+        return self._timedelta_styles
+
+    def _read_styles(self):
+        # 日付・経過時間の表示形式が設定されたスタイル番号を抽出する
+        self._date_styles = set()
+        self._timedelta_styles = set()
+        path = "xl/styles.xml"
+        if path not in self._archive.namelist():
+            return
+        styles = fromstring(self._archive.read(path))
+        custom_formats = {int(fmt.get("numFmtId")): fmt.get("formatCode") for fmt in styles.iter(NUM_FMT_TAG)}
+        cell_xfs = styles.find(CELL_XFS_TAG)
+        if cell_xfs is None:
+            return
+        for idx, xf in enumerate(cell_xfs.findall(XF_TAG)):
+            fmt_id = int(xf.get("numFmtId", 0))
+            if fmt_id in custom_formats:
+                fmt = custom_formats[fmt_id]
+                if is_date_format(fmt):
+                    self._date_styles.add(idx)
+                if is_timedelta_format(fmt):
+                    self._timedelta_styles.add(idx)
+            else:
+                if fmt_id in BUILTIN_DATE_FORMAT_IDS:
+                    self._date_styles.add(idx)
+                if fmt_id in BUILTIN_TIMEDELTA_FORMAT_IDS:
+                    self._timedelta_styles.add(idx)
+
+    def open_part(self, path: str):
+        return self._archive.open(path)
+
+    def close(self):
+        self._archive.close()
+
+
+class Worksheet:
+    """シートXML(xl/worksheets/sheetN.xml)を必要な時だけ逐次解析するシート"""
+
+    def __init__(self, parent: Workbook, title: str, path: str):
+        self.parent = parent
+        self.title = title
+        self._path = path
+        self._dimensions = None
+
+    def _get_dimensions(self):
+        # <dimension ref="A1:U22"/> から範囲を取得する(シートデータの手前までしか読まない)
+        if self._dimensions is None:
+            self._dimensions = (None, None)
+            with self.parent.open_part(self._path) as src:
+                for _, element in iterparse(src, events=("start",)):
+                    if element.tag == DIMENSION_TAG:
+                        ref = element.get("ref", "")
+                        last = ref.split(":")[-1]
+                        if any(char.isdigit() for char in last):
+                            self._dimensions = (column_index(last), _row_index(last))
+                        break
+                    if element.tag == SHEET_DATA_TAG:
+                        break
+        return self._dimensions
+
+    # <dimension>は作成したツールによっては実際の範囲と異なる(例: A1のみ)、または存在しないため、行・列の範囲の上限には使用しない
+    # (openpyxlの読み取り専用モードで reset_dimensions() した状態と同じく None を返し、行の走査はシートの末尾まで行う)
+    @property
+    def max_row(self):
+        return None
+
+    @property
+    def max_column(self):
+        return None
+
+    @property
+    def dimension_max_row(self):
+        """<dimension>に記録されている最終行(表示用。存在しない場合はNone)"""
+        return self._get_dimensions()[1]
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=True):
+        """行ごとに、指定範囲の列の値をタプルで返す（値のみ。セルオブジェクトは返さない）"""
+        if not values_only:
+            raise ValueError("XlsxXmlReaderは値のみの読込(values_only=True)にのみ対応しています。")
+        min_row = min_row or 1
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+        return self._cells_by_row(min_row, max_row, min_col, max_col)
+
+    def _cells_by_row(self, min_row, max_row, min_col, max_col):
+        empty_row = (None,) * (max_col + 1 - min_col) if max_col is not None else ()
+        shared_formulae = {}
+        row_counter = 0
+        next_row = min_row
+        with self.parent.open_part(self._path) as src:
+            sheet_data = None
+            for event, element in iterparse(src, events=("start", "end")):
+                if event == "start":
+                    if element.tag == SHEET_DATA_TAG:
+                        sheet_data = element
+                    continue
+                if element.tag != ROW_TAG:
+                    continue
+
+                ref = element.get("r")
+                row_counter = int(float(ref)) if ref else row_counter + 1
+                if max_row is not None and row_counter > max_row:
+                    # 指定範囲の最終行までの省略行を空行で埋めて終了
+                    while next_row <= max_row:
+                        next_row += 1
+                        yield empty_row
+                    break
+
+                if row_counter >= min_row:
+                    # 行が省略されている箇所は空行で埋める
+                    while next_row < row_counter:
+                        next_row += 1
+                        yield empty_row
+                    yield self._parse_row(element, row_counter, min_col, max_col, shared_formulae)
+                    next_row += 1
+                else:
+                    # 範囲外の行でも共有数式の定義だけは保持しておく
+                    self._parse_row(element, row_counter, min_col, 0, shared_formulae)
+
+                # 解析済みの行を破棄してメモリを解放
+                element.clear()
+                if sheet_data is not None:
+                    sheet_data.clear()
+
+    def _parse_row(self, element, row_num, min_col, max_col, shared_formulae):
+        values = {}
+        col_counter = 0
+        for cell in element.iter(CELL_TAG):
+            ref = cell.get("r")
+            col = column_index(ref) if ref else col_counter + 1
+            col_counter = col
+            if col < min_col or (max_col is not None and col > max_col):
+                # 必要な列以外は値を変換しない(共有数式の定義のみ記録)
+                formula = cell.find(FORMULA_TAG)
+                if formula is not None and formula.get("t") == "shared" and formula.text is not None:
+                    self._parse_formula(formula, ref or f"{column_letter(col)}{row_num}", shared_formulae)
+                continue
+            values[col] = self._parse_cell(cell, ref or f"{column_letter(col)}{row_num}", shared_formulae)
+
+        if max_col is None:
+            # 列範囲の指定がない場合は最後のセルまで
+            if not values:
+                return ()
+            max_col = max(values)
+        return tuple(values.get(col) for col in range(min_col, max_col + 1))
+
+    def _parse_cell(self, cell, coordinate, shared_formulae):
+        data_type = cell.get("t", "n")
+
+        formula = cell.find(FORMULA_TAG)
+        if formula is not None:
+            # 数式は openpyxl(data_only=False) と同様に数式文字列を返す
+            return self._parse_formula(formula, coordinate, shared_formulae)
+
+        if data_type == "inlineStr":
+            inline = cell.find(INLINE_STRING_TAG)
+            return _text_content(inline) if inline is not None else None
+
+        value = cell.findtext(VALUE_TAG, None) or None
+        if value is None:
+            return None
+
+        if data_type == "n":
+            value = _cast_number(value)
+            style_id = int(cell.get("s", 0))
+            if style_id in self.parent.date_styles:
+                try:
+                    value = from_excel(value, self.parent.epoch, as_timedelta=style_id in self.parent.timedelta_styles)
+                except (OverflowError, ValueError):
+                    value = "#VALUE!"
+            return value
+        if data_type == "s":
+            return self.parent.shared_strings[int(value)]
+        if data_type == "b":
+            return bool(int(value))
+        if data_type == "d":
+            return _from_iso8601(value)
+        # str(数式の結果文字列) / e(エラー値) はそのまま
+        return value
+
+    def _parse_formula(self, formula, coordinate, shared_formulae):
+        value = "="
+        if formula.text is not None:
+            value += formula.text
+        if formula.get("t") == "shared":
+            idx = formula.get("si")
+            if idx in shared_formulae:
+                value = shared_formulae[idx].translate_formula(coordinate)
+            elif value != "=":
+                # 共有数式の参照先のずらしはopenpyxlの数式トークナイザを利用する
+                from openpyxl.formula.translate import Translator
+                shared_formulae[idx] = Translator(value, coordinate)
+        return value
+
+
+def load_workbook(file) -> Workbook:
+    """xlsxファイル(パスまたはファイルオブジェクト)を開く"""
+    return Workbook(file)
@@ -1,6 +1,8 @@
 import zipfile
 import tempfile
 import os
+import io
+from datetime import datetime
 
 TEMP_DIR_PREFIX = "_TEMP_"  # 一時フォルダの識別用プレフィックス
 
@@ -20,21 +22,76 @@ def extract_files_from_zip(zip_path, extensions=None):
      temp_dir = tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX)
  
      with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-         zip_ref.extractall(temp_dir)  # ZIPを解凍
+         # 対象の拡張子のファイルのみを解凍する（エビデンス等の不要なファイルは書き出さない）
+         members = filter_members(zip_ref.infolist(), extensions)
+         filtered_files = [zip_ref.extract(info, temp_dir) for info in members]
  
-     # 解凍されたフォルダ内のファイルを取得
-     all_files = [
-         os.path.join(root, file)
-         for root, _, files in os.walk(temp_dir)
-         for file in files
-     ]
- 
-     # 拡張子でフィルタリング（拡張子が指定されている場合）
+     return filtered_files, temp_dir
+
+# 直接読み込める圧縮方式(暗号化されたファイルは読み込めない)
+_SUPPORTED_COMPRESSIONS = {zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA}
+
+def filter_members(infolist, extensions=None):
+     """ZIP内のファイル(ディレクトリを除く)を拡張子でフィルタする"""
+     members = [info for info in infolist if not info.is_dir()]
      if extensions:
          extensions = {ext.lower() for ext in extensions}  # 大文字小文字を統一
-         filtered_files = [file for file in all_files if os.path.splitext(file)[1].lower() in extensions]
-     else:
-         filtered_files = all_files  # すべてのファイルを取得
- 
-     return filtered_files, temp_dir
+         members = [info for info in members if os.path.splitext(info.filename)[1].lower() in extensions]
+     return members
+
+def is_readable_member(info: zipfile.ZipInfo) -> bool:
+     """解凍せずに直接読み込めるファイルかどうか"""
+     return not info.flag_bits & 0x1 and info.compress_type in _SUPPORTED_COMPRESSIONS
+
+def list_members(zip_path, extensions=None):
+     """
+     ZIPファイルを解凍せずに、中央ディレクトリから指定した拡張子のファイルの一覧を取得する。
+
+     :param zip_path: ZIPファイルのパス
+     :param extensions: フィルタする拡張子のリスト (例: ['.xlsx'])。None の場合はすべてのファイルを取得。
+     :return: (直接読み込めるファイルのZipInfoのリスト, 直接読み込めないファイルのZipInfoのリスト)
+     """
+     if not zipfile.is_zipfile(zip_path):
+         raise ValueError("指定されたファイルはZIPファイルではありません")
+
+     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+         members = filter_members(zip_ref.infolist(), extensions)
+     readable = [info for info in members if is_readable_member(info)]
+     unreadable = [info for info in members if not is_readable_member(info)]
+     return readable, unreadable
+
+def member_path(zip_path, member):
+     """ZIP内のファイルを識別するパス（ZIPファイルのパス/ZIP内のパス）"""
+     return os.path.join(zip_path, *member.split("/"))
+
+def split_member_path(path):
+     """
+     member_path で作成したパスをZIPファイルのパスとZIP内のパスに分割する。
+     ZIP内のファイルを指すパスでない場合は None を返す。
+     """
+     if os.path.exists(path):
+         return None
+     parent, parts = path, []
+     while True:
+         parent, name = os.path.split(parent)
+         if not name:
+             return None
+         parts.insert(0, name)
+         if os.path.isfile(parent):
+             if not zipfile.is_zipfile(parent):
+                 return None
+             return parent, "/".join(parts)
+
+def open_member(zip_path, member):
+     """ZIP内のファイルをディスクに書き出さずにメモリ上に読み込み、ファイルライクオブジェクトとして返す"""
+     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+         return io.BytesIO(zip_ref.read(member))
+
+def get_member_info(zip_path, member) -> zipfile.ZipInfo:
+     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+         return zip_ref.getinfo(member)
+
+def get_member_mtime(info: zipfile.ZipInfo) -> datetime:
+     """ZIP内のファイルの更新日時"""
+     return datetime(*info.date_time)
 
@@ -71,9 +71,10 @@ class ChartManager:
         if not project_data.get("gathered_data"):
             return None
 
-        # 日付ごとのデータ
+        # 日付ごとのデータ(概要を読み込んだ場合は集計済みの合計を使用)
         from libs.DataConversion import aggregate_all_daily, aggregate_all_stats
-        daily = aggregate_all_daily(project_data.get("gathered_data"))
+        summary = project_data.get("summary")
+        daily = summary["daily"] if summary else aggregate_all_daily(project_data.get("gathered_data"))
         # 総テスト件数
         stats = aggregate_all_stats(project_data.get("gathered_data"))
 
@@ -330,4 +331,63 @@ class ChartManager:
             dragmode=False
         )
 
-        return fig 
\ No newline at end of file
+        return fig 
+
+    @staticmethod
+    def create_stats_history_chart(history: Dict[str, Dict[str, int]], settings: Dict[str, Any], axis_type: str = "時間軸") -> Optional[go.Figure]:
+        """統計の推移のグラフを作成(統計の履歴(StatsHistory.daily)の日ごとの合計を使用する)"""
+        if not history:
+            return None
+
+        dates = sorted(history.keys())
+        colors = settings["webui"]["graph"]["colors"]
+        lines = [
+            ("available", "対象項目数", colors["plan"]),
+            ("executed", "消化数(累積)", colors["daily_executed"]),
+            ("completed", "完了数(累積)", settings["webui"]["bar"]["colors"]["Pass"]),
+            ("incompleted", "未完了数", colors["untested"]),
+        ]
+
+        fig = go.Figure()
+        for key, name, color in lines:
+            fig.add_trace(go.Scatter(
+                x=dates, y=[history[d].get(key) or 0 for d in dates],
+                mode="lines+markers",
+                name=name,
+                line=dict(width=3, color=color),
+                marker=dict(size=6, color=color)
+            ))
+
+        fig.update_layout(
+            title="集計結果の推移(再集計時の記録)",
+            xaxis=dict(
+                type="date" if axis_type == "時間軸" else "category",
+                tickformat="%m/%d",
+                showgrid=True,
+                gridcolor="rgba(200,200,200,0.2)",
+                gridwidth=0.5,
+                categoryorder="array",
+                categoryarray=dates
+            ),
+            yaxis=dict(
+                showgrid=True,
+                gridcolor="rgba(200,200,200,0.2)",
+                gridwidth=0.5,
+                title="件数"
+            ),
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1
+            ),
+            plot_bgcolor="#FFF",
+            font=dict(
+                family="sans-serif",
+                size=16
+            ),
+            dragmode=False
+        )
+
+        return fig
@@ -0,0 +1,36 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+# リポジトリ直下のモジュール(ReadData など)と libs を import できるようにする
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from libs import ReadDefinition
+
+SAMPLE_DIR = os.path.join(ROOT_DIR, "input_sample")
+
+with open(os.path.join(ROOT_DIR, "DefaultConfig.json"), encoding="utf-8") as f:
+    _DEFAULT_SETTINGS = json.load(f)
+
+
+@pytest.fixture
+def settings():
+    """既定の設定(DefaultConfig.json)のコピー"""
+    return copy.deepcopy(_DEFAULT_SETTINGS)
+
+
+@pytest.fixture(scope="session")
+def definition():
+    """既定の設定の集計用の設定"""
+    return ReadDefinition.from_settings(copy.deepcopy(_DEFAULT_SETTINGS))
+
+
+@pytest.fixture
+def sample_path():
+    """input_sample 内のファイルのパスを返す関数"""
+    return lambda name: os.path.join(SAMPLE_DIR, name)
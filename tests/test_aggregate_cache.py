@@ -0,0 +1,103 @@
+import os
+import shutil
+
+import pytest
+
+import FileProcessor
+import StartProcess
+from libs import AggregateCache
+
+# 集計結果のキャッシュ: 内容と集計設定が同じファイルは別のパス(別のプロジェクト)でも集計結果を使い回す
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AggregateCache.AggregateCache(str(tmp_path / "cache"), max_size_mb=0)
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    paths = []
+    file_processor = FileProcessor.file_processor
+
+    def spy(file, definition, id, fingerprint=None):
+        paths.append(file["fullpath"])
+        return file_processor(file, definition, id, fingerprint)
+
+    monkeypatch.setattr(FileProcessor, "file_processor", spy)
+    return paths
+
+
+def test_same_content_hits_across_paths(tmp_path, sample_path, definition, cache, processed):
+    project_a = str(tmp_path / "a" / "sample1.xlsx")
+    project_b = str(tmp_path / "b" / "renamed.xlsx")
+    for path in (project_a, project_b):
+        os.makedirs(os.path.dirname(path))
+        shutil.copy(sample_path("sample1.xlsx"), path)
+
+    first = StartProcess.aggregate_files([{"fullpath": project_a, "temp_dir": ""}], definition, max_workers=1, cache=cache)
+    assert cache.stats() == {"hits": 0, "misses": 1, "stores": 1, "evictions": 0}
+
+    second = StartProcess.aggregate_files([{"fullpath": project_b, "temp_dir": ""}], definition, max_workers=1, cache=cache)
+    assert processed == [project_a]
+    assert cache.hits == 1
+    assert FileProcessor.strip_file_info(second[0]) == FileProcessor.strip_file_info(first[0])
+    # ファイルごとの情報はキャッシュではなく今回のファイルから付与する
+    assert second[0]["filepath"] == project_b
+    assert second[0]["file"] == "renamed.xlsx"
+
+
+def test_settings_hash_is_part_of_key(tmp_path, sample_path):
+    path = sample_path("sample1.xlsx")
+    assert AggregateCache.content_key(path, "settings-a") != AggregateCache.content_key(path, "settings-b")
+    assert AggregateCache.content_key(path, "s") == AggregateCache.content_key(path, "s", fingerprint={"size": 1})
+    assert AggregateCache.content_key(path, "s", fingerprint={"hash": "abc"}) == AggregateCache.AggregateCache.make_key("abc", "s")
+    assert AggregateCache.content_key(str(tmp_path / "missing.xlsx"), "s") is None
+
+
+def test_errors_and_broken_entries(cache):
+    cache.put("error", {"error": {"type": "read_error"}})
+    assert cache.get("error") is None
+    with open(os.path.join(cache.cache_dir, "broken.json"), "w") as f:
+        f.write("{")
+    assert cache.get("broken") is None
+    assert cache.stats() == {"hits": 0, "misses": 2, "stores": 0, "evictions": 0}
+
+
+def set_last_used(cache, key, seconds):
+    os.utime(os.path.join(cache.cache_dir, key + AggregateCache.ENTRY_EXT), (seconds, seconds))
+
+
+def test_evict_removes_least_recently_used(cache):
+    result = {"stats": {"all": 1}, "padding": "x" * 1000}
+    for index, key in enumerate(("old", "used", "new")):
+        cache.put(key, result)
+        set_last_used(cache, key, 1_000_000 + index)
+    entry_size = os.path.getsize(os.path.join(cache.cache_dir, "old.json"))
+
+    # 取得したエントリは最終利用日時が更新され、削除の対象から外れる
+    assert cache.get("used") is not None
+    cache.max_size = entry_size * 2
+    cache.evict()
+
+    assert cache.get("old") is None
+    assert cache.get("used") is not None
+    assert cache.get("new") is not None
+    assert cache.evictions == 1
+
+
+def test_evict_without_limit_keeps_everything(cache):
+    for key in ("a", "b"):
+        cache.put(key, {"stats": {}})
+    cache.evict()
+    assert sorted(os.listdir(cache.cache_dir)) == ["a.json", "b.json"]
+    assert not [name for name in os.listdir(cache.cache_dir) if name.endswith(".tmp")]
+
+
+def test_from_settings(settings, tmp_path):
+    settings["cache"]["dir"] = str(tmp_path)
+    settings["cache"]["aggregate"]["enabled"] = False
+    assert AggregateCache.from_settings(settings) is None
+    settings["cache"]["aggregate"]["enabled"] = True
+    cache = AggregateCache.from_settings(settings)
+    assert cache.cache_dir == os.path.join(str(tmp_path), AggregateCache.CACHE_SUBDIR)
@@ -0,0 +1,150 @@
+import json
+import os
+
+import pytest
+
+from libs import AppConfig
+
+# 設定の読み書き: ファイルが更新されるまでのキャッシュ・補完で内容が変わった場合のみの書き込み・一時ファイルからの置き換え
+
+
+@pytest.fixture
+def paths(tmp_path, monkeypatch):
+    """DefaultConfig.json・UserConfig.json のパス(キャッシュは各テストで空にする)"""
+    monkeypatch.setattr(AppConfig, "_cache", {})
+    default_path = str(tmp_path / "DefaultConfig.json")
+    user_path = str(tmp_path / "UserConfig.json")
+    write(default_path, {"app": {"theme": "light", "size": 1}, "cache": {"dir": "cache"}})
+    return user_path, default_path
+
+
+def write(path, data, mtime_offset=0):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    if mtime_offset:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """ファイルの読み込み・書き込みの回数"""
+    counts = {"read": 0, "write": 0}
+    read_json, write_json = AppConfig._read_json, AppConfig._write_json
+
+    def spy_read(path):
+        counts["read"] += 1
+        return read_json(path)
+
+    def spy_write(settings, json_name):
+        counts["write"] += 1
+        return write_json(settings, json_name)
+
+    monkeypatch.setattr(AppConfig, "_read_json", spy_read)
+    monkeypatch.setattr(AppConfig, "_write_json", spy_write)
+    return counts
+
+
+def test_creates_user_config(paths):
+    user_path, default_path = paths
+
+    settings = AppConfig.load_settings(user_path, default_path)
+
+    assert settings == {"app": {"theme": "light", "size": 1}, "cache": {"dir": "cache"}}
+    assert read(user_path) == settings
+
+
+def test_merges_missing_keys_and_keeps_user_values(paths):
+    user_path, default_path = paths
+    write(user_path, {"app": {"theme": "dark"}})
+
+    settings = AppConfig.load_settings(user_path, default_path)
+
+    assert settings == {"app": {"theme": "dark", "size": 1}, "cache": {"dir": "cache"}}
+    assert read(user_path) == settings
+
+
+def test_cached_until_files_change(paths, calls):
+    user_path, default_path = paths
+    AppConfig.load_settings(user_path, default_path)
+    stat = os.stat(user_path)
+    counts = dict(calls)
+
+    AppConfig.load_settings(user_path, default_path)
+
+    # 2回目はファイルを読み直さず、UserConfig.json の更新日時も変わらない
+    assert calls == counts
+    assert os.stat(user_path).st_mtime_ns == stat.st_mtime_ns
+
+
+def test_returns_copy(paths):
+    user_path, default_path = paths
+    settings = AppConfig.load_settings(user_path, default_path)
+
+    settings["app"]["theme"] = "changed"
+
+    assert AppConfig.load_settings(user_path, default_path)["app"]["theme"] == "light"
+
+
+def test_picks_up_external_edit(paths):
+    user_path, default_path = paths
+    AppConfig.load_settings(user_path, default_path)
+
+    # 他のプロセス・エディタでの編集
+    write(user_path, {"app": {"theme": "dark", "size": 2}, "cache": {"dir": "other"}}, mtime_offset=10**9)
+
+    assert AppConfig.load_settings(user_path, default_path)["cache"]["dir"] == "other"
+
+
+def test_picks_up_default_change(paths):
+    user_path, default_path = paths
+    AppConfig.load_settings(user_path, default_path)
+
+    write(default_path, {"app": {"theme": "light", "size": 1}, "cache": {"dir": "cache"}, "new": {"enabled": True}}, mtime_offset=10**9)
+
+    assert AppConfig.load_settings(user_path, default_path)["new"] == {"enabled": True}
+    assert read(user_path)["new"] == {"enabled": True}
+
+
+def test_writes_only_on_change(paths, calls):
+    user_path, default_path = paths
+    write(user_path, {"app": {"theme": "dark", "size": 1}, "cache": {"dir": "cache"}})
+    stat = os.stat(user_path)
+
+    AppConfig.load_settings(user_path, default_path)
+
+    # 補完するキーがない場合は書き込まない
+    assert calls["write"] == 0
+    assert os.stat(user_path).st_mtime_ns == stat.st_mtime_ns
+
+
+def test_save_settings_invalidates_cache(paths):
+    user_path, default_path = paths
+    settings = AppConfig.load_settings(user_path, default_path)
+    settings["app"]["theme"] = "dark"
+
+    AppConfig.save_settings(settings, user_path)
+
+    assert AppConfig.load_settings(user_path, default_path)["app"]["theme"] == "dark"
+
+
+def test_atomic_write_keeps_original_on_failure(paths, monkeypatch):
+    user_path, default_path = paths
+    original = AppConfig.load_settings(user_path, default_path)
+
+    def broken_dump(data, f, **kwargs):
+        f.write('{"app": ')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(AppConfig.json, "dump", broken_dump)
+    with pytest.raises(OSError):
+        AppConfig.save_settings({"app": {}}, user_path)
+
+    # 書き込み途中の内容で置き換えず、一時ファイルも残さない
+    assert read(user_path) == original
+    assert sorted(os.listdir(os.path.dirname(user_path))) == ["DefaultConfig.json", "UserConfig.json", "UserConfig.json.lock"]
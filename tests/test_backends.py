@@ -0,0 +1,217 @@
+import dataclasses
+import glob
+import os
+import re
+import zipfile
+from datetime import datetime
+
+import pytest
+
+import ReadData
+from libs import OpenpyxlWrapper as Excel
+
+# 読込方法(openpyxl通常モード / openpyxl読み取り専用モード / XML直接読込)で集計結果・セルの値が一致することを確認する
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_FILES = sorted(glob.glob(os.path.join(ROOT_DIR, "input_sample", "*.xlsx")))
+
+# (read_only, backend)
+FULL = (False, Excel.BACKEND_OPENPYXL)
+READ_ONLY = (True, Excel.BACKEND_OPENPYXL)
+XML = (False, Excel.BACKEND_XML)
+MODES = [FULL, READ_ONLY, XML]
+MODE_IDS = ["openpyxl", "read_only", "xml"]
+
+
+def aggregate(filepath, definition, read_only, backend):
+    read_option = dataclasses.replace(definition.read_option, read_only=read_only, backend=backend)
+    return ReadData.aggregate_results(filepath, dataclasses.replace(definition, read_option=read_option))
+
+
+def without_max_row(result):
+    # シート上の最終行(max_row)は書式だけの行も含むため、<dimension>がない場合は読込方法によって異なる
+    result = dict(result)
+    if "count_by_sheet" in result:
+        result["count_by_sheet"] = [{k: v for k, v in sheet.items() if k != "max_row"} for sheet in result["count_by_sheet"]]
+    return result
+
+
+def rewrite_dimension(src, dst, ref):
+    """シートXMLの<dimension>を書き換えたコピーを作成する(ref=Noneの場合は削除)"""
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename.startswith("xl/worksheets/sheet"):
+                replacement = f'<dimension ref="{ref}"/>'.encode() if ref else b""
+                data = re.sub(rb"<dimension [^>]*/>", replacement, data)
+            zout.writestr(item, data)
+
+
+# ---- input_sample の集計結果 ----
+
+@pytest.mark.parametrize("filepath", SAMPLE_FILES, ids=os.path.basename)
+@pytest.mark.parametrize("mode", [READ_ONLY, XML], ids=MODE_IDS[1:])
+def test_sample_results_match_full_load(filepath, mode, definition):
+    assert aggregate(filepath, definition, *mode) == aggregate(filepath, definition, *FULL)
+
+
+@pytest.mark.parametrize("ref", ["A1", None], ids=["stale", "missing"])
+@pytest.mark.parametrize("filepath", SAMPLE_FILES, ids=os.path.basename)
+@pytest.mark.parametrize("mode", MODES, ids=MODE_IDS)
+def test_stale_dimension(filepath, mode, ref, definition, tmp_path):
+    # <dimension>が実際の範囲と異なる(A1のみ)・存在しない場合も、元のファイルを通常モードで読んだ結果と一致する
+    stale = str(tmp_path / os.path.basename(filepath))
+    rewrite_dimension(filepath, stale, ref)
+    expected = aggregate(filepath, definition, *FULL)
+    assert without_max_row(aggregate(stale, definition, *mode)) == without_max_row(expected)
+
+
+def test_sample1_stale_dimension_stats(definition, tmp_path):
+    stale = str(tmp_path / "sample1.xlsx")
+    rewrite_dimension(os.path.join(ROOT_DIR, "input_sample", "sample1.xlsx"), stale, "A1")
+    for mode in MODES:
+        result = aggregate(stale, definition, *mode)
+        assert "error" not in result
+        assert result["stats"]["all"] == 24
+        assert result["stats"]["executed"] == 18
+
+
+# ---- セルの値 ----
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="テスト項目" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+# スタイル 0: 標準 / 1: 組込みの日付形式(14) / 2: ユーザー定義の日付形式 / 3: 経過時間
+STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy/m/d"/><numFmt numFmtId="165" formatCode="[h]:mm:ss"/></numFmts>
+<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="1"><fill><patternFill patternType="none"/></fill></fills>
+<borders count="1"><border/></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="4">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+
+
+def make_workbook(path, sheet_data, dimension="A1"):
+    """シートデータ(<sheetData>の中身)を指定して、1シートのxlsxを作成する"""
+    dimension_xml = f'<dimension ref="{dimension}"/>' if dimension else ""
+    sheet = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f"{dimension_xml}<sheetData>{sheet_data}</sheetData></worksheet>"
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zout:
+        zout.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zout.writestr("_rels/.rels", ROOT_RELS)
+        zout.writestr("xl/workbook.xml", WORKBOOK)
+        zout.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS)
+        zout.writestr("xl/styles.xml", STYLES)
+        zout.writestr("xl/worksheets/sheet1.xml", sheet)
+    return str(path)
+
+
+def read_values(path, read_only, backend, **kwargs):
+    workbook = Excel.load(path, read_only=read_only, backend=backend)
+    try:
+        sheet = Excel.get_sheet_by_name(workbook, "テスト項目")
+        return [tuple(row) for row in sheet.iter_rows(values_only=True, **kwargs)]
+    finally:
+        Excel.close(workbook)
+
+
+def read_all_modes(path, **kwargs):
+    return {mode_id: read_values(path, *mode, **kwargs) for mode_id, mode in zip(MODE_IDS, MODES)}
+
+
+def test_values_beyond_stale_dimension(tmp_path):
+    path = make_workbook(tmp_path / "stale.xlsx", (
+        '<row r="1"><c r="A1" t="inlineStr"><is><t>#</t></is></c></row>'
+        '<row r="3"><c r="A3"><v>1</v></c><c r="C3"><v>3</v></c></row>'
+        '<row r="5"><c r="B5"><v>2.5</v></c></row>'
+    ), dimension="A1")
+    values = read_all_modes(path, min_col=1, max_col=3)
+    expected = [("#", None, None), (None, None, None), (1, None, 3), (None, None, None), (None, 2.5, None)]
+    assert values == {mode_id: expected for mode_id in MODE_IDS}
+
+
+def test_column_values_without_dimension(tmp_path):
+    path = make_workbook(tmp_path / "nodim.xlsx", (
+        '<row r="2"><c r="B2"><v>10</v></c></row>'
+        '<row r="4"><c r="B4"><v>20</v></c></row>'
+    ), dimension=None)
+    for mode in MODES:
+        workbook = Excel.load(path, read_only=mode[0], backend=mode[1])
+        try:
+            sheet = Excel.get_sheet_by_name(workbook, "テスト項目")
+            assert Excel.get_column_values(sheet, [2]) == [[None], [10], [None], [20]]
+        finally:
+            Excel.close(workbook)
+
+
+def test_shared_formula(tmp_path):
+    path = make_workbook(tmp_path / "formula.xlsx", (
+        '<row r="1"><c r="A1"><v>1</v></c><c r="B1"><f t="shared" ref="B1:B3" si="0">A1*2</f><v>2</v></c></row>'
+        '<row r="2"><c r="A2"><v>2</v></c><c r="B2"><f t="shared" si="0"/><v>4</v></c></row>'
+        '<row r="3"><c r="A3"><v>3</v></c><c r="B3"><f t="shared" si="0"/><v>6</v></c></row>'
+    ), dimension="A1:B3")
+    values = read_all_modes(path, min_row=2, min_col=2, max_col=2)
+    assert values == {mode_id: [("=A2*2",), ("=A3*2",)] for mode_id in MODE_IDS}
+
+
+def test_date_styles(tmp_path):
+    path = make_workbook(tmp_path / "date.xlsx", (
+        '<row r="1">'
+        '<c r="A1" s="1"><v>45658</v></c>'
+        '<c r="B1" s="2"><v>45658.5</v></c>'
+        '<c r="C1" s="3"><v>1.5</v></c>'
+        '<c r="D1"><v>45658</v></c>'
+        '<c r="E1" t="d"><v>2025-01-01T09:00:00</v></c>'
+        '</row>'
+    ), dimension="A1:E1")
+    values = read_all_modes(path, min_col=1, max_col=5)
+    expected = read_values(path, *FULL, min_col=1, max_col=5)
+    assert expected[0][0] == datetime(2025, 1, 1)
+    assert expected[0][1] == datetime(2025, 1, 1, 12)
+    assert expected[0][3] == 45658
+    assert values == {mode_id: expected for mode_id in MODE_IDS}
+
+
+def test_inline_strings(tmp_path):
+    path = make_workbook(tmp_path / "inline.xlsx", (
+        '<row r="1">'
+        '<c r="A1" t="inlineStr"><is><t>期待結果</t></is></c>'
+        '<c r="B1" t="inlineStr"><is><r><t>Pa</t></r><r><t>ss</t></r></is></c>'
+        '<c r="C1" t="inlineStr"><is><t></t></is></c>'
+        '</row>'
+    ), dimension="A1:C1")
+    values = read_all_modes(path, min_col=1, max_col=2)
+    assert values == {mode_id: [("期待結果", "Pass")] for mode_id in MODE_IDS}
@@ -0,0 +1,141 @@
+import glob
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from libs import DownloadFiles, TempDir
+
+# DownloadFiles をローカルのHTTPサーバーに対して実行し、再試行・条件付きGET・保存先の分離・中断時の後始末を確認する
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            count = sum(1 for path, _ in server.requests if path == self.path)
+
+        if self.path.startswith("/flaky/"):
+            # 最初の2回は一時的なエラー
+            if count <= 2:
+                self._send(503, b"busy")
+            else:
+                self._send(200, b"flaky content")
+        elif self.path.startswith("/etag/"):
+            if self.headers.get("If-None-Match") == ETAG or self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                self._send(304, b"")
+            else:
+                self._send(200, b"etag content", {"ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+        elif self.path.startswith("/broken/"):
+            # Content-Lengthより短い本文を送って接続を切る(ダウンロードの中断)
+            self.send_response(200)
+            self.send_header("Content-Length", "1000000")
+            self.end_headers()
+            self.wfile.write(b"x" * 1000)
+            self.wfile.flush()
+            self.close_connection = True
+        else:
+            # /<フォルダ>/<ファイル名>: フォルダごとに異なる内容
+            self._send(200, f"content of {self.path}".encode("utf-8"))
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def download(urls, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    kwargs.setdefault("timeout", 5)
+    return DownloadFiles.download_files(urls, max_workers=2, **kwargs)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_retry_after_server_error(server, tmp_path):
+    url = f"{server.base_url}/flaky/file.xlsx"
+    paths, _ = download([url], cache_dir=str(tmp_path), retries=3)
+    assert len(paths) == 1
+    assert read(paths[0]) == b"flaky content"
+    assert [path for path, _ in server.requests] == ["/flaky/file.xlsx"] * 3
+
+
+def test_retry_gives_up(server, tmp_path):
+    url = f"{server.base_url}/flaky/file.xlsx"
+    paths, _ = download([url], cache_dir=str(tmp_path), retries=1, keep_failed=True)
+    assert paths == [None]
+    assert len(server.requests) == 2
+
+
+def test_not_modified_uses_cache(server, tmp_path):
+    url = f"{server.base_url}/etag/file.xlsx"
+    first, _ = download([url], cache_dir=str(tmp_path))
+    second, _ = download([url], cache_dir=str(tmp_path))
+    assert first == second
+    assert read(second[0]) == b"etag content"
+    # 2回目は保存済みのETag / Last-Modifiedで問い合わせ、304で保存済みのファイルを使用する
+    headers = server.requests[1][1]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_not_modified_with_changing_url(server, tmp_path):
+    # ダウンロードURLが毎回変わる場合もキャッシュのキー(ファイルのID)で保存済みのファイルを使用する
+    first, _ = download([f"{server.base_url}/etag/file.xlsx?token=1"], cache_dir=str(tmp_path), cache_keys=["item-1"], filenames=["file.xlsx"])
+    second, _ = download([f"{server.base_url}/etag/file.xlsx?token=2"], cache_dir=str(tmp_path), cache_keys=["item-1"], filenames=["file.xlsx"])
+    assert first == second
+    assert "If-None-Match" in server.requests[1][1]
+
+
+@pytest.mark.parametrize("use_cache", [True, False], ids=["cache", "temp"])
+def test_same_filename_not_overwritten(server, tmp_path, use_cache):
+    urls = [f"{server.base_url}/a/same.xlsx", f"{server.base_url}/b/same.xlsx"]
+    paths, temp_dirs = download(urls, cache_dir=str(tmp_path) if use_cache else None)
+    try:
+        assert len(set(paths)) == 2
+        assert [os.path.basename(path) for path in paths] == ["same.xlsx", "same.xlsx"]
+        assert read(paths[0]) == b"content of /a/same.xlsx"
+        assert read(paths[1]) == b"content of /b/same.xlsx"
+    finally:
+        for temp_dir in temp_dirs:
+            TempDir.cleanup_temp_dir(temp_dir)
+
+
+def test_interrupted_download_removes_part_file(server, tmp_path):
+    url = f"{server.base_url}/broken/file.xlsx"
+    paths, _ = download([url], cache_dir=str(tmp_path), retries=0, keep_failed=True)
+    assert paths == [None]
+    assert glob.glob(os.path.join(str(tmp_path), "**", "*.part"), recursive=True) == []
+    assert glob.glob(os.path.join(str(tmp_path), "**", "file.xlsx"), recursive=True) == []
+
@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import zipfile
+
+import pytest
+
+from libs import ExtractCache
+
+# zipファイルの展開キャッシュ: 変更のないzipファイルの再利用・使用中のエントリの保護・容量超過時の削除
+
+
+def write_zip(path, members, date_time=(2024, 1, 1, 0, 0, 0)):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(zipfile.ZipInfo(name, date_time=date_time), data)
+    return str(path)
+
+
+def entry_dirs(cache):
+    return sorted(entry.name for entry in os.scandir(cache.cache_dir) if entry.is_dir())
+
+
+def lock_files(cache):
+    return sorted(entry.name for entry in os.scandir(cache.cache_dir) if entry.name.endswith(".lock"))
+
+
+def hold_entry(cache_dir, zip_path, ready, done):
+    """別のプロセスで展開して参照を保持し続ける"""
+    cache = ExtractCache.ExtractCache(cache_dir, max_size_mb=0)
+    cache.extract(zip_path, extensions=[".xlsx"])
+    ready.set()
+    done.wait(30)
+    cache.release()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractCache.ExtractCache(str(tmp_path / "extract"), max_size_mb=0)
+
+
+def test_unchanged_zip_hits(tmp_path, cache):
+    zip_path = write_zip(tmp_path / "a.zip", {"dir/a.xlsx": b"a", "b.txt": b"b"})
+
+    first = cache.extract(zip_path, extensions=[".xlsx"])
+    second = cache.extract(zip_path, extensions=[".XLSX"])
+
+    assert first == second
+    assert [os.path.relpath(path, os.path.dirname(os.path.dirname(path))) for path in first] == [os.path.join("dir", "a.xlsx")]
+    with open(first[0], "rb") as f:
+        assert f.read() == b"a"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_changed_zip_misses(tmp_path, cache):
+    zip_path = write_zip(tmp_path / "a.zip", {"a.xlsx": b"a"})
+    first = cache.extract(zip_path, extensions=[".xlsx"])
+
+    write_zip(zip_path, {"a.xlsx": b"changed", "new.xlsx": b"new"})
+    os.utime(zip_path, ns=(os.stat(zip_path).st_atime_ns, os.stat(zip_path).st_mtime_ns + 10**9))
+    second = cache.extract(zip_path, extensions=[".xlsx"])
+
+    assert os.path.dirname(first[0]) != os.path.dirname(second[0])
+    assert sorted(os.path.basename(path) for path in second) == ["a.xlsx", "new.xlsx"]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_different_extensions_replace_entry(tmp_path, cache):
+    zip_path = write_zip(tmp_path / "a.zip", {"a.xlsx": b"a", "b.txt": b"b"})
+    cache.extract(zip_path, extensions=[".xlsx"])
+    cache.release()
+
+    files = cache.extract(zip_path)
+
+    assert sorted(os.path.basename(path) for path in files) == ["a.xlsx", "b.txt"]
+    assert cache.misses == 2
+
+
+def test_changed_zip_releases_previous_ref(tmp_path, cache):
+    zip_path = write_zip(tmp_path / "a.zip", {"a.xlsx": b"a"})
+    old_dir = os.path.dirname(cache.extract(zip_path, extensions=[".xlsx"])[0])
+    assert old_dir in cache._refs
+
+    write_zip(zip_path, {"a.xlsx": b"changed"})
+    os.utime(zip_path, ns=(os.stat(zip_path).st_atime_ns, os.stat(zip_path).st_mtime_ns + 10**9))
+    new_dir = os.path.dirname(cache.extract(zip_path, extensions=[".xlsx"])[0])
+
+    assert list(cache._refs) == [new_dir]
+    assert os.listdir(os.path.join(old_dir, ExtractCache.REFS_DIR)) == []
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    cache = ExtractCache.ExtractCache(str(tmp_path / "extract"), max_size_mb=1)
+    data = b"x" * (600 * 1024)
+    old_zip = write_zip(tmp_path / "old.zip", {"a.xlsx": data})
+    new_zip = write_zip(tmp_path / "new.zip", {"a.xlsx": data})
+    old_dir = os.path.dirname(cache.extract(old_zip, extensions=[".xlsx"])[0])
+    os.utime(os.path.join(old_dir, ExtractCache.MANIFEST_NAME), ns=(0, 0))
+    new_dir = os.path.dirname(cache.extract(new_zip, extensions=[".xlsx"])[0])
+    cache.release()
+
+    cache.evict()
+
+    assert entry_dirs(cache) == [os.path.basename(new_dir)]
+    assert cache.evictions == 1
+    # 削除したエントリのロックファイルも残らない
+    assert lock_files(cache) == [os.path.basename(new_dir) + ".lock"]
+
+
+def test_evict_skips_entries_in_use_by_this_process(tmp_path):
+    cache = ExtractCache.ExtractCache(str(tmp_path / "extract"), max_size_mb=1)
+    zip_path = write_zip(tmp_path / "a.zip", {"a.xlsx": b"x" * (2 * 1024 * 1024)})
+    cache.extract(zip_path, extensions=[".xlsx"])
+
+    cache.evict()
+    assert len(entry_dirs(cache)) == 1
+
+    cache.release()
+    cache.evict()
+    assert entry_dirs(cache) == []
+    assert lock_files(cache) == []
+
+
+def test_evict_skips_entries_in_use_by_other_process(tmp_path):
+    cache_dir = str(tmp_path / "extract")
+    zip_path = write_zip(tmp_path / "a.zip", {"a.xlsx": b"x" * (2 * 1024 * 1024)})
+    ready = multiprocessing.Event()
+    done = multiprocessing.Event()
+    process = multiprocessing.Process(target=hold_entry, args=(cache_dir, zip_path, ready, done))
+    process.start()
+    try:
+        assert ready.wait(30)
+        cache = ExtractCache.ExtractCache(cache_dir, max_size_mb=1)
+        cache.evict()
+        assert len(entry_dirs(cache)) == 1
+        assert cache.evictions == 0
+    finally:
+        done.set()
+        process.join(30)
+
+    # 参照を保持していたプロセスの終了後は削除できる
+    cache.evict()
+    assert entry_dirs(cache) == []
+
+
+def test_evict_removes_orphan_work_dir_and_stale_lock(tmp_path, cache):
+    zip_path = write_zip(tmp_path / "a.zip", {"a.xlsx": b"a"})
+    entry_dir = os.path.dirname(cache.extract(zip_path, extensions=[".xlsx"])[0])
+    cache.release()
+    key = os.path.basename(entry_dir)
+    os.makedirs(os.path.join(cache.cache_dir, f"{key}.99999.tmp"))
+    open(os.path.join(cache.cache_dir, "0" * 32 + ".lock"), "w").close()
+
+    cache.evict()
+
+    assert entry_dirs(cache) == [key]
+    assert lock_files(cache) == [key + ".lock"]
@@ -0,0 +1,84 @@
+import os
+import zipfile
+
+import pytest
+
+import StartProcess
+from libs import FileDiscovery
+
+# 入力パスからの集計対象ファイルの探索: 条件による絞り込み・重複の除去・並び順
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb"):
+        pass
+    return path
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "specs"
+    for relpath in (
+        "b.xlsx", "a.xlsx", "notes.txt", "~$a.xlsx", ".hidden.xlsx", "archive.zip",
+        "sub/c.xlsx", "sub/deep/d.xlsx", "sub/old_e.xlsx",
+        "old/f.xlsx", ".git/g.xlsx",
+    ):
+        touch(str(root / relpath))
+    return str(root)
+
+
+def relpaths(paths, root):
+    return [os.path.relpath(path, root).replace(os.sep, "/") for path in paths]
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_discover_directory(tree, max_workers):
+    paths = FileDiscovery.discover([tree], max_workers=max_workers)
+    # ロックファイル・隠しファイル/ディレクトリ・対象外の拡張子を除き、パス順に並べる
+    assert relpaths(paths, tree) == sorted([
+        "a.xlsx", "archive.zip", "b.xlsx", "old/f.xlsx", "sub/c.xlsx", "sub/deep/d.xlsx", "sub/old_e.xlsx",
+    ], key=os.path.normcase)
+
+
+def test_include_exclude(tree):
+    file_filter = FileDiscovery.FileFilter(include=("*.xlsx",), exclude=("old", "old_*", "sub/deep/*"))
+    paths = FileDiscovery.discover([tree], file_filter=file_filter)
+    assert relpaths(paths, tree) == ["a.xlsx", "b.xlsx", "sub/c.xlsx"]
+
+
+def test_inputs_order_and_dedupe(tree):
+    sub = os.path.join(tree, "sub")
+    single = os.path.join(tree, "b.xlsx")
+    missing = os.path.join(tree, "specs.zip", "member.xlsx")
+    paths = FileDiscovery.discover([single, sub, tree, single, missing])
+    # 入力パスの順に連結し、2回目以降に現れたファイルは除く。存在しないパス(zip内のパスなど)はそのまま返す
+    assert relpaths(paths, tree) == [
+        "b.xlsx", "sub/c.xlsx", "sub/deep/d.xlsx", "sub/old_e.xlsx",
+        "a.xlsx", "archive.zip", "old/f.xlsx", "specs.zip/member.xlsx",
+    ]
+
+
+def test_direct_file_ignores_include(tree):
+    # 直接指定されたファイルはロックファイル・隠しファイルのみ除外する
+    file_filter = FileDiscovery.FileFilter(include=("nothing*",))
+    paths = FileDiscovery.discover([os.path.join(tree, "a.xlsx"), os.path.join(tree, "~$a.xlsx")], file_filter=file_filter)
+    assert relpaths(paths, tree) == ["a.xlsx"]
+
+
+def test_filter_zip_members(tmp_path, settings):
+    zip_path = str(tmp_path / "specs.zip")
+    with zipfile.ZipFile(zip_path, "w") as zout:
+        for name in ("a.xlsx", "old/b.xlsx", "~$c.xlsx", "d.csv"):
+            zout.writestr(name, b"")
+    settings["discovery"]["exclude"] = ["old/*"]
+    file_filter = FileDiscovery.from_settings(settings)
+    files, temp_dirs = StartProcess.get_xlsx_paths([zip_path], zip_direct=True, file_filter=file_filter)
+    assert [file["member"] for file in files] == ["a.xlsx"]
+    assert temp_dirs == []
+
+
+def test_from_settings(settings):
+    settings["discovery"]["include"] = ["*.xlsx"]
+    settings["discovery"]["exclude"] = ["tmp"]
+    assert FileDiscovery.from_settings(settings) == FileDiscovery.FileFilter(include=("*.xlsx",), exclude=("tmp",))
@@ -0,0 +1,136 @@
+import os
+import zipfile
+
+import pytest
+
+import StartProcess
+from libs import AppConfig, FileWatcher, Project
+
+# ファイルの変更の監視: 保存が完了するまで待ってから通知し、一覧の取り直しでファイルの追加・削除を検知する
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(FileWatcher.time, "monotonic", clock)
+    return clock
+
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    # 更新日時の分解能によらず変更を検知できるよう、更新日時を進める
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_change_is_notified_after_debounce(tmp_path, clock):
+    path = str(tmp_path / "a.xlsx")
+    write(path, b"a")
+    watcher = FileWatcher.FileWatcher(lambda: [path], debounce=3, rescan_interval=30)
+    watcher.start()
+    assert watcher.poll() == []
+
+    write(path, b"ab")
+    clock.now = 1
+    assert watcher.poll() == []
+    clock.now = 3.5
+    assert watcher.poll() == []
+    clock.now = 4
+    assert watcher.poll() == [path]
+    # 通知済みの変更は再度通知しない
+    clock.now = 10
+    assert watcher.poll() == []
+
+
+def test_change_during_debounce_restarts_wait(tmp_path, clock):
+    path = str(tmp_path / "a.xlsx")
+    write(path, b"a")
+    watcher = FileWatcher.FileWatcher(lambda: [path], debounce=3, rescan_interval=30)
+    watcher.start()
+
+    write(path, b"ab")
+    clock.now = 1
+    assert watcher.poll() == []
+    write(path, b"abc")
+    clock.now = 3
+    assert watcher.poll() == []
+    clock.now = 5.5
+    assert watcher.poll() == []
+    clock.now = 6
+    assert watcher.poll() == [path]
+
+
+def test_rescan_detects_added_and_removed_files(tmp_path, clock):
+    paths = [str(tmp_path / "a.xlsx")]
+    write(paths[0], b"a")
+    watcher = FileWatcher.FileWatcher(lambda: list(paths), debounce=0, rescan_interval=30)
+    watcher.start()
+
+    added = str(tmp_path / "b.xlsx")
+    write(added, b"b")
+    paths.append(added)
+    clock.now = 10
+    assert watcher.poll() == []  # 一覧を取り直すまでは検知しない
+
+    clock.now = 30
+    assert watcher.poll() == [added]
+
+    removed = paths.pop(0)
+    clock.now = 60
+    assert watcher.poll() == [removed]
+    clock.now = 61
+    assert watcher.poll() == []
+
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, source in members.items():
+            zf.write(source, name)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.mark.parametrize("zip_direct", [True, False])
+def test_watch_project_rescans_changed_zip(tmp_path, monkeypatch, settings, sample_path, zip_direct):
+    """更新されたzipファイルは一覧を取り直し、追加されたファイルも集計する"""
+    zip_path = str(tmp_path / "input.zip")
+    write_zip(zip_path, {"sample1.xlsx": sample_path("sample1.xlsx")})
+
+    settings["cache"]["dir"] = str(tmp_path / "cache")
+    settings["read_option"]["zip_direct"] = zip_direct
+    settings["read_option"]["max_workers"] = 1
+    settings["watch"].update({"interval": 0, "debounce": 0, "rescan_interval": 3600})
+    monkeypatch.setattr(AppConfig, "load_settings", lambda: settings)
+    monkeypatch.setattr(Project, "read_json", lambda path: {"project": {"files": [{"type": "local", "path": zip_path}]}})
+    monkeypatch.setattr(Project, "load_gathered_data", lambda path, json_data: [])
+    updates = []
+    monkeypatch.setattr(Project, "update_results", lambda path, results, remove_filepaths=None, **kwargs: updates.append(([data["file"] for data in results], list(remove_filepaths or []))))
+
+    steps = iter([
+        lambda: write_zip(zip_path, {"sample1.xlsx": sample_path("sample1.xlsx"), "sample4.xlsx": sample_path("sample4.xlsx")}),
+        lambda: None,
+    ])
+    def sleep(seconds):
+        step = next(steps, None)
+        if step is None:
+            raise KeyboardInterrupt
+        step()
+    monkeypatch.setattr(StartProcess.time, "sleep", sleep)
+
+    StartProcess.watch_project(str(tmp_path / "project.json"), use_cache=False)
+
+    assert updates[0] == (["sample1.xlsx"], [])
+    files, removed = updates[1]
+    assert sorted(files) == ["sample1.xlsx", "sample4.xlsx"]
+    # ZIP内のファイルのパスは変わらないが、展開した場合は展開先が新しいキーのディレクトリに変わるため古いパスを除く
+    assert len(removed) == (0 if zip_direct else 1)
+    assert len(updates) == 2
@@ -0,0 +1,140 @@
+import os
+import shutil
+import zipfile
+
+import pytest
+
+import FileProcessor
+import StartProcess
+from libs import FileFingerprint, ReadDefinition
+
+# 差分集計: ファイルの指紋(サイズ・更新日時・ZIP内のCRC・集計設定のハッシュ)が前回と一致するファイルは再集計しない
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    """集計したファイルのパスを記録する(max_workers=1 のためこのプロセスで集計される)"""
+    paths = []
+    file_processor = FileProcessor.file_processor
+
+    def spy(file, definition, id, fingerprint=None):
+        paths.append(file["fullpath"])
+        return file_processor(file, definition, id, fingerprint)
+
+    monkeypatch.setattr(FileProcessor, "file_processor", spy)
+    return paths
+
+
+@pytest.fixture
+def workbooks(tmp_path, sample_path):
+    paths = []
+    for name in ("sample1.xlsx", "sample2_abcdegfg.xlsx", "sample4.xlsx"):
+        path = str(tmp_path / name)
+        shutil.copy2(sample_path(name), path)
+        paths.append(path)
+    return paths
+
+
+def local_files(paths):
+    return [{"fullpath": path, "temp_dir": ""} for path in paths]
+
+
+def aggregate(files, definition, previous=None, **kwargs):
+    return StartProcess.aggregate_files(files, definition, max_workers=1, previous_data=previous, **kwargs)
+
+
+def test_unchanged_files_are_reused(workbooks, definition, processed):
+    first = aggregate(local_files(workbooks), definition)
+    assert processed == workbooks
+    assert all("fingerprint" in result for result in first)
+
+    processed.clear()
+    second = aggregate(local_files(workbooks), definition, previous=first)
+    assert processed == []
+    assert [FileProcessor.strip_file_info(r) for r in second] == [FileProcessor.strip_file_info(r) for r in first]
+    # 入力順の番号で採番し直す
+    assert [r["selector_label"] for r in second] == [f"{i}: {os.path.basename(p)}" for i, p in enumerate(workbooks, start=1)]
+
+
+def test_modified_file_is_reaggregated(workbooks, definition, processed):
+    first = aggregate(local_files(workbooks), definition)
+    stat = os.stat(workbooks[1])
+    os.utime(workbooks[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    processed.clear()
+    aggregate(local_files(workbooks), definition, previous=first)
+    assert processed == [workbooks[1]]
+
+
+def test_settings_change_reaggregates_all(workbooks, definition, settings, processed):
+    first = aggregate(local_files(workbooks), definition)
+    settings["read_definition"]["excluded"].append("対象外2")
+    changed = ReadDefinition.from_settings(settings)
+    assert changed.settings_hash != definition.settings_hash
+
+    processed.clear()
+    aggregate(local_files(workbooks), changed, previous=first)
+    assert processed == workbooks
+
+
+def test_errors_are_not_reused(tmp_path, definition, processed):
+    broken = str(tmp_path / "broken.xlsx")
+    with open(broken, "wb") as f:
+        f.write(b"not a workbook")
+    first = aggregate(local_files([broken]), definition)
+    assert first[0]["error"]["type"] == "read_error"
+
+    processed.clear()
+    aggregate(local_files([broken]), definition, previous=first)
+    assert processed == [broken]
+
+
+def write_zip(path, members):
+    """同じ更新日時のメンバーでZIPファイルを作成する(内容が変わったメンバーのみCRCが変わる)"""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zout:
+        for name, data in members.items():
+            zout.writestr(zipfile.ZipInfo(name, date_time=(2025, 1, 1, 0, 0, 0)), data)
+
+
+def test_zip_members_reused_by_crc(tmp_path, sample_path, definition, processed):
+    with open(sample_path("sample1.xlsx"), "rb") as f:
+        sample1 = f.read()
+    with open(sample_path("sample4.xlsx"), "rb") as f:
+        sample4 = f.read()
+    zip_path = str(tmp_path / "specs.zip")
+    write_zip(zip_path, {"a/sample1.xlsx": sample1, "b/sample.xlsx": sample1})
+    files = [StartProcess.make_member_file(zip_path, "a/sample1.xlsx"), StartProcess.make_member_file(zip_path, "b/sample.xlsx")]
+
+    first = aggregate(files, definition)
+    assert first[0]["fingerprint"]["crc"] == zipfile.ZipFile(zip_path).getinfo("a/sample1.xlsx").CRC
+
+    # ZIPファイル自体は更新されるが、内容が同じメンバーは再利用する
+    write_zip(zip_path, {"a/sample1.xlsx": sample1, "b/sample.xlsx": sample4})
+    processed.clear()
+    second = aggregate(files, definition, previous=first)
+    assert processed == [files[1]["fullpath"]]
+    assert second[0]["stats"] == first[0]["stats"]
+    assert second[1]["stats"] != first[1]["stats"]
+
+
+def test_content_hash_detects_same_size_and_mtime(tmp_path):
+    path = str(tmp_path / "data.bin")
+    with open(path, "wb") as f:
+        f.write(b"aaaa")
+    stat = os.stat(path)
+    before = {content_hash: FileFingerprint.make(path, "s", content_hash=content_hash) for content_hash in (False, True)}
+
+    with open(path, "wb") as f:
+        f.write(b"bbbb")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert FileFingerprint.make(path, "s") == before[False]
+    assert FileFingerprint.make(path, "s", content_hash=True) != before[True]
+
+
+def test_is_reusable():
+    fingerprint = {"size": 1, "mtime": 2, "settings": "s"}
+    assert FileFingerprint.is_reusable({"fingerprint": dict(fingerprint)}, fingerprint)
+    assert not FileFingerprint.is_reusable({"fingerprint": dict(fingerprint, size=3)}, fingerprint)
+    assert not FileFingerprint.is_reusable({"fingerprint": dict(fingerprint), "error": {}}, fingerprint)
+    assert not FileFingerprint.is_reusable({"fingerprint": dict(fingerprint)}, None)
+    assert not FileFingerprint.is_reusable(None, fingerprint)
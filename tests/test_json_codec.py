@@ -0,0 +1,138 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from libs import JsonCodec, Project
+
+# プロジェクトファイルのJSONの読み書き: 形式・圧縮・backendの組み合わせと、従来の形式のファイルの読み込み
+
+DATA = {
+    "project": {"project_name": "テスト", "files": [{"type": "local", "path": "C:/data/a.xlsx"}]},
+    "gathered_data": [{"file": "a.xlsx", "daily": {"2025-01-01": {"Pass": 1}}, "stats": {"all": 10}, "rate": 0.5, "none": None}],
+}
+
+requires_zstd = pytest.mark.skipif(JsonCodec.zstandard is None, reason="zstandard is not installed")
+requires_orjson = pytest.mark.skipif(JsonCodec.orjson is None, reason="orjson is not installed")
+
+
+@pytest.fixture(params=["json", pytest.param("orjson", marks=requires_orjson)])
+def backend(request):
+    return request.param
+
+
+@pytest.mark.parametrize("format", JsonCodec.FORMATS)
+@pytest.mark.parametrize("compression", ["none", "gzip", pytest.param("zstd", marks=requires_zstd)])
+def test_round_trip(tmp_path, format, compression, backend):
+    codec = JsonCodec.JsonCodec(format=format, compression=compression, backend=backend)
+    path = str(tmp_path / "project.json")
+
+    JsonCodec.write_bytes(path, codec.dumps(DATA))
+
+    assert JsonCodec.read(path) == DATA
+    with open(path, "rb") as f:
+        raw = f.read()
+    assert raw.startswith(JsonCodec.GZIP_MAGIC) == (compression == "gzip")
+    assert (b"\n" in JsonCodec.decompress(raw)) == (format == "pretty")
+    assert os.listdir(tmp_path) == ["project.json"]
+
+
+def test_backends_write_same_json(backend):
+    data = {"gathered_data": [{"daily": {1: {"Pass": 1}}, "name": "日本語"}]}
+    expected = json.loads(JsonCodec.JsonCodec(backend="json").serialize(data))
+
+    # 文字列以外のキーは標準のjsonと同じく文字列に変換する
+    assert json.loads(JsonCodec.JsonCodec(backend=backend).serialize(data)) == expected == {"gathered_data": [{"daily": {"1": {"Pass": 1}}, "name": "日本語"}]}
+
+
+@requires_orjson
+def test_orjson_falls_back_for_unsupported_values():
+    # orjsonは64bitを超える整数を変換できないため、標準のjsonで変換する
+    data = {"value": 2 ** 70}
+
+    assert JsonCodec.JsonCodec(backend="orjson").serialize(data) == JsonCodec.JsonCodec(backend="json").serialize(data)
+
+
+@requires_orjson
+def test_loads_falls_back_for_values_orjson_cannot_read():
+    # 標準のjsonが出力するNaNはorjsonでは読み込めない
+    raw = json.dumps({"rate": float("nan")}).encode("utf-8")
+
+    assert JsonCodec.loads(raw)["rate"] != JsonCodec.loads(raw)["rate"]
+
+
+def test_without_orjson(tmp_path, monkeypatch):
+    monkeypatch.setattr(JsonCodec, "orjson", None)
+    codec = JsonCodec.JsonCodec(backend="orjson")
+    path = str(tmp_path / "project.json")
+
+    JsonCodec.write_bytes(path, codec.dumps({1: "a", **DATA}))
+
+    assert JsonCodec.read(path) == {"1": "a", **DATA}
+
+
+def test_reads_legacy_indented_file(tmp_path):
+    path = str(tmp_path / "project.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(DATA, f, ensure_ascii=False, indent=2)
+
+    assert JsonCodec.read(path) == DATA
+    assert Project.load_header(path) == DATA["project"]
+
+
+def test_reads_file_with_bom(tmp_path):
+    path = str(tmp_path / "project.json")
+    with open(path, "w", encoding="utf-8-sig") as f:
+        json.dump(DATA, f, ensure_ascii=False, indent=2)
+
+    assert JsonCodec.read(path) == DATA
+    assert Project.load_header(path) == DATA["project"]
+
+
+@pytest.mark.parametrize("compression", ["gzip", pytest.param("zstd", marks=requires_zstd)])
+def test_load_header_of_compressed_file(tmp_path, monkeypatch, compression):
+    path = str(tmp_path / "project.json")
+    data = {**DATA, "gathered_data": DATA["gathered_data"] * 5000}
+    JsonCodec.write_bytes(path, JsonCodec.JsonCodec(compression=compression).dumps(data))
+
+    # 集計データは読み込まない(先頭の一部を展開した時点で読込を終了する)
+    monkeypatch.setattr(Project, "HEADER_CHUNK_SIZE", 1024)
+    reads = []
+    open_text = JsonCodec.open_text
+
+    def spy(file_path):
+        f = open_text(file_path)
+        read = f.read
+        f.read = lambda size=-1: reads.append(size) or read(size)
+        return f
+
+    monkeypatch.setattr(JsonCodec, "open_text", spy)
+
+    assert Project.load_header(path) == DATA["project"]
+    assert len(reads) == 1
+
+
+def test_load_header_when_project_is_not_first(tmp_path):
+    path = str(tmp_path / "project.json")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"gathered_data": DATA["gathered_data"], "project": DATA["project"]}, f)
+
+    assert Project.load_header(path) == DATA["project"]
+
+
+def test_zstd_falls_back_to_gzip_without_zstandard(monkeypatch, settings):
+    monkeypatch.setattr(JsonCodec, "zstandard", None)
+    settings["project_file"]["compression"] = "zstd"
+
+    codec = JsonCodec.from_settings(settings)
+
+    assert codec.compression == "gzip"
+    assert JsonCodec.loads(codec.dumps(DATA)) == DATA
+
+
+def test_zstd_file_without_zstandard_raises(monkeypatch):
+    monkeypatch.setattr(JsonCodec, "zstandard", None)
+
+    with pytest.raises(RuntimeError):
+        JsonCodec.loads(JsonCodec.ZSTD_MAGIC + b"\x00" * 8)
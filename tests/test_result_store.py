@@ -0,0 +1,147 @@
+import copy
+import glob
+import os
+
+import pytest
+
+import StartProcess
+from libs import DataConversion, JsonCodec, Project, ResultStore
+
+# 集計データのSQLiteストア: 保存した集計結果(キーの順序を含む)の復元と、件数の絞り込み・合計
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "input_sample")
+
+
+@pytest.fixture(scope="module")
+def gathered(definition):
+    """input_sample のxlsxファイルの集計データ"""
+    files = [{"fullpath": path, "temp_dir": ""} for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.xlsx")))]
+    return StartProcess.aggregate_files(files, definition, max_workers=1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore.open_store(str(tmp_path / "project.json")) as store:
+        yield store
+
+
+def ok_results(gathered):
+    return [result for result in gathered if "error" not in result and "warning" not in result]
+
+
+def sum_by_env(gathered):
+    """環境別・日付別の件数の合計(日付のある件数のみ)"""
+    total = {}
+    for result in ok_results(gathered):
+        for env, daily in (result.get("by_env") or {}).items():
+            for date, values in daily.items():
+                for key, count in values.items():
+                    counts = total.setdefault(env, {}).setdefault(date, {})
+                    counts[key] = counts.get(key, 0) + count
+    return total
+
+
+def sum_by_name(gathered):
+    total = {}
+    for result in ok_results(gathered):
+        for date, values in (result.get("by_name") or {}).items():
+            for person, count in values.items():
+                counts = total.setdefault(date, {})
+                counts[person] = counts.get(person, 0) + count
+    return total
+
+
+def test_replace_round_trip(store, gathered):
+    store.replace(gathered)
+
+    loaded = store.load()
+
+    assert loaded == gathered
+    # キーの順序(画面・JSONの出力順)も保存時と同じ
+    assert [list(result) for result in loaded] == [list(result) for result in gathered]
+    assert [list(result.get("by_env") or {}) for result in loaded] == [list(result.get("by_env") or {}) for result in gathered]
+
+
+def test_empty_environment_round_trip(tmp_path, definition, sample_path):
+    """日付のある件数がない環境も保存・復元する"""
+    result = StartProcess.aggregate_files([{"fullpath": sample_path("sample7_日付なし.xlsx"), "temp_dir": ""}], definition, max_workers=1)
+    assert result[0]["by_env"] == {"環境a": {}}
+    project_path = str(tmp_path / "project.json")
+
+    Project.save_to_json(file_path=project_path, input_data=result, project_data={}, use_store=True, codec=JsonCodec.JsonCodec())
+
+    with ResultStore.open_store(project_path) as store:
+        assert store.load() == result
+    assert Project.load_from_json(project_path)["gathered_data"] == result
+
+
+def test_upsert_replaces_in_place_and_appends(store, gathered):
+    store.replace(gathered[:3])
+    updated = copy.deepcopy(gathered[1])
+    updated["selector_label"] = "updated"
+
+    store.upsert(updated)
+    store.upsert(gathered[3])
+
+    assert store.load() == [gathered[0], updated, gathered[2], gathered[3]]
+
+
+def test_update_and_delete(store, gathered):
+    store.replace(gathered[:3])
+    updated = copy.deepcopy(gathered[0])
+    updated["selector_label"] = "updated"
+
+    store.update([updated, gathered[3]], remove_filepaths=[gathered[1]["filepath"]])
+    assert store.load() == [updated, gathered[2], gathered[3]]
+
+    store.delete([gathered[2]["filepath"]])
+    assert store.load() == [updated, gathered[3]]
+
+
+def test_load_filters_and_without_counts(store, gathered):
+    store.replace(gathered)
+    labels = [gathered[2]["selector_label"], gathered[0]["selector_label"]]
+
+    assert store.load(selector_labels=labels) == [gathered[0], gathered[2]]
+    assert store.load(filepaths=[gathered[1]["filepath"]]) == [gathered[1]]
+    assert store.files() == [{key: value for key, value in result.items() if key not in ResultStore.COUNT_KEYS} for result in gathered]
+
+
+def test_daily_matches_aggregate(store, gathered):
+    store.replace(gathered)
+
+    assert store.daily() == DataConversion.aggregate_all_daily(gathered)
+    one = [gathered[0]]
+    assert store.daily(filepaths=[gathered[0]["filepath"]]) == DataConversion.aggregate_all_daily(one)
+
+
+def test_daily_date_range(store, gathered):
+    store.replace(gathered)
+    dates = sorted(DataConversion.aggregate_all_daily(gathered))
+    date_from, date_to = dates[1], dates[-2]
+
+    expected = {date: values for date, values in DataConversion.aggregate_all_daily(gathered).items() if date_from <= date <= date_to}
+
+    assert store.daily(date_from=date_from, date_to=date_to) == expected
+
+
+def test_by_env_matches_sum(store, gathered):
+    store.replace(gathered)
+    expected = sum_by_env(gathered)
+    assert expected
+
+    assert store.by_env() == expected
+    env = next(iter(expected))
+    assert store.by_env(envs=[env]) == {env: expected[env]}
+
+
+def test_by_name_matches_sum(store, gathered):
+    store.replace(gathered)
+    expected = sum_by_name(gathered)
+    assert expected
+
+    assert store.by_name() == expected
+    person = next(iter(next(iter(expected.values()))))
+    assert store.by_name(persons=[person]) == {
+        date: {person: values[person]} for date, values in expected.items() if person in values
+    }
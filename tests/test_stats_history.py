@@ -0,0 +1,110 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import StartProcess
+from libs import AppConfig, StatsHistory
+
+# 統計の履歴: 再集計ごとのファイル別の統計のスナップショットの記録・日ごとのまとめ・合計の取得
+
+
+def make_result(filepath, completed, all=10, warning=False):
+    result = {"file": filepath.rsplit("/", 1)[-1], "filepath": filepath, "identifier": "",
+              "stats": {"all": all, "excluded": 0, "available": all, "executed": completed, "completed": completed, "incompleted": all - completed, "planned": all}}
+    if warning:
+        result["warning"] = {"message": "warning"}
+    return result
+
+
+@pytest.fixture
+def history(tmp_path):
+    with StatsHistory.open_history(str(tmp_path / "project.json")) as history:
+        yield history
+
+
+def test_record_skips_results_without_stats(history):
+    snapshot_id = history.record([make_result("/a", 1), {"filepath": "/error", "error": {"type": "x"}}], taken_at=datetime(2025, 1, 1, 9))
+
+    assert history.snapshots() == [{"snapshot_id": snapshot_id, "taken_at": "2025-01-01 09:00:00"}]
+    assert history.totals()[0]["files"] == 1
+
+
+def test_totals_per_snapshot(history):
+    taken_at = datetime(2025, 1, 1, 9)
+    first = history.record([make_result("/a", 1), make_result("/b", 2)], taken_at=taken_at)
+    # 同じ秒に記録したスナップショットも別の行になる
+    second = history.record([make_result("/a", 3), make_result("/b", 4, warning=True)], taken_at=taken_at)
+
+    totals = history.totals()
+
+    assert [(row["snapshot_id"], row["files"], row["completed"]) for row in totals] == [(first, 2, 3), (second, 1, 3)]
+    assert [row["completed"] for row in history.totals(filepaths=["/b"])] == [2]
+    assert [row["completed"] for row in history.file_history("/b")] == [2, 4]
+
+
+def test_daily_uses_last_snapshot_of_day(history):
+    history.record([make_result("/a", 1)], taken_at=datetime(2025, 1, 1, 9))
+    history.record([make_result("/a", 2)], taken_at=datetime(2025, 1, 1, 18))
+    history.record([make_result("/a", 5), make_result("/b", 1)], taken_at=datetime(2025, 1, 3, 9))
+
+    daily = history.daily()
+
+    assert list(daily) == ["2025-01-01", "2025-01-03"]
+    assert daily["2025-01-01"]["completed"] == 2
+    assert daily["2025-01-03"] == {"files": 2, "all": 20, "excluded": 0, "available": 20, "executed": 6, "completed": 6, "incompleted": 14, "planned": 20}
+    assert list(history.daily(date_from="2025-01-02")) == ["2025-01-03"]
+    assert list(history.daily(date_to="2025-01-02")) == ["2025-01-01"]
+
+
+def test_compact_keeps_last_snapshot_per_old_day(history):
+    for hour in (9, 12, 18):
+        history.record([make_result("/a", hour)], taken_at=datetime(2025, 1, 1, hour))
+    for hour in (9, 18):
+        history.record([make_result("/a", hour)], taken_at=datetime(2025, 1, 10, hour))
+
+    removed = history.compact(keep_days=7, now=datetime(2025, 1, 12))
+
+    assert removed == 2
+    assert [row["taken_at"] for row in history.snapshots()] == ["2025-01-01 18:00:00", "2025-01-10 09:00:00", "2025-01-10 18:00:00"]
+    assert [row["completed"] for row in history.file_history("/a")] == [18, 9, 18]
+
+
+def test_skip_unchanged(history):
+    gathered = [make_result("/a", 1), make_result("/b", 2)]
+
+    first = history.record(gathered, skip_unchanged=True)
+    assert first is not None
+    assert history.record(gathered, skip_unchanged=True) is None
+    assert history.record([make_result("/a", 1), make_result("/b", 3)], skip_unchanged=True) is not None
+    assert len(history.snapshots()) == 2
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch, settings, sample_path):
+    project_path = str(tmp_path / "project.json")
+    with open(project_path, "w", encoding="utf-8") as f:
+        json.dump({"project": {"project_name": "p", "files": [{"type": "local", "path": sample_path("sample1.xlsx")}]}}, f)
+    settings["cache"]["dir"] = str(tmp_path / "cache")
+    settings["read_option"]["max_workers"] = 1
+    monkeypatch.setattr(AppConfig, "load_settings", lambda: settings)
+    return project_path
+
+
+def history_count(project_path):
+    if not StatsHistory.exists(project_path):
+        return 0
+    with StatsHistory.open_history(project_path) as history:
+        return len(history.snapshots())
+
+
+def test_process_files_records_only_on_reload(project):
+    StartProcess.process_files([project], project, web_ui=True, show_dialog=False)
+    assert history_count(project) == 0
+
+    StartProcess.process_files([project], project, on_reload=True, web_ui=True, show_dialog=False)
+    assert history_count(project) == 1
+
+    # 統計が変わらない再集計は記録しない
+    StartProcess.process_files([project], project, on_reload=True, web_ui=True, show_dialog=False)
+    assert history_count(project) == 1
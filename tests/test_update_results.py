@@ -0,0 +1,146 @@
+import multiprocessing
+import time
+
+import pytest
+
+from libs import ColumnarData, JsonCodec, Project, ResultStore
+
+# プロジェクトの集計データのファイルごとの更新: 置き換え・追加・削除と、複数プロセスからの同時更新
+
+CODEC = JsonCodec.JsonCodec()
+WRITERS = 4
+UPDATES = 20
+
+
+def make_result(filepath, count=1, last_loaded="2025-01-01 00:00:00"):
+    return {"file": filepath.rsplit("/", 1)[-1], "filepath": filepath, "last_loaded": last_loaded,
+            "daily": {"2025-01-01": {"Pass": count}}, "by_env": {"環境a": {}}, "by_name": {}}
+
+
+def filepaths(project_path):
+    return [result["filepath"] for result in Project.load_from_json(project_path)["gathered_data"]]
+
+
+@pytest.fixture(params=[
+    pytest.param({"use_store": False, "columnar": False}, id="json"),
+    pytest.param({"use_store": False, "columnar": True}, id="columnar"),
+    pytest.param({"use_store": True, "columnar": False}, id="store"),
+])
+def project(tmp_path, request):
+    """3ファイルの集計データを保存したプロジェクトファイル"""
+    project_path = str(tmp_path / "project.json")
+    gathered = [make_result(f"/f{i}") for i in range(3)]
+    Project.save_to_json(project_path, gathered, project_data={"project_name": "p"}, codec=CODEC, **request.param)
+    return project_path, request.param
+
+
+def test_replace_keeps_position(project):
+    project_path, options = project
+    updated = make_result("/f1", count=9)
+
+    Project.update_results(project_path, [updated], codec=CODEC, **options)
+
+    gathered = Project.load_from_json(project_path)["gathered_data"]
+    assert [result["filepath"] for result in gathered] == ["/f0", "/f1", "/f2"]
+    assert gathered[1] == updated
+
+
+def test_append_and_remove(project):
+    project_path, options = project
+
+    Project.update_results(project_path, [make_result("/new")], remove_filepaths=["/f0"], codec=CODEC, **options)
+
+    assert filepaths(project_path) == ["/f1", "/f2", "/new"]
+
+
+def test_keeps_format_and_updates_last_loaded(project):
+    project_path, options = project
+
+    Project.update_results(project_path, [make_result("/f2", last_loaded="2030-01-01 00:00:00")], codec=CODEC, **options)
+
+    json_data = Project.read_json(project_path)
+    assert json_data["project"]["project_name"] == "p"
+    assert json_data["project"]["last_loaded"] == "2030-01-01 00:00:00"
+    if options["use_store"]:
+        assert "gathered_data" not in json_data
+    else:
+        assert ColumnarData.is_encoded(json_data["gathered_data"]) == options["columnar"]
+
+
+def test_migrates_json_to_store(tmp_path):
+    project_path = str(tmp_path / "project.json")
+    Project.save_to_json(project_path, [make_result(f"/f{i}") for i in range(3)], project_data={}, use_store=False, codec=CODEC)
+
+    Project.update_results(project_path, [make_result("/f2", count=5)], use_store=True, codec=CODEC)
+
+    assert "gathered_data" not in Project.read_json(project_path)
+    with ResultStore.open_store(project_path) as store:
+        assert [result["filepath"] for result in store.load()] == ["/f0", "/f1", "/f2"]
+        assert store.daily() == {"2025-01-01": {"Pass": 7}}
+
+
+def test_save_project_settings_only(project):
+    """集計データを渡さない場合はプロジェクト設定のみを保存し、集計データはそのまま残す"""
+    project_path, _ = project
+    before = Project.load_from_json(project_path)["gathered_data"]
+
+    Project.save_to_json(project_path, None, project_data={"project_name": "renamed"}, codec=CODEC)
+
+    json_data = Project.load_from_json(project_path)
+    assert json_data["project"]["project_name"] == "renamed"
+    assert json_data["gathered_data"] == before
+
+
+def write_results(project_path, prefix, options):
+    for i in range(UPDATES):
+        Project.update_results(project_path, [make_result(f"/{prefix}/{i}", count=i)], codec=CODEC, **options)
+
+
+def read_snapshots(project_path, stop, queue):
+    """更新中に読み込んだ集計データが、常にいずれかの時点の完全なデータであることを確認する"""
+    reads = 0
+    errors = []
+    while not stop.is_set():
+        try:
+            gathered = Project.load_from_json(project_path)["gathered_data"]
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        reads += 1
+        paths = [result["filepath"] for result in gathered]
+        if len(paths) != len(set(paths)):
+            errors.append(f"duplicated: {paths}")
+        # 各プロセスは順に追加するため、読み込んだ時点までに追加した集計結果が欠けずに揃っている
+        for k in range(WRITERS):
+            indexes = sorted(int(path.rsplit("/", 1)[-1]) for path in paths if path.startswith(f"/w{k}/"))
+            if indexes != list(range(len(indexes))):
+                errors.append(f"incomplete: {paths}")
+        if any(result.get("daily") != {"2025-01-01": {"Pass": int(result["filepath"].rsplit("/", 1)[-1])}} for result in gathered):
+            errors.append("counts mismatch")
+    queue.put((reads, errors[:5]))
+
+
+@pytest.mark.parametrize("options", [
+    pytest.param({"use_store": False, "columnar": False}, id="json"),
+    pytest.param({"use_store": True, "columnar": False}, id="store"),
+])
+def test_concurrent_writers_and_reader(tmp_path, options):
+    project_path = str(tmp_path / "project.json")
+    Project.save_to_json(project_path, [], project_data={"project_name": "p"}, codec=CODEC, **options)
+    stop = multiprocessing.Event()
+    queue = multiprocessing.Queue()
+    reader = multiprocessing.Process(target=read_snapshots, args=(project_path, stop, queue))
+    writers = [multiprocessing.Process(target=write_results, args=(project_path, f"w{k}", options)) for k in range(WRITERS)]
+    reader.start()
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(60)
+    time.sleep(0.1)
+    stop.set()
+    reads, errors = queue.get(timeout=60)
+    reader.join(60)
+
+    assert all(writer.exitcode == 0 for writer in writers)
+    assert reads > 0 and errors == []
+    assert sorted(filepaths(project_path)) == sorted(f"/w{k}/{i}" for k in range(WRITERS) for i in range(UPDATES))